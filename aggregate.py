@@ -0,0 +1,259 @@
+import hashlib
+import logging
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from transform import GOVERNANCE_MAPPING, ms_to_iso
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP_KEY = ("serviceName", "actionName", "departmentName")
+# Fields of a group's first event that its use case is described by
+SAMPLE_FIELDS = ("serviceName", "actionName", "departmentName")
+
+
+class HyperLogLog:
+    """Approximate distinct counter with a fixed memory ceiling.
+
+    Exact while small: hashes are kept in a set until there are more than
+    `sparse_limit` of them, then folded into 2**precision one-byte
+    registers (1 KiB at the default precision, ~3% standard error).
+    Counters with the same precision can be merged losslessly.
+    """
+
+    def __init__(self, precision: int = 10, sparse_limit: int = 64):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.sparse_limit = sparse_limit
+        self.sparse: Optional[set] = set()
+        self.registers: Optional[bytearray] = None
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def _fold(self, h: int) -> None:
+        p = self.precision
+        index = h >> (64 - p)
+        rest = h & ((1 << (64 - p)) - 1)
+        rank = (64 - p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def _densify(self) -> None:
+        self.registers = bytearray(1 << self.precision)
+        for h in self.sparse:
+            self._fold(h)
+        self.sparse = None
+
+    def add(self, value: str) -> None:
+        h = self._hash(value)
+        if self.sparse is not None:
+            self.sparse.add(h)
+            if len(self.sparse) > self.sparse_limit:
+                self._densify()
+        else:
+            self._fold(h)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs with different precision")
+        if other.sparse is not None:
+            for h in other.sparse:
+                if self.sparse is not None:
+                    self.sparse.add(h)
+                else:
+                    self._fold(h)
+            if self.sparse is not None and len(self.sparse) > self.sparse_limit:
+                self._densify()
+            return
+        if self.sparse is not None:
+            self._densify()
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def state(self) -> Dict[str, Any]:
+        """JSON-serializable copy of the counter, restored by from_state()"""
+        if self.sparse is not None:
+            return {"p": self.precision, "l": self.sparse_limit, "s": sorted(self.sparse)}
+        return {"p": self.precision, "l": self.sparse_limit, "r": self.registers.hex()}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "HyperLogLog":
+        hll = cls(state["p"], state["l"])
+        if "r" in state:
+            hll.sparse = None
+            hll.registers = bytearray.fromhex(state["r"])
+        else:
+            hll.sparse = set(state["s"])
+        return hll
+
+    def count(self) -> int:
+        if self.sparse is not None:
+            return len(self.sparse)
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self) -> int:
+        return self.count()
+
+
+def event_field(event: Dict[str, Any], field: str) -> Any:
+    """Look a field up on the event, then on its first intent request (actionName, departmentName)"""
+    if field in event:
+        return event[field]
+    requests = (event.get("intent") or {}).get("request") or [{}]
+    return requests[0].get(field)
+
+
+class EventGroup:
+    """Running statistics for all events sharing one group key"""
+
+    def __init__(self, key: Tuple[Any, ...]):
+        self.key = key
+        self.count = 0
+        self.first_seen: Optional[float] = None
+        self.last_seen: Optional[float] = None
+        self.users = HyperLogLog()
+        self.decisions: Dict[str, int] = {}
+        # First event of the group, kept for descriptive fields
+        self.sample: Optional[Dict[str, Any]] = None
+
+    def add(self, event: Dict[str, Any]) -> None:
+        self.count += 1
+        if self.sample is None:
+            self.sample = event
+        start = event.get("startTime")
+        end = event.get("endTime", start)
+        if start is not None and (self.first_seen is None or start < self.first_seen):
+            self.first_seen = start
+        if end is not None and (self.last_seen is None or end > self.last_seen):
+            self.last_seen = end
+        user = (event.get("userClaim") or {}).get("email")
+        if user:
+            self.users.add(user)
+        label = (event.get("policyDecision") or {}).get("label")
+        if label:
+            self.decisions[label] = self.decisions.get(label, 0) + 1
+
+    def merge(self, other: "EventGroup") -> None:
+        self.count += other.count
+        if self.sample is None:
+            self.sample = other.sample
+        if other.first_seen is not None and (self.first_seen is None or other.first_seen < self.first_seen):
+            self.first_seen = other.first_seen
+        if other.last_seen is not None and (self.last_seen is None or other.last_seen > self.last_seen):
+            self.last_seen = other.last_seen
+        self.users.merge(other.users)
+        for label, n in other.decisions.items():
+            self.decisions[label] = self.decisions.get(label, 0) + n
+
+    def state(self) -> Dict[str, Any]:
+        """JSON-serializable copy of the group, restored by from_state(); of the
+        sample event only the SAMPLE_FIELDS its use case is described by are kept"""
+        sample = None
+        if self.sample is not None:
+            sample = {field: event_field(self.sample, field) for field in SAMPLE_FIELDS}
+        return {"k": list(self.key), "c": self.count, "f": self.first_seen, "l": self.last_seen,
+                "u": self.users.state(), "d": dict(self.decisions), "s": sample}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "EventGroup":
+        group = cls(tuple(state["k"]))
+        group.count = state["c"]
+        group.first_seen = state["f"]
+        group.last_seen = state["l"]
+        group.users = HyperLogLog.from_state(state["u"])
+        group.decisions = dict(state["d"])
+        group.sample = state["s"]
+        return group
+
+    def top_decision(self) -> Optional[str]:
+        """Most frequent policyDecision label (ties broken alphabetically)"""
+        if not self.decisions:
+            return None
+        return min(self.decisions, key=lambda label: (-self.decisions[label], label))
+
+
+class Aggregator:
+    """Collapse raw gateway events into one EventGroup per distinct key.
+
+    Memory is proportional to the number of distinct keys, not events: each
+    group holds a few counters, a small label histogram and a bounded
+    HyperLogLog of users.
+    """
+
+    def __init__(self, key_fields: Iterable[str] = DEFAULT_GROUP_KEY):
+        self.key_fields = tuple(key_fields)
+        self.groups: Dict[Tuple[Any, ...], EventGroup] = {}
+        self.events = 0
+
+    def key(self, event: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(event_field(event, field) for field in self.key_fields)
+
+    def add(self, event: Dict[str, Any]) -> None:
+        key = self.key(event)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = EventGroup(key)
+        group.add(event)
+        self.events += 1
+
+    def update(self, events: Iterable[Dict[str, Any]]) -> "Aggregator":
+        for event in events:
+            self.add(event)
+        return self
+
+    def merge(self, other: "Aggregator") -> None:
+        if other.key_fields != self.key_fields:
+            raise ValueError("Cannot merge aggregators grouped by different keys")
+        for key, group in other.groups.items():
+            mine = self.groups.get(key)
+            if mine is None:
+                self.groups[key] = group
+            else:
+                mine.merge(group)
+        self.events += other.events
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def iter_use_cases(self) -> Iterator[Dict[str, Any]]:
+        """Yield one use case per group, in the shape reformat_json.py produces"""
+        for group in self.groups.values():
+            yield group_use_case(group)
+
+
+def group_use_case(group: EventGroup) -> Dict[str, Any]:
+    sample = group.sample or {}
+    service = event_field(sample, "serviceName") or "Unknown AI"
+    action = event_field(sample, "actionName") or "Unknown Use Case"
+    department = event_field(sample, "departmentName")
+    decision = group.top_decision()
+    decisions = ", ".join(f"{label}: {n}" for label, n in sorted(group.decisions.items()))
+    custom_fields: List[Dict[str, Any]] = [
+        {"custom_field_id": "events_001", "name": "Event Count", "value": group.count},
+        {"custom_field_id": "users_001", "name": "Distinct Users", "value": group.users.count()},
+        {"custom_field_id": "policy_001", "name": "Policy Decisions", "value": decisions}
+    ]
+    return {
+        "name": f"{service}: {action}" + (f" ({department})" if department else ""),
+        "description": (f"{group.count} {service} events from {group.users.count()} users"
+                        + (f" in {department}" if department else "")),
+        "ai_type": service,
+        "governance_status": GOVERNANCE_MAPPING.get(decision, 0),
+        "domains": [],
+        "industries": [department or "General"],
+        "regions": [],
+        "risk_category_level": None,
+        "custom_fields": custom_fields,
+        "questionnaires": [],
+        "inserted_at": ms_to_iso(group.first_seen),
+        "updated_at": ms_to_iso(group.last_seen)
+    }
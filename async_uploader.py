@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterable, Optional, Tuple, Union
+
+import requests
+
+from batch_upload import inline_custom_fields
+from credo_client import CredoClient
+from custom_field_queue import CustomFieldQueue, DEFAULT_CONCURRENCY as DEFAULT_CUSTOM_FIELD_CONCURRENCY
+from upload_journal import UploadJournal
+from name_index import NameIndex
+from log_control import ProgressLogger
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncUploader:
+    """Upload use cases concurrently over a shared keep-alive connection pool.
+
+    At most `concurrency` creates are in flight at any time (the client's
+    request scheduler may lower the effective limit under load). Custom
+    fields are sent inside the create request when the use case has none of
+    its own; otherwise their PUT is handed to a CustomFieldQueue of
+    `custom_field_concurrency` workers so it never holds up a create slot.
+    Blocking HTTP calls run on thread pools, and the client's connection
+    pool is grown to match so every worker always has a warm connection
+    available. name_index may be given as a function that builds it (e.g.
+    by listing the remote names); it is then called on the first create,
+    so a run that creates nothing makes no listing request.
+    """
+
+    def __init__(self, client: CredoClient, concurrency: int = 16,
+                 custom_fields: Optional[Dict[str, Any]] = None, journal: Optional[UploadJournal] = None,
+                 name_index: Union[NameIndex, Callable[[], NameIndex], None] = None,
+                 on_created: Optional[Callable[[Dict[str, Any], Optional[str]], None]] = None,
+                 inline_custom_fields: bool = True,
+                 custom_field_concurrency: int = DEFAULT_CUSTOM_FIELD_CONCURRENCY):
+        self.client = client
+        self.journal = journal
+        self._name_index = name_index
+        self._name_index_lock = threading.Lock()
+        self.on_created = on_created
+        self.concurrency = max(1, concurrency)
+        self.custom_fields = custom_fields
+        self.inline_custom_fields = inline_custom_fields
+        self.custom_field_concurrency = max(0, custom_field_concurrency)
+        # Synchronous outside upload(), which swaps in a concurrent queue for its duration
+        self.custom_field_queue = CustomFieldQueue(self._set_custom_fields, 0, journal)
+        self.client.resize_pool(self.concurrency + self.custom_field_concurrency)
+
+    @property
+    def name_index(self) -> NameIndex:
+        with self._name_index_lock:
+            if self._name_index is None:
+                self._name_index = NameIndex()
+            elif not isinstance(self._name_index, NameIndex):
+                self._name_index = self._name_index()
+            return self._name_index
+
+    def _create(self, payload: Dict[str, Any]) -> requests.Response:
+        return self.client.create_use_case(self.client.encode(payload))
+
+    def _set_custom_fields(self, use_case_id: str) -> bool:
+        response = self.client.set_custom_fields(use_case_id, self.custom_fields)
+        return response.status_code in [200, 201]
+
+    def _created(self, use_case: Dict[str, Any], use_case_id: Optional[str]) -> None:
+        if self.on_created:
+            self.on_created(use_case, use_case_id)
+
+    def _create_payload(self, use_case: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Copy of use_case to POST, and whether its custom fields still need a PUT afterwards"""
+        if self.inline_custom_fields:
+            item = inline_custom_fields(use_case, self.custom_fields)
+            if item is not use_case:
+                return item, False
+        return use_case.copy(), bool(self.custom_fields)
+
+    def upload_one(self, i: int, use_case: Dict[str, Any], key: Optional[str] = None) -> bool:
+        """Create a single use case and inline or queue its custom fields (blocking).
+
+        key is the use case's journal key; upload() takes keys in input order
+        so they do not depend on which worker finishes first.
+        """
+        journal = self.journal
+        if journal and key is None:
+            key = journal.key(use_case)
+        entry = journal.get(key) if journal else None
+        name = use_case["name"]
+        try:
+            if entry and entry[1]:
+                logger.debug("Skipping use case %d, already uploaded as %s", i, entry[0])
+                METRICS.inc("uploads_total", result="skipped")
+                self._created(use_case, entry[0])
+                return True
+            if entry and entry[0]:
+                logger.debug("Use case %d already created as %s, resuming at custom fields", i, entry[0])
+                METRICS.inc("uploads_total", result="resumed")
+                self.custom_field_queue.submit(key, entry[0])
+                self._created(use_case, entry[0])
+                return True
+
+            payload, needs_custom_fields = self._create_payload(use_case)
+            payload["name"] = self.name_index.reserve(name)
+            response = self._create(payload)
+            if response.status_code == 422 and "name has already been taken" in response.text:
+                METRICS.inc("name_conflicts_total")
+                payload["name"] = self.name_index.reserve(name)
+                logger.info(f"Name {name!r} already taken, retrying as {payload['name']!r}")
+                response = self._create(payload)
+
+            if response.status_code not in [200, 201]:
+                METRICS.inc("uploads_total", result="failed")
+                logger.error(f"Failed to upload use case {i}: {response.status_code} {response.text}")
+                return False
+
+            use_case_id = response.json().get("data", {}).get("id")
+            logger.debug("Uploaded use case %d (%r) as %s", i, payload["name"], use_case_id)
+            METRICS.inc("uploads_total", result="created")
+            needs_custom_fields = bool(use_case_id and needs_custom_fields)
+            if journal:
+                journal.record(key, use_case_id, not needs_custom_fields)
+            self._created(use_case, use_case_id)
+            if needs_custom_fields:
+                self.custom_field_queue.submit(key, use_case_id)
+            return True
+        except Exception as e:
+            METRICS.inc("uploads_total", result="failed")
+            logger.error(f"Error uploading use case {i}: {str(e)}")
+            return False
+
+    async def upload(self, use_cases: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Upload all use cases, returning counts, elapsed time and throughput"""
+        loop = asyncio.get_running_loop()
+        uploaded = failed = 0
+        pending = set()
+        start = time.perf_counter()
+        progress = ProgressLogger(logger, "Async upload")
+
+        def collect(done) -> None:
+            nonlocal uploaded, failed
+            for task in done:
+                ok = task.result()
+                if ok:
+                    uploaded += 1
+                else:
+                    failed += 1
+                progress.update(ok)
+
+        synchronous_queue = self.custom_field_queue
+        self.custom_field_queue = CustomFieldQueue(self._set_custom_fields, self.custom_field_concurrency,
+                                                   self.journal)
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for i, use_case in enumerate(use_cases, 1):
+                    # Only pull the next item from the source once a slot frees up
+                    if len(pending) >= self.concurrency:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        collect(done)
+                    key = self.journal.key(use_case) if self.journal else None
+                    pending.add(loop.run_in_executor(executor, self.upload_one, i, use_case, key))
+                if pending:
+                    done, _ = await asyncio.wait(pending)
+                    collect(done)
+        finally:
+            # Blocks until the last queued PUTs are done, so they count towards elapsed
+            await loop.run_in_executor(None, self.custom_field_queue.close)
+            self.custom_field_queue = synchronous_queue
+
+        elapsed = time.perf_counter() - start
+        total = uploaded + failed
+        return {
+            "uploaded": uploaded,
+            "failed": failed,
+            "elapsed": elapsed,
+            "items_per_sec": total / elapsed if elapsed > 0 else 0.0
+        }
+
+    def run(self, use_cases: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Synchronous entry point around upload()"""
+        return asyncio.run(self.upload(use_cases))
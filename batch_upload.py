@@ -0,0 +1,120 @@
+import logging
+import re
+from typing import Dict, Any, Iterable, Iterator, List, Tuple, Optional, Callable
+
+from serialization import dumpb
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ITEMS = 500
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+# The import endpoint takes {"data": {"items": [...]}} (see successful_bulk_upload.json)
+_BODY_PREFIX = b'{"data":{"items":['
+_BODY_SUFFIX = b']}}'
+_ENVELOPE_SIZE = len(_BODY_PREFIX) + len(_BODY_SUFFIX)
+
+_ITEM_POINTER = re.compile(r"/items/(\d+)")
+
+# (1-based position in the overall input, original use case, import item, encoded import item)
+ChunkItem = Tuple[int, Dict[str, Any], Dict[str, Any], bytes]
+
+
+def inline_custom_fields(use_case: Dict[str, Any], custom_fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of use_case with custom_fields embedded in the import item shape"""
+    if "custom_fields" in use_case or not custom_fields:
+        return use_case
+    item = dict(use_case)
+    item["custom_fields"] = [
+        {"custom_field_id": field_id, "value": value}
+        for field_id, value in custom_fields.items()
+    ]
+    return item
+
+
+def chunk_use_cases(use_cases: Iterable[Dict[str, Any]],
+                    max_items: int = DEFAULT_MAX_ITEMS,
+                    max_bytes: int = DEFAULT_MAX_BYTES,
+                    prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> Iterator[List[ChunkItem]]:
+    """Split use cases into chunks bounded by item count and encoded request size.
+
+    Each item is encoded exactly once; encode_import_body() joins the
+    pre-encoded items without re-serializing them. An item that is larger
+    than max_bytes on its own is sent as a chunk of one.
+    """
+    chunk: List[ChunkItem] = []
+    size = _ENVELOPE_SIZE
+    for i, use_case in enumerate(use_cases, 1):
+        item = prepare(use_case) if prepare else use_case
+        encoded = dumpb(item)
+        extra = len(encoded) + (1 if chunk else 0)
+        if chunk and (len(chunk) >= max_items or size + extra > max_bytes):
+            yield chunk
+            chunk = []
+            size = _ENVELOPE_SIZE
+            extra = len(encoded)
+        chunk.append((i, use_case, item, encoded))
+        size += extra
+    if chunk:
+        yield chunk
+
+
+def encode_import_body(chunk: List[ChunkItem]) -> bytes:
+    """Build the import request body from pre-encoded chunk items"""
+    return _BODY_PREFIX + b",".join(encoded for _, _, _, encoded in chunk) + _BODY_SUFFIX
+
+
+def _error_index(error: Dict[str, Any]) -> Optional[int]:
+    for key in ("index", "item_index", "row"):
+        if isinstance(error.get(key), int):
+            return error[key]
+    source = error.get("source")
+    pointer = source.get("pointer", "") if isinstance(source, dict) else ""
+    match = _ITEM_POINTER.search(pointer)
+    return int(match.group(1)) if match else None
+
+
+def parse_import_failures(body: Any, count: int) -> Dict[int, str]:
+    """Map per-item failures in an import response to chunk positions.
+
+    Understands top-level or data-level error lists that identify the item by
+    index/item_index/row or a JSON:API source pointer (/data/items/<n>), as
+    well as per-item results in data.items that carry an error or a failed
+    status. Errors that cannot be tied to an item are logged and ignored,
+    since resending the whole chunk could create duplicates.
+    """
+    failures: Dict[int, str] = {}
+    if not isinstance(body, dict):
+        return failures
+    data = body.get("data") if isinstance(body.get("data"), dict) else {}
+
+    for error in list(body.get("errors") or []) + list(data.get("errors") or []):
+        if not isinstance(error, dict):
+            continue
+        index = _error_index(error)
+        if index is None or not 0 <= index < count:
+            logger.warning(f"Import error not tied to an item: {error}")
+            continue
+        failures[index] = str(error.get("detail") or error.get("message") or error)
+
+    items = data.get("items")
+    if isinstance(items, list):
+        for index, item in enumerate(items[:count]):
+            if not isinstance(item, dict):
+                continue
+            reason = item.get("errors") or item.get("error")
+            if reason or item.get("status") in ("error", "failed"):
+                failures.setdefault(index, str(reason or item.get("status")))
+    return failures
+
+
+def import_item_ids(body: Any, count: int) -> List[Optional[str]]:
+    """Return the created use case id for each chunk position, where the response reports one"""
+    ids: List[Optional[str]] = [None] * count
+    data = body.get("data") if isinstance(body, dict) else None
+    items = data.get("items") if isinstance(data, dict) else None
+    if isinstance(items, list):
+        for index, item in enumerate(items[:count]):
+            if isinstance(item, dict) and isinstance(item.get("id"), str):
+                ids[index] = item["id"]
+    return ids
@@ -0,0 +1,36 @@
+"""Measure event aggregation throughput and how much it shrinks the upload set.
+
+Usage: python -m benchmarks.bench_aggregate [events] [users]
+"""
+import logging
+import sys
+import time
+
+from aggregate import Aggregator
+from benchmarks.synthetic import make_events
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    logging.disable(logging.CRITICAL)
+    events = make_events(n, users)
+
+    start = time.perf_counter()
+    aggregator = Aggregator().update(events)
+    use_cases = list(aggregator.iter_use_cases())
+    elapsed = time.perf_counter() - start
+
+    exact = {}
+    for event in events:
+        exact.setdefault(aggregator.key(event), set()).add(event["userClaim"]["email"])
+    errors = [abs(g.users.count() - len(exact[k])) / len(exact[k]) for k, g in aggregator.groups.items()]
+
+    print(f"events={n} users={users}")
+    print(f"{'throughput:':<22}{n / elapsed:>12,.0f} events/sec")
+    print(f"{'use cases:':<22}{len(use_cases):>12,} ({n / len(use_cases):,.0f}x fewer than one per event)")
+    print(f"{'distinct user error:':<22}{sum(errors) / len(errors):>12.1%} mean, {max(errors):.1%} max")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Compare a fresh connection per call with the pooled CredoClient session.
+
+Usage: python -m benchmarks.bench_client [requests]
+"""
+import json
+import sys
+import time
+
+import requests
+
+from credo_client import CredoClient
+from mock_credo_api import MockCredoServer
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    headers = {"Authorization": "bench", "Content-Type": "application/json"}
+
+    with MockCredoServer() as server:
+        start = time.perf_counter()
+        for i in range(n):
+            requests.post(server.url, headers=headers, data=json.dumps({"name": f"fresh {i}"}))
+        fresh = (time.perf_counter() - start) / n
+
+        with CredoClient(server.url, "bench") as client:
+            start = time.perf_counter()
+            for i in range(n):
+                client.create_use_case(client.encode({"name": f"pooled {i}"}))
+            pooled = (time.perf_counter() - start) / n
+
+    print(f"requests={n}")
+    print(f"{'fresh connection:':<20}{fresh * 1000:8.3f} ms/request")
+    print(f"{'pooled session:':<20}{pooled * 1000:8.3f} ms/request")
+    print(f"{'saved:':<20}{(fresh - pooled) * 1000:8.3f} ms/request ({fresh / pooled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compare intermediate file formats for formatted use cases: size, write and read time.
+
+Usage: python -m benchmarks.bench_columnar [use_cases]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_use_cases
+from columnar import have_parquet, write_use_cases
+from log_stream import iter_records
+from transform import write_json_array
+
+
+def measure(name: str, path: str, write, columns=None) -> None:
+    start = time.perf_counter()
+    write(path)
+    written = time.perf_counter() - start
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_records(path))
+    read = time.perf_counter() - start
+    line = f"{name:<22}{os.path.getsize(path) / 1e6:>8.1f} MB  write {written:6.2f}s  read {read:6.2f}s"
+    if columns:
+        start = time.perf_counter()
+        sum(1 for _ in iter_records(path, columns=columns))
+        line += f"  read {','.join(columns)} {time.perf_counter() - start:6.2f}s"
+    print(f"{line}  ({count} records)")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    logging.disable(logging.CRITICAL)
+    records = make_use_cases(n)
+    columns = ["name", "ai_type"]
+    print(f"use_cases={n}")
+
+    def write_json(path):
+        with open(path, "w") as f:
+            write_json_array(records, f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        measure("json (indent=4)", os.path.join(tmp, "out.json"), write_json, columns)
+        measure("ndjson", os.path.join(tmp, "out.ndjson"), lambda p: write_use_cases(records, p), columns)
+        if have_parquet():
+            measure("parquet", os.path.join(tmp, "out.parquet"), lambda p: write_use_cases(records, p), columns)
+        else:
+            print("parquet               skipped (pyarrow not installed)")
+
+
+if __name__ == "__main__":
+    main()
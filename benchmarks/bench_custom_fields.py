@@ -0,0 +1,47 @@
+"""Compare blocking, queued and inlined custom field assignment for serial uploads.
+
+Usage: python -m benchmarks.bench_custom_fields [items] [latency_ms] [put_workers]
+"""
+import logging
+import os
+import sys
+import time
+
+from benchmarks.bench_upload import make_use_cases
+from mock_credo_api import MockCredoServer
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 5.0) / 1000
+    workers = sys.argv[3] if len(sys.argv) > 3 else "4"
+
+    logging.disable(logging.CRITICAL)
+    os.environ.setdefault("CREDO_AI_API_KEY", "bench")
+    os.environ.setdefault("API_RATE_LIMIT", "0")
+    os.environ["UPLOAD_JOURNAL"] = ""
+    from shadow_ai_detector import UseCaseFormatter
+
+    print(f"items={items} latency={latency * 1000:.1f}ms")
+    modes = [("PUT after each POST", "false", "0"), (f"queued PUTs ({workers} workers)", "false", workers),
+             ("inlined in POST", "true", workers)]
+    with MockCredoServer(latency=latency) as server:
+        os.environ["CREDO_AI_API_URL"] = server.url
+        baseline = None
+        for label, inline, concurrency in modes:
+            os.environ.update(INLINE_CUSTOM_FIELDS=inline, CUSTOM_FIELDS_CONCURRENCY=concurrency)
+            server.names.clear()
+            server.custom_fields.clear()
+            server.requests.clear()
+            formatter = UseCaseFormatter()
+            start = time.perf_counter()
+            formatter.upload_use_cases(make_use_cases(items))
+            rate = items / (time.perf_counter() - start)
+            baseline = baseline or rate
+            print(f"{label + ':':<28}{rate:>8.1f} items/sec {rate / baseline:>5.1f}x  "
+                  f"({server.requests.get('PUT', 0)} PUTs, {len(server.custom_fields)} with custom fields)")
+            formatter.client.close()
+
+
+if __name__ == "__main__":
+    main()
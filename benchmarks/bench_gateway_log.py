@@ -0,0 +1,41 @@
+"""Measure raw gateway log parsing throughput on a synthetic log file.
+
+Usage: python -m benchmarks.bench_gateway_log [lines]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_gateway_log
+from gateway_log import LINE_RE, iter_gateway_events, iter_lines, iter_use_case_candidates
+
+
+def measure(name: str, fn, n: int) -> float:
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    rate = n / elapsed
+    print(f"{name:<22}{rate:>12,.0f} lines/sec {rate * 60 / 1e6:>8.1f}M lines/min  ({count} results)")
+    return rate
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    logging.disable(logging.CRITICAL)
+    fd, path = tempfile.mkstemp(suffix=".log")
+    os.close(fd)
+    try:
+        write_gateway_log(path, n)
+        print(f"lines={n} size={os.path.getsize(path) / 1e6:.1f} MB")
+        regex = measure("regex per line", lambda: sum(1 for line in iter_lines(path) if LINE_RE.match(line)), n)
+        fast = measure("split fast path", lambda: sum(1 for _ in iter_gateway_events(path)), n)
+        measure("use case candidates", lambda: sum(1 for _ in iter_use_case_candidates(iter_gateway_events(path))), n)
+        print(f"speedup vs regex: {fast / regex:.1f}x")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
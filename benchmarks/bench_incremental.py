@@ -0,0 +1,72 @@
+"""Compare re-reading a directory of event logs from scratch with an incremental run after new data arrives.
+
+Usage: python -m benchmarks.bench_incremental [events] [files] [appended_percent]
+"""
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from aggregate import Aggregator
+from benchmarks.synthetic import make_events
+from ingest import aggregate_files, expand_sources
+from ingest_state import IngestState
+
+
+def write_lines(path, events, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    file_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    appended = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    logging.disable(logging.CRITICAL)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        logs = os.path.join(workdir, "logs")
+        os.mkdir(logs)
+        events = sorted(make_events(n), key=lambda e: e["startTime"])
+        new = max(1, int(n * appended / 100))
+        old, recent = events[:n - new], events[n - new:]
+        per_file = -(-len(old) // file_count)
+        # Hourly rotated files; the last one is still being written to
+        for i in range(file_count):
+            write_lines(os.path.join(logs, f"gateway-{i:05d}.ndjson"), old[i * per_file:(i + 1) * per_file])
+        state_path = os.path.join(workdir, "state.jsonl")
+        with IngestState(state_path) as state:
+            aggregate_files(state.plan(expand_sources(logs)), workers=1, watermark=state.seen)
+            state.commit()
+
+        half = len(recent) // 2
+        write_lines(os.path.join(logs, f"gateway-{file_count - 1:05d}.ndjson"), recent[:half], "a")
+        write_lines(os.path.join(logs, f"gateway-{file_count:05d}.ndjson"), recent[half:])
+        print(f"events={n} files={file_count + 1} new events={new} ({appended:g}%)")
+
+        start = time.perf_counter()
+        full = aggregate_files(expand_sources(logs), workers=1)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with IngestState(state_path) as state:
+            delta = aggregate_files(state.plan(expand_sources(logs)), workers=1, watermark=state.seen)
+            state.commit()
+        incremental_time = time.perf_counter() - start
+
+        expected = Aggregator().update(recent)
+        print(f"{'full re-read:':<16}{full_time:>8.3f}s  {full.events:>9,} events")
+        print(f"{'incremental:':<16}{incremental_time:>8.3f}s  {delta.events:>9,} events  "
+              f"{full_time / incremental_time:>6.1f}x faster")
+        print(f"read exactly the new events: {delta.events == expected.events and len(delta) == len(expected)}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
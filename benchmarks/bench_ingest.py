@@ -0,0 +1,51 @@
+"""Transform and aggregate a directory of rotated event exports with one process and with a pool.
+
+Usage: python -m benchmarks.bench_ingest [events] [files] [workers]
+"""
+import filecmp
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_events, write_records
+from ingest import aggregate_files, expand_sources, transform_files
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    file_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    logging.disable(logging.CRITICAL)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        events = make_events(n)
+        per_file = -(-n // file_count)
+        for i in range(file_count):
+            write_records(os.path.join(workdir, f"export-{i:05d}.ndjson"), events[i * per_file:(i + 1) * per_file])
+        del events
+        files = expand_sources(workdir)
+        print(f"events={n} files={len(files)} cores={os.cpu_count()}")
+
+        outputs = []
+        for label, count in (("1 process", 1), (f"{workers} processes", workers)):
+            output = os.path.join(workdir, f"out-{count}.ndjson")
+            start = time.perf_counter()
+            transform_files(files, output, workers=count, shard_bytes=1 << 20)
+            transform_rate = n / (time.perf_counter() - start)
+            start = time.perf_counter()
+            aggregator = aggregate_files(files, workers=count, shard_bytes=1 << 20)
+            aggregate_rate = n / (time.perf_counter() - start)
+            outputs.append((output, list(aggregator.iter_use_cases())))
+            print(f"{label + ':':<16}transform {transform_rate:>10,.0f} events/sec   aggregate {aggregate_rate:>10,.0f} events/sec")
+        same = filecmp.cmp(outputs[0][0], outputs[1][0], shallow=False) and outputs[0][1] == outputs[1][1]
+        print(f"identical output: {same}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""CPU time that logging adds to 10k per-item uploads under each logging mode.
+
+Uploads go to a stub client that answers every request in-process without
+any HTTP, and log output goes to /dev/null, so a row only differs from the
+"logging disabled" row by the cost of building, filtering and formatting
+log records. The "old per-item logging" row replays the log calls the
+upload path made before log_control.py, at INFO.
+
+Usage: python -m benchmarks.bench_logging [items] [repeat]
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+from benchmarks.synthetic import make_use_cases
+from credo_client import CredoClient
+from log_control import configure_logging
+
+MODES = [
+    # name, configure_logging kwargs (None: logging.disable)
+    ("logging disabled", None),
+    ("old per-item logging", dict(level="INFO")),
+    ("payloads unlimited", dict(level="DEBUG", log_payloads=True, payload_rate=0)),
+    ("payloads rate-limited", dict(level="DEBUG", log_payloads=True, payload_rate=1)),
+    ("default (INFO)", dict(level="INFO")),
+    ("quiet", dict(quiet=True)),
+]
+
+
+class StubResponse:
+    headers = {"Content-Type": "application/json"}
+
+    def __init__(self, status_code: int, body: str):
+        self.status_code = status_code
+        self.text = body
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class StubClient(CredoClient):
+    """CredoClient whose requests never leave the process"""
+
+    def request(self, method, path="", body=None, params=None, endpoint=""):
+        if method == "POST":
+            return StubResponse(201, '{"data": {"id": "stub-id"}}')
+        return StubResponse(200, '{"data": {}}')
+
+
+def old_logging_formatter():
+    from shadow_ai_detector import SHADOW_AI_CUSTOM_FIELDS, UseCaseFormatter
+
+    class OldLoggingFormatter(UseCaseFormatter):
+        """The create and custom field calls with the per-item logging they had before log_control.py"""
+
+        def _create(self, i, payload):
+            logging.info(f"Uploading use case {i}")
+            logging.info("Raw data before encoding:")
+            logging.info(json.dumps(payload, indent=2))
+            encoded_data = json.dumps(payload).encode('utf-8')
+            logging.info("Encoded data (first 100 chars):")
+            logging.info(encoded_data[:100])
+            logging.info(f"Uploading use case with name: {payload['name']}")
+            response = self.client.create_use_case(encoded_data)
+            logging.info(f"Response status code: {response.status_code}")
+            logging.info(f"Response headers: {response.headers}")
+            logging.info(f"Response body: {response.text}")
+            logging.info(f"Successfully uploaded use case {i}")
+            logging.info(f"Created use case ID: {response.json().get('data', {}).get('id')}")
+            return response
+
+        def _set_custom_fields(self, use_case_id):
+            payload = {"custom_fields": SHADOW_AI_CUSTOM_FIELDS}
+            logging.info(f"Setting custom fields for use case {use_case_id}")
+            logging.info(f"Custom fields payload: {json.dumps(payload, indent=2)}")
+            response = self.client.set_custom_fields(use_case_id, SHADOW_AI_CUSTOM_FIELDS)
+            logging.info(f"Custom fields response status: {response.status_code}")
+            logging.info(f"Custom fields response: {response.text}")
+            logging.info(f"Successfully set custom fields for use case {use_case_id}")
+            return response.status_code in [200, 201]
+
+    return OldLoggingFormatter
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    os.environ.setdefault("CREDO_AI_API_KEY", "bench")
+    os.environ["UPLOAD_JOURNAL"] = ""
+    os.environ["PREFETCH_NAMES"] = "false"
+    # Custom field PUTs inline on the calling thread, so process_time sees one thread's work
+    os.environ["CUSTOM_FIELDS_CONCURRENCY"] = "0"
+    from shadow_ai_detector import UseCaseFormatter
+
+    devnull = open(os.devnull, "w")
+    for handler in logging.getLogger().handlers:
+        handler.setStream(devnull)
+
+    use_cases = make_use_cases(items)
+    print(f"items={items} repeat={repeat}")
+    results = {}
+    for name, kwargs in MODES:
+        cls = old_logging_formatter() if name.startswith("old") else UseCaseFormatter
+        formatter = cls()
+        formatter.client = StubClient(formatter.api_url, formatter.api_key)
+        if kwargs is None:
+            logging.disable(logging.CRITICAL)
+        else:
+            logging.disable(logging.NOTSET)
+            configure_logging(**kwargs)
+        best = float("inf")
+        for _ in range(repeat):
+            formatter._name_index = None
+            start = time.process_time()
+            formatter.upload_use_cases(use_cases)
+            best = min(best, time.process_time() - start)
+        results[name] = best * 10000 / items
+        print(f"{name:<24}{results[name]:>8.2f} CPU-sec per 10k items")
+    logging.disable(logging.NOTSET)
+
+    baseline = results["logging disabled"]
+    print("logging overhead per 10k items: " + ", ".join(
+        f"{name} {results[name] - baseline:.2f}s" for name, _ in MODES[1:]))
+
+
+if __name__ == "__main__":
+    main()
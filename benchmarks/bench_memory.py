@@ -0,0 +1,63 @@
+"""Compare the memory held by use case dicts and by CompactRecords, and what the compact form costs in CPU.
+
+Usage: python -m benchmarks.bench_memory [records] [sections] [questions]
+"""
+import gc
+import json
+import logging
+import sys
+import time
+import tracemalloc
+
+from benchmarks.synthetic import make_use_cases
+from compact_record import compact, json_default
+from compiled_validator import CompiledValidator
+from serialization import SERIALIZER
+
+
+def allocated(build) -> int:
+    """Bytes still allocated by the object build() returns"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def rate(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sections = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    questions = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    logging.disable(logging.CRITICAL)
+    print(f"records={n} sections={sections} questions/section={questions}")
+
+    for label, args in (("no questionnaires", (0, 0, 0)), ("nested", (sections, questions, 1))):
+        plain = allocated(lambda: make_use_cases(n, *args))
+        records = make_use_cases(n, *args)
+        packed = allocated(lambda: [compact(r) for r in records])
+        print(f"{label + ':':<18}{plain / n:>8,.0f} B/record as dicts, {packed / n:>7,.0f} B/record compact "
+              f"({plain / packed:.1f}x smaller, {plain / 2**20:,.0f} MiB -> {packed / 2**20:,.0f} MiB)")
+
+    records = make_use_cases(n, sections, questions)
+    compacted = [compact(r) for r in records]
+    validator = CompiledValidator()
+    print(f"{'compact():':<28}{rate(compact, records):>12,.0f} records/sec")
+    print(f"{'json.dumps dict:':<28}{rate(json.dumps, records):>12,.0f} records/sec")
+    print(f"{'json.dumps compact:':<28}{rate(lambda r: json.dumps(r, default=json_default), compacted):>12,.0f} records/sec")
+    print(f"{'dumpb dict (' + SERIALIZER.backend + '):':<28}{rate(SERIALIZER.dumpb, records):>12,.0f} records/sec")
+    print(f"{'dumpb compact:':<28}{rate(SERIALIZER.dumpb, compacted):>12,.0f} records/sec")
+    print(f"{'CompiledValidator dict:':<28}{rate(validator.validate, records):>12,.0f} records/sec")
+    print(f"{'CompiledValidator compact:':<28}{rate(validator.validate, compacted):>12,.0f} records/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Per-call overhead of the metrics instrumentation.
+
+Usage: python -m benchmarks.bench_metrics [iterations]
+"""
+import sys
+import time
+
+from metrics import Metrics
+
+
+def per_call(fn, n: int) -> float:
+    start = time.perf_counter()
+    fn(n)
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    metrics = Metrics()
+
+    def plain(n):
+        for _ in iter(range(n)):
+            pass
+
+    def timed(n):
+        for _ in metrics.timed("stage", range(n)):
+            pass
+
+    def nested(n):
+        for _ in metrics.timed("outer", metrics.timed("inner", range(n))):
+            pass
+
+    def inc(n):
+        for _ in range(n):
+            metrics.inc("uploads_total", result="created")
+
+    def observe(n):
+        for _ in range(n):
+            metrics.observe("http_request_seconds", 0.012, endpoint="create", status=201)
+
+    base = per_call(plain, n)
+    print(f"iterations={n}")
+    print(f"{'timed() stage:':<24}{per_call(timed, n) - base:>8.0f} ns/item")
+    print(f"{'two nested stages:':<24}{per_call(nested, n) - base:>8.0f} ns/item")
+    print(f"{'counter inc:':<24}{per_call(inc, n):>8.0f} ns/call")
+    print(f"{'histogram observe:':<24}{per_call(observe, n):>8.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""End-to-end read -> format -> validate -> save -> upload time with and without pipeline threads.
+
+Usage: python -m benchmarks.bench_pipeline [use_cases] [latency_ms] [sections]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_use_cases, write_records
+from metrics import METRICS
+from mock_credo_api import MockCredoServer
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+    sections = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+
+    logging.disable(logging.CRITICAL)
+    os.environ.setdefault("CREDO_AI_API_KEY", "bench")
+    os.environ.setdefault("API_RATE_LIMIT", "0")
+    os.environ["UPLOAD_JOURNAL"] = ""
+    os.environ["PREFETCH_NAMES"] = "false"
+    from shadow_ai_detector import UseCaseFormatter
+
+    workdir = tempfile.mkdtemp()
+    log_file = os.path.join(workdir, "logs.ndjson")
+    # Nested input makes reading (JSON parsing) cost about as much as the upload
+    write_records(log_file, make_use_cases(n, sections, 10))
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    print(f"use_cases={n} latency={latency * 1000:.1f}ms input={os.path.getsize(log_file) / 1e6:.1f} MB")
+    try:
+        with MockCredoServer(latency=latency) as server:
+            os.environ["CREDO_AI_API_URL"] = server.url
+            baseline = None
+            for label, queue_size in (("sequential stages", 0), ("pipelined stages", 1000)):
+                server.names.clear()
+                METRICS.__init__()
+                formatter = UseCaseFormatter()
+                start = time.perf_counter()
+                with METRICS.stage("upload"):
+                    formatter.upload_use_cases(formatter.iter_pipeline(log_file, queue_size))
+                elapsed = time.perf_counter() - start
+                baseline = baseline or elapsed
+                stages = {name: s.seconds for name, s in METRICS.stages.items() if not name.endswith("_wait")}
+                slowest = max(stages.values())
+                print(f"{label + ':':<20}{elapsed:>7.2f}s {n / elapsed:>8.1f} use cases/sec {baseline / elapsed:>5.2f}x  "
+                      f"(sum of stages {sum(stages.values()):.2f}s, slowest {slowest:.2f}s)")
+                formatter.client.close()
+    finally:
+        os.chdir(cwd)
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
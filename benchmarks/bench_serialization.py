@@ -0,0 +1,63 @@
+"""End-to-end JSON cost of a run (read input, save formatted file, encode request bodies) per backend.
+
+Usage: python -m benchmarks.bench_serialization [records] [sections] [questions]
+"""
+import json
+import logging
+import sys
+import time
+
+from benchmarks.synthetic import make_use_cases
+from serialization import Serializer, available_backends
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def legacy(records, lines):
+    """The stdlib calls every stage made before serialization.py"""
+    return {
+        "read": timed(lambda: [json.loads(line) for line in lines]),
+        "save (indented)": timed(lambda: json.dumps({"use_cases": records}, indent=2)),
+        "save (compact)": timed(lambda: json.dumps({"use_cases": records}, separators=(",", ":"))),
+        "request bodies": timed(lambda: [json.dumps(r).encode("utf-8") for r in records]),
+    }
+
+
+def backend(serializer, records, lines):
+    return {
+        "read": timed(lambda: [serializer.loads(line) for line in lines]),
+        "save (indented)": timed(lambda: serializer.dumps({"use_cases": records}, indent=True)),
+        "save (compact)": timed(lambda: serializer.dumps({"use_cases": records})),
+        "request bodies": timed(lambda: [serializer.dumpb(r) for r in records]),
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    sections = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    questions = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    logging.disable(logging.CRITICAL)
+    records = make_use_cases(n, sections, questions)
+    lines = [json.dumps(r).encode("utf-8") for r in records]
+    print(f"records={n} sections={sections} questions/section={questions} "
+          f"({sum(map(len, lines)) / n:,.0f} bytes/record compact)")
+
+    runs = [("stdlib (before)", legacy(records, lines))]
+    runs += [(name, backend(Serializer(name), records, lines)) for name in available_backends()]
+    stages = list(runs[0][1])
+    print(f"\n{'':<18}" + "".join(f"{stage:>17}" for stage in stages) + f"{'run total':>12}")
+    baseline = None
+    for label, times in runs:
+        # A run reads its input, saves one formatted file and sends every record
+        total = times["read"] + times["save (indented)"] + times["request bodies"]
+        baseline = baseline or total
+        print(f"{label:<18}" + "".join(f"{times[stage] * 1000:>15.1f}ms" for stage in stages)
+              + f"{total * 1000:>10.1f}ms  {baseline / total:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compare the per-record logic of the old reformat_json.py script with transform.Transformer.
+
+Usage: python -m benchmarks.bench_transform [events] [batch_size]
+"""
+import logging
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import make_events
+from transform import Transformer, np
+
+governance_mapping = {"REROUTE": 1, "INLINE_BLOCK": 2, "REDACT": 3}
+
+
+def reformat_script(logs):
+    """The loop body of the original reformat_json.py"""
+    use_cases = []
+    for log in logs:
+        use_cases.append({
+            "id": log.get("traceId", ""),
+            "name": log.get("intent", {}).get("request", [{}])[0].get("actionName", "Unknown Use Case"),
+            "description": log.get("intent", {}).get("request", [{}])[0].get("departmentName", "No description"),
+            "ai_type": log.get("serviceName", "Unknown AI"),
+            "governance_status": governance_mapping.get(log.get("policyDecision", {}).get("label", ""), 0),
+            "domains": [],
+            "industries": [log.get("intent", {}).get("request", [{}])[0].get("departmentName", "General")],
+            "regions": [],
+            "risk_category_level": None,
+            "custom_fields": [
+                {"custom_field_id": "user_001", "name": "User Name",
+                 "value": log.get("userClaim", {}).get("name", "Unknown")},
+                {"custom_field_id": "email_001", "name": "User Email",
+                 "value": log.get("userClaim", {}).get("email", "Unknown")},
+                {"custom_field_id": "ip_001", "name": "Client IP",
+                 "value": log.get("clientIp", {}).get("remoteAddr", "Unknown")}
+            ],
+            "questionnaires": [],
+            "inserted_at": datetime.utcfromtimestamp(log.get("startTime", 0) / 1000).isoformat() + "Z",
+            "updated_at": datetime.utcfromtimestamp(log.get("endTime", 0) / 1000).isoformat() + "Z"
+        })
+    return use_cases
+
+
+def measure(name: str, fn, n: int):
+    start = time.perf_counter()
+    result = fn()
+    rate = n / (time.perf_counter() - start)
+    print(f"{name:<22}{rate:>12,.0f} records/sec")
+    return rate, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    logging.disable(logging.CRITICAL)
+    events = make_events(n)
+    print(f"events={n} batch_size={batch_size} numpy={'yes' if np is not None else 'no'}")
+
+    old, expected = measure("reformat_json loop", lambda: reformat_script(events), n)
+    transformer = Transformer(batch_size=batch_size)
+    new, actual = measure("Transformer", lambda: list(transformer.transform(events)), n)
+    print(f"speedup: {new / old:.1f}x, identical output: {actual == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Transform gateway events decoded into dicts (loads + mapping) vs straight into typed structs.
+
+Real gateway events carry request/response payloads and headers that the
+mapping never reads; `padding` adds that many such fields to every event.
+JSON arrays over 16 MiB (log_stream.WHOLE_FILE_MAX_BYTES) are streamed
+generically by both, so the default size stays below that.
+
+Usage: python -m benchmarks.bench_typed_events [events] [padding]
+"""
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import make_events
+from log_stream import iter_records
+from transform import Transformer
+
+
+def pad(events, padding):
+    for i, event in enumerate(events):
+        event["httpRequest"] = {"headers": {f"x-header-{j}": f"value-{i}-{j}" for j in range(padding)},
+                                "path": "/v1/chat/completions", "bytes": 1024 + i}
+        event["httpResponse"] = {"status": 200, "choices": [{"index": j, "message": {"role": "assistant",
+                                 "content": "lorem ipsum " * 8}} for j in range(max(1, padding // 4))]}
+    return events
+
+
+def run(transformer, path, generic):
+    use_cases = transformer.transform(iter_records(path)) if generic else transformer.transform_path(path)
+    start = time.perf_counter()
+    count = sum(1 for _ in use_cases)
+    return count, time.perf_counter() - start
+
+
+def peak_memory(transformer, path, generic):
+    """Peak bytes allocated while decoding a JSON array file and transforming its first batch"""
+    tracemalloc.start()
+    use_cases = transformer.transform(iter_records(path)) if generic else transformer.transform_path(path)
+    next(use_cases)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    use_cases.close()
+    return peak
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    padding = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    logging.disable(logging.CRITICAL)
+    generic, typed = Transformer(typed=False), Transformer()
+    if typed.decoder is None:
+        print("msgspec is not installed: transform_path() decodes generically, nothing to compare")
+        return
+
+    workdir = tempfile.mkdtemp()
+    try:
+        events = pad(make_events(n), padding)
+        ndjson = os.path.join(workdir, "events.ndjson")
+        array = os.path.join(workdir, "events.json")
+        with open(ndjson, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(event) + "\n" for event in events)
+        with open(array, "w", encoding="utf-8") as f:
+            json.dump(events, f)
+        del events
+        print(f"events={n} padding={padding} ({os.path.getsize(ndjson) / n:,.0f} bytes/event)")
+
+        for label, path in (("NDJSON", ndjson), ("JSON array", array)):
+            count, generic_time = run(generic, path, True)
+            _, typed_time = run(typed, path, False)
+            same = list(generic.transform(iter_records(path))) == list(typed.transform_path(path))
+            print(f"{label + ':':<12} dicts {count / generic_time:>10,.0f} events/sec   "
+                  f"typed {count / typed_time:>10,.0f} events/sec   {generic_time / typed_time:.1f}x   "
+                  f"identical output: {same}")
+        print(f"peak memory decoding the JSON array: dicts {peak_memory(generic, array, True) / 2**20:,.1f} MiB   "
+              f"typed {peak_memory(typed, array, False) / 2**20:,.1f} MiB")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Compare serial vs concurrent uploads against a local stand-in API.
+
+Usage: python -m benchmarks.bench_upload [items] [concurrency] [latency_ms]
+"""
+import logging
+import os
+import sys
+import time
+
+from mock_credo_api import MockCredoServer
+
+
+def make_use_cases(n: int):
+    return [{"name": f"Bench Use Case {i}", "description": "benchmark", "ai_type": "gen_ai",
+             "governance_status": 1, "domains": [], "industries": [], "regions": [],
+             "risk_classification_level": 1, "questionnaires": []} for i in range(n)]
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 5.0) / 1000
+
+    logging.disable(logging.CRITICAL)
+    os.environ.setdefault("CREDO_AI_API_KEY", "bench")
+    # Measure raw upload throughput, not the client-side rate limit
+    os.environ.setdefault("API_RATE_LIMIT", "0")
+    # Both passes upload the same items; a shared journal would skip the second
+    os.environ["UPLOAD_JOURNAL"] = ""
+    from shadow_ai_detector import UseCaseFormatter
+
+    with MockCredoServer(latency=latency) as server:
+        os.environ["CREDO_AI_API_URL"] = server.url
+        formatter = UseCaseFormatter()
+
+        start = time.perf_counter()
+        formatter.upload_use_cases(make_use_cases(items))
+        serial = items / (time.perf_counter() - start)
+
+        server.names.clear()
+        stats = formatter.upload_use_cases_async(make_use_cases(items), concurrency=concurrency)
+
+    print(f"items={items} latency={latency * 1000:.1f}ms")
+    print(f"{'serial:':<20}{serial:10.1f} items/sec")
+    print(f"{f'async (c={concurrency}):':<20}{stats['items_per_sec']:10.1f} items/sec "
+          f"({stats['uploaded']} ok, {stats['failed']} failed)")
+    print(f"{'speedup:':<20}{stats['items_per_sec'] / serial:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Compare validator throughput on a synthetic corpus of nested use cases.
+
+Usage: python -m benchmarks.bench_validate [records] [sections] [questions]
+"""
+import logging
+import sys
+import time
+
+from benchmarks.synthetic import make_use_cases
+from compiled_validator import CompiledValidator
+from schema_validator import validate_use_case
+from strict_validator import StrictValidator
+
+
+def measure(name: str, fn, records) -> float:
+    start = time.perf_counter()
+    for record in records:
+        fn(record)
+    rate = len(records) / (time.perf_counter() - start)
+    print(f"{name:<22}{rate:>14,.0f} records/sec")
+    return rate
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sections = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    questions = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    logging.disable(logging.CRITICAL)
+    records = make_use_cases(n, sections, questions)
+    print(f"records={n} sections={sections} questions/section={questions}")
+
+    strict = StrictValidator()
+    compiled = CompiledValidator()
+    base = measure("schema_validator", validate_use_case, records)
+    strict_rate = measure("StrictValidator", strict.validate_use_case, records)
+    fast = measure("CompiledValidator", compiled.validate, records)
+    print(f"speedup vs schema_validator: {fast / base:.1f}x, vs StrictValidator: {fast / strict_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Time strict_validator.validate_file against the parallel mode for 1..N workers.
+
+Also times how long the parent takes to split the file into the raw
+records it sends to workers, which bounds the parallel speedup.
+
+Usage: python -m benchmarks.bench_validate_file [records] [max_workers]
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_use_cases
+from log_stream import _iter_streamed, split_json_array
+from strict_validator import validate_file, validate_file_parallel
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # A JSON array, since the serial validate_file only reads that format
+        path = os.path.join(tmp, "records.json")
+        with open(path, "w") as f:
+            json.dump(make_use_cases(n), f)
+
+        start = time.perf_counter()
+        validate_file(path)
+        serial = time.perf_counter() - start
+        print(f"records={n}")
+        print(f"{'serial':<12}{n / serial:>12,.0f} records/sec")
+
+        start = time.perf_counter()
+        sum(1 for _ in _iter_streamed(path, 1 << 20, True))
+        decoded = time.perf_counter() - start
+        start = time.perf_counter()
+        elements = split_json_array(path)
+        if elements is not None:
+            sum(1 for _ in elements)
+            split = time.perf_counter() - start
+            print(f"splitting into raw records: by decoding {decoded:.3f}s, msgspec scan {split:.3f}s")
+        else:
+            print(f"splitting into raw records: by decoding {decoded:.3f}s (msgspec not installed)")
+
+        workers = 1
+        while workers <= max_workers:
+            start = time.perf_counter()
+            validate_file_parallel(path, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{f'{workers} workers':<12}{n / elapsed:>12,.0f} records/sec  ({serial / elapsed:.1f}x)")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
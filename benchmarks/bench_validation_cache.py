@@ -0,0 +1,64 @@
+"""Validate the same use cases on consecutive runs without a cache, with a cold cache and with a warm one.
+
+Usage: python -m benchmarks.bench_validation_cache [records] [changed_percent] [sections] [questions]
+"""
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_use_cases
+from schema_validator import SCHEMA_VERSION as SCHEMA_VALIDATOR_VERSION, validate_use_case
+from strict_validator import SCHEMA_VERSION as STRICT_VERSION, StrictValidator
+from validation_cache import ValidationCache
+
+
+def strict_errors(validator):
+    def validate(record):
+        validator.validate_use_case(record)
+        return validator.errors
+    return validate
+
+
+def timed_run(validate, records, cache_path=None, version=None):
+    cache = ValidationCache(cache_path, version) if cache_path else None
+    start = time.perf_counter()
+    results = [cache.validate(r, validate) if cache else validate(r) for r in records]
+    if cache is not None:
+        cache.close()
+    return time.perf_counter() - start, results
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    changed = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    sections = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    questions = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+    logging.disable(logging.CRITICAL)
+    records = make_use_cases(n, sections, questions)
+    # The next run's input: a few use cases were edited since
+    step = max(1, int(100 / changed)) if changed else n + 1
+    edited = [dict(r, description=f"edited {i}") if i % step == 0 else r for i, r in enumerate(records)]
+    print(f"records={n} sections={sections} questions/section={questions} "
+          f"changed on the second run={sum(1 for a, b in zip(records, edited) if a is not b)}")
+
+    workdir = tempfile.mkdtemp()
+    try:
+        validators = (("schema_validator", validate_use_case, SCHEMA_VALIDATOR_VERSION),
+                      ("StrictValidator", strict_errors(StrictValidator()), STRICT_VERSION))
+        for label, validate, version in validators:
+            path = os.path.join(workdir, f"{label}.jsonl")
+            uncached, expected = timed_run(validate, edited)
+            cold, _ = timed_run(validate, records, path, version)
+            warm, results = timed_run(validate, edited, path, version)
+            print(f"{label + ':':<18} no cache {uncached:>7.3f}s   cold {cold:>7.3f}s   warm {warm:>7.3f}s   "
+                  f"{uncached / warm:>5.1f}x   same results: {results == expected}   "
+                  f"cache file {os.path.getsize(path) / 2**20:.1f} MiB")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
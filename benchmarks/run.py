@@ -0,0 +1,303 @@
+"""Run the benchmark suite on deterministic synthetic data and record machine-readable results.
+
+Each benchmark is set up once, warmed up, then timed --repeat times; the
+best and median times are reported. Results (with the commit, Python
+build, platform and parameters) can be written to JSON with --output and
+compared against an earlier results file with --compare.
+
+Usage:
+    python -m benchmarks.run -o baseline.json
+    python -m benchmarks.run --only transform,aggregate --compare baseline.json --max-regression 10
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from benchmarks.synthetic import make_events, make_use_cases, write_gateway_log, write_records
+
+# name -> (unit, context manager factory yielding a zero-argument run function that returns the item count)
+BENCHMARKS: Dict[str, Tuple[str, Callable[[argparse.Namespace], Any]]] = {}
+
+
+def benchmark(name: str, unit: str):
+    def register(fn):
+        BENCHMARKS[name] = (unit, contextmanager(fn))
+        return fn
+    return register
+
+
+def _use_cases(params: argparse.Namespace) -> List[Dict[str, Any]]:
+    return make_use_cases(params.records, params.sections, params.questions, params.questionnaires,
+                          seed=params.seed)
+
+
+@benchmark("format_use_cases", "records")
+def bench_format(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    from shadow_ai_detector import UseCaseFormatter
+    records = _use_cases(params)
+    formatter = UseCaseFormatter()
+    yield lambda: len(formatter.format_use_cases(records)["use_cases"])
+    formatter.client.close()
+
+
+@benchmark("schema_validator", "records")
+def bench_schema_validator(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    from schema_validator import validate_use_case
+    records = _use_cases(params)
+
+    def run() -> int:
+        for record in records:
+            validate_use_case(record)
+        return len(records)
+    yield run
+
+
+@benchmark("strict_validator", "records")
+def bench_strict_validator(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    from strict_validator import StrictValidator
+    records = _use_cases(params)
+    validate = StrictValidator().validate_use_case
+
+    def run() -> int:
+        for record in records:
+            validate(record)
+        return len(records)
+    yield run
+
+
+@benchmark("compiled_validator", "records")
+def bench_compiled_validator(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    from compiled_validator import CompiledValidator
+    records = _use_cases(params)
+    validate = CompiledValidator().validate
+
+    def run() -> int:
+        for record in records:
+            validate(record)
+        return len(records)
+    yield run
+
+
+@benchmark("serialize", "records")
+def bench_serialize(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    from serialization import SERIALIZER
+    records = _use_cases(params)
+
+    def run() -> int:
+        for record in records:
+            SERIALIZER.loads(SERIALIZER.dumpb(record))
+        return len(records)
+    yield run
+
+
+@benchmark("reformat_legacy", "events")
+def bench_reformat_legacy(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    from benchmarks.bench_transform import reformat_script
+    events = make_events(params.events, seed=params.seed)
+    yield lambda: len(reformat_script(events))
+
+
+@benchmark("transform", "events")
+def bench_transform(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    from transform import Transformer
+    events = make_events(params.events, seed=params.seed)
+    transformer = Transformer()
+    yield lambda: sum(1 for _ in transformer.transform(events))
+
+
+@benchmark("transform_ndjson", "events")
+def bench_transform_ndjson(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    from transform import Transformer
+    fd, path = tempfile.mkstemp(suffix=".ndjson")
+    os.close(fd)
+    try:
+        write_records(path, make_events(params.events, seed=params.seed))
+        transformer = Transformer()
+        yield lambda: sum(1 for _ in transformer.transform_path(path))
+    finally:
+        os.remove(path)
+
+
+@benchmark("aggregate", "events")
+def bench_aggregate(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    from aggregate import Aggregator
+    events = make_events(params.events, seed=params.seed)
+
+    def run() -> int:
+        aggregator = Aggregator().update(events)
+        list(aggregator.iter_use_cases())
+        return aggregator.events
+    yield run
+
+
+@benchmark("gateway_parse", "lines")
+def bench_gateway_parse(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    from gateway_log import iter_gateway_events
+    fd, path = tempfile.mkstemp(suffix=".log")
+    os.close(fd)
+    try:
+        write_gateway_log(path, params.lines, seed=params.seed)
+        yield lambda: sum(1 for _ in iter_gateway_events(path))
+    finally:
+        os.remove(path)
+
+
+@contextmanager
+def _upload_bench(params: argparse.Namespace, upload: Callable[[Any, List[Dict[str, Any]]], None]):
+    from mock_credo_api import MockCredoServer
+    from shadow_ai_detector import UseCaseFormatter
+    with MockCredoServer(latency=params.latency_ms / 1000) as server:
+        os.environ["CREDO_AI_API_URL"] = server.url
+        records = make_use_cases(params.uploads, 0, 0, 0, seed=params.seed)
+        use_cases = UseCaseFormatter().format_use_cases(records)["use_cases"]
+
+        def run() -> int:
+            # Fresh names and a fresh client (and name index) so every repeat creates every use case
+            server.names.clear()
+            formatter = UseCaseFormatter()
+            try:
+                upload(formatter, use_cases)
+            finally:
+                formatter.client.close()
+            return len(server.names)
+        yield run
+
+
+@benchmark("upload_serial", "use cases")
+def bench_upload_serial(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    with _upload_bench(params, lambda formatter, use_cases: formatter.upload_use_cases(use_cases)) as run:
+        yield run
+
+
+@benchmark("upload_async", "use cases")
+def bench_upload_async(params: argparse.Namespace) -> Iterator[Callable[[], int]]:
+    def upload(formatter, use_cases):
+        formatter.upload_use_cases_async(use_cases, concurrency=params.concurrency)
+    with _upload_bench(params, upload) as run:
+        yield run
+
+
+def measure(run: Callable[[], int], repeat: int, warmup: int) -> Tuple[int, List[float]]:
+    for _ in range(warmup):
+        run()
+    times = []
+    items = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        items = run()
+        times.append(time.perf_counter() - start)
+    return items, times
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    optional = {}
+    for module in ("numpy", "orjson", "pyarrow", "msgspec"):
+        try:
+            optional[module] = getattr(__import__(module), "__version__", "installed")
+        except ImportError:
+            optional[module] = None
+    return {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "optional_packages": optional
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> float:
+    """Print the throughput change of every benchmark in both runs; return the worst change in percent"""
+    worst = 0.0
+    print(f"\n{'benchmark':<20}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, result in results["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        change = (result["rate"] / before["rate"] - 1) * 100
+        worst = min(worst, change)
+        print(f"{name:<20}{before['rate']:>14,.0f}{result['rate']:>14,.0f}{change:>+9.1f}%")
+    if baseline.get("params") != results["params"]:
+        print("warning: baseline was run with different parameters")
+    return worst
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite on synthetic data")
+    parser.add_argument("--only", help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--records", type=int, default=5000, help="use cases for the format/validate benchmarks")
+    parser.add_argument("--questionnaires", type=int, default=1)
+    parser.add_argument("--sections", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--events", type=int, default=50000, help="gateway events for transform/aggregate")
+    parser.add_argument("--lines", type=int, default=200000, help="gateway log lines to parse")
+    parser.add_argument("--uploads", type=int, default=300, help="use cases uploaded to the mock API")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated API latency")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float,
+                        help="exit non-zero if any benchmark is more than this many percent slower than --compare")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    logging.disable(logging.CRITICAL)
+    os.environ.setdefault("CREDO_AI_API_KEY", "bench")
+    # Measure raw throughput, not the client-side rate limit or resume journal
+    os.environ.setdefault("API_RATE_LIMIT", "0")
+    os.environ["UPLOAD_JOURNAL"] = ""
+
+    params = {k: v for k, v in vars(args).items() if k not in ("only", "output", "compare", "max_regression")}
+    results: Dict[str, Any] = {"environment": environment(), "params": params, "results": {}}
+    print(f"{'benchmark':<20}{'items':>9}{'best':>11}{'median':>11}{'rate':>14}")
+    for name in names:
+        unit, setup = BENCHMARKS[name]
+        with setup(args) as run:
+            items, times = measure(run, max(1, args.repeat), args.warmup)
+        best, median = min(times), statistics.median(times)
+        results["results"][name] = {"unit": unit, "items": items, "times": times, "best": best,
+                                    "median": median, "rate": items / best}
+        print(f"{name:<20}{items:>9,}{best:>10.3f}s{median:>10.3f}s{items / best:>14,.0f} {unit}/sec")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote results to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            worst = compare(results, json.load(f))
+        if args.max_regression is not None and -worst > args.max_regression:
+            print(f"regression of {-worst:.1f}% exceeds --max-regression {args.max_regression}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
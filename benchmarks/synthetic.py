@@ -0,0 +1,136 @@
+"""Deterministic synthetic inputs for the benchmarks.
+
+Every generator takes a seed and returns the same data for the same
+arguments, so runs on different commits measure identical inputs.
+
+Usage: python -m benchmarks.synthetic {use_cases,events,gateway} N -o PATH [options]
+"""
+import json
+import random
+import uuid
+from typing import Any, Dict, Iterator, List
+
+# Raw gateway events (the shape transform.py and aggregate.py read)
+SERVICES = ["SurePath AI", "ChatGPT", "Claude", "Gemini"]
+ACTIONS = ["generate legal contract", "summarize document", "write code", "translate text", "draft email"]
+DEPARTMENTS = ["legal and compliance", "engineering", "marketing", "sales", "finance"]
+LABELS = ["REROUTE", "INLINE_BLOCK", "REDACT", "ALLOW"]
+
+# Raw gateway text log lines (the format gateway_log.py parses)
+PROVIDERS = {
+    "OpenAI": [("/v1/chat/completions", "gpt-4"), ("/v1/embeddings", "text-embedding-3-small"),
+               ("/v1/images/generations", "dall-e-3")],
+    "Anthropic": [("/v1/messages", "claude-3-opus"), ("/v1/messages", "claude-3-sonnet")],
+}
+
+ANSWERS = [None, True, 3, "yes"]
+
+
+def make_use_cases(n: int, sections: int = 5, questions: int = 10, questionnaires: int = 1,
+                   custom_fields: int = 3, seed: int = 0) -> List[Dict[str, Any]]:
+    """Use cases in the shape of ai_logs.json, nested questionnaires x sections x questions deep"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        records.append({
+            "id": f"uc-{i}",
+            "name": f"Use case {i}",
+            "description": "synthetic",
+            "ai_type": "gen_ai",
+            "governance_status": rng.randint(0, 3),
+            "domains": ["Customer Service"],
+            "industries": ["Retail", "E-commerce"],
+            "regions": ["Global"],
+            "risk_classification_level": 1,
+            "custom_fields": [{"custom_field_id": f"cf{k}", "type": "string", "name": "Field", "value": "v"}
+                              for k in range(custom_fields)],
+            "questionnaires": [{
+                "name": "Risk Assessment",
+                "key": f"risk_assessment_{k}" if k else "risk_assessment",
+                "version": 1.0,
+                "sections": [{
+                    "id": f"s{s}",
+                    "title": "Section",
+                    "questions": [{"id": f"q{q}", "answer": rng.choice(ANSWERS)} for q in range(questions)]
+                } for s in range(sections)]
+            } for k in range(questionnaires)],
+            "inserted_at": "2024-01-01T00:00:00Z",
+            "updated_at": "2024-01-01T00:00:00Z"
+        })
+    return records
+
+
+def make_events(n: int, users: int = 2000, seed: int = 0) -> List[Dict[str, Any]]:
+    """Raw gateway events in the shape reformat_json.py reads"""
+    rng = random.Random(seed)
+    start = 1734388169128
+    events = []
+    for i in range(n):
+        t = start + i * 250
+        user = rng.randrange(users)
+        events.append({
+            "traceId": str(uuid.UUID(int=rng.getrandbits(128))),
+            "serviceName": rng.choice(SERVICES),
+            "intent": {"request": [{"actionName": rng.choice(ACTIONS), "departmentName": rng.choice(DEPARTMENTS)}]},
+            "policyDecision": {"label": rng.choice(LABELS)},
+            "userClaim": {"name": f"User {user}", "email": f"user{user}@example.com"},
+            "clientIp": {"remoteAddr": f"10.0.{user % 256}.{user // 256}:443"},
+            "startTime": t,
+            "endTime": t + rng.randrange(200, 2000)
+        })
+    return events
+
+
+def iter_gateway_lines(n: int, users: int = 5000, seed: int = 0) -> Iterator[str]:
+    """Raw gateway text log lines, newline terminated"""
+    rng = random.Random(seed)
+    providers = list(PROVIDERS)
+    for i in range(n):
+        provider = rng.choice(providers)
+        endpoint, model = rng.choice(PROVIDERS[provider])
+        yield (f"2024-03-18 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d} - "
+               f"User: user{rng.randrange(users)}@example.com - Action: API call to {provider} - "
+               f"Endpoint: {endpoint} - Model: {model}\n")
+
+
+def write_gateway_log(path: str, n: int, users: int = 5000, seed: int = 0) -> None:
+    with open(path, "w") as f:
+        f.writelines(iter_gateway_lines(n, users, seed))
+
+
+def write_records(path: str, records: List[Dict[str, Any]]) -> None:
+    """Write records as NDJSON if path ends in .ndjson/.jsonl, else as a JSON array"""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")))
+                f.write("\n")
+        else:
+            json.dump(records, f, indent=2)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic input file")
+    parser.add_argument("kind", choices=["use_cases", "events", "gateway"])
+    parser.add_argument("n", type=int)
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--users", type=int, default=2000, help="distinct users (events, gateway)")
+    parser.add_argument("--questionnaires", type=int, default=1)
+    parser.add_argument("--sections", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--custom-fields", type=int, default=3)
+    args = parser.parse_args()
+    if args.kind == "gateway":
+        write_gateway_log(args.output, args.n, args.users, args.seed)
+    elif args.kind == "events":
+        write_records(args.output, make_events(args.n, args.users, args.seed))
+    else:
+        write_records(args.output, make_use_cases(args.n, args.sections, args.questions, args.questionnaires,
+                                                  args.custom_fields, args.seed))
+    print(f"Wrote {args.n} {args.kind} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
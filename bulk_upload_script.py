@@ -1,17 +1,11 @@
-import requests
 import json
 
-# API endpoint
-url = "https://api.credo.ai/api/v2/credoai/use_cases/import"
+from credo_client import CredoClient, DEFAULT_API_URL
 
 # Replace with your actual API key
 API_KEY = "87j1AJQxZim4UbB5todoicqV8C5kCVQVjP4eLGHJCQ9sPljBn5CFmEXIUMteuxHI"
 
-# Headers
-headers = {
-    "Content-Type": "application/json",
-    "Authorization": f"Bearer {API_KEY}"
-}
+client = CredoClient(DEFAULT_API_URL, f"Bearer {API_KEY}")
 
 # Load JSON data
 json_file = "reformatted_use_cases.json"
@@ -32,7 +26,8 @@ if not isinstance(data, list):
     exit()
 
 # Send the request
-response = requests.post(url, headers=headers, json=data)
+with client:
+    response = client.import_use_cases(client.encode(data))
 
 # Debugging: Print response details
 print("\n🔍 Response Details:")
@@ -0,0 +1,145 @@
+import json
+import logging
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only needed for the parquet format
+    pa = pq = None
+
+from serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+PARQUET_MAGIC = b"PAR1"
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+# Nested fields are stored as JSON text; scalar fields get native columns
+JSON_COLUMNS = ("domains", "industries", "regions", "custom_fields", "questionnaires")
+# Parquet key-value metadata listing the JSON-encoded columns of a file
+JSON_COLUMNS_KEY = b"credo.json_columns"
+
+
+def have_parquet() -> bool:
+    return pq is not None
+
+
+def format_for_path(path: str) -> str:
+    """Intermediate format implied by a file name: parquet, ndjson or json"""
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".parquet"):
+        return "parquet"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "json"
+
+
+def is_parquet(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(4) == PARQUET_MAGIC
+
+
+class UseCaseWriter:
+    """Write use cases one at a time to a parquet or compact NDJSON file.
+
+    Parquet needs pyarrow: use cases are buffered into row groups of
+    `row_group_size`, with JSON_COLUMNS (and any other list/dict value seen
+    in the first row group) stored as JSON strings. NDJSON writes one
+    compact object per line and needs nothing beyond the stdlib.
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None, row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        self.path = path
+        self.format = fmt or format_for_path(path)
+        if self.format not in ("parquet", "ndjson"):
+            raise ValueError(f"Unsupported intermediate format: {self.format}")
+        if self.format == "parquet" and pq is None:
+            raise ImportError("pyarrow is required for the parquet format (pip install pyarrow)")
+        self.row_group_size = max(1, row_group_size)
+        self.count = 0
+        self.buffer: List[Dict[str, Any]] = []
+        self.json_columns: Optional[List[str]] = None
+        self._writer = None
+        self._file: Optional[IO[str]] = open(path, "w", encoding="utf-8") if self.format == "ndjson" else None
+
+    def write(self, use_case: Dict[str, Any]) -> None:
+        self.count += 1
+        if self._file is not None:
+            self._file.write(dumps(use_case))
+            self._file.write("\n")
+            return
+        self.buffer.append(use_case)
+        if len(self.buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self.buffer:
+            return
+        if self.json_columns is None:
+            nested = {k for row in self.buffer for k, v in row.items() if isinstance(v, (list, dict))}
+            self.json_columns = sorted(nested | {c for c in JSON_COLUMNS if any(c in row for row in self.buffer)})
+        rows = []
+        for row in self.buffer:
+            row = dict(row)
+            for column in self.json_columns:
+                if column in row:
+                    row[column] = dumps(row[column])
+            rows.append(row)
+        if self._writer is None:
+            table = pa.Table.from_pylist(rows)
+            metadata = {JSON_COLUMNS_KEY: json.dumps(self.json_columns).encode("utf-8")}
+            schema = table.schema.with_metadata(metadata)
+            self._writer = pq.ParquetWriter(self.path, schema, compression="zstd")
+            table = table.replace_schema_metadata(metadata)
+        else:
+            table = pa.Table.from_pylist(rows, schema=self._writer.schema)
+        self._writer.write_table(table)
+        self.buffer = []
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            return
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        elif self.format == "parquet":
+            # No rows: still leave a valid (empty) parquet file behind
+            pq.write_table(pa.table({}), self.path)
+
+    def __enter__(self) -> "UseCaseWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_use_cases(use_cases: Iterable[Dict[str, Any]], path: str, fmt: Optional[str] = None,
+                    row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> int:
+    """Write all use cases to path, returning how many were written"""
+    with UseCaseWriter(path, fmt, row_group_size) as writer:
+        for use_case in use_cases:
+            writer.write(use_case)
+    return writer.count
+
+
+def iter_parquet(path: str, columns: Optional[Sequence[str]] = None,
+                 batch_size: int = DEFAULT_ROW_GROUP_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield use cases from a parquet file, reading only `columns` if given"""
+    if pq is None:
+        raise ImportError("pyarrow is required to read parquet files (pip install pyarrow)")
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.schema_arrow.metadata or {}
+    json_columns = set(json.loads(metadata.get(JSON_COLUMNS_KEY, b"[]")))
+    if columns is not None:
+        json_columns &= set(columns)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=list(columns) if columns else None):
+        for row in batch.to_pylist():
+            for column in json_columns:
+                value = row.get(column)
+                if value is not None:
+                    row[column] = loads(value)
+            yield row
@@ -0,0 +1,140 @@
+import sys
+from collections.abc import Mapping
+from itertools import islice
+from typing import Any, Dict, Iterator, Tuple
+
+# Strings up to this length are interned, so repeated values ("gen_ai",
+# department names, custom_field_ids, ...) are stored once per process
+INTERN_MAX_LEN = 64
+# Distinct all-string lists (e.g. ("Retail", "E-commerce")) shared between records
+MAX_POOLED_TUPLES = 65536
+
+_SHAPES: Dict[Tuple[str, ...], "Shape"] = {}
+_TUPLES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+class Shape:
+    """Key order shared by every record built from dicts with the same keys"""
+
+    __slots__ = ("keys", "index")
+
+    def __init__(self, keys: Tuple[str, ...]):
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+
+
+def shape_for(keys: Tuple[str, ...]) -> Shape:
+    shape = _SHAPES.get(keys)
+    if shape is None:
+        keys = tuple(sys.intern(key) for key in keys)
+        shape = _SHAPES[keys] = Shape(keys)
+    return shape
+
+
+def freeze(value: Any) -> Any:
+    """Compact form of a nested JSON value.
+
+    Lists become tuples, short strings are interned and dicts become a
+    tuple of their Shape followed by their values (a JSON list can never
+    start with a Shape, so the two stay distinguishable).
+    """
+    kind = type(value)
+    if kind is str:
+        return sys.intern(value) if len(value) <= INTERN_MAX_LEN else value
+    if kind is dict:
+        return (shape_for(tuple(value)), *map(freeze, value.values()))
+    if kind is list or kind is tuple:
+        items = tuple(map(freeze, value))
+        if items and all(type(item) is str for item in items):
+            pooled = _TUPLES.get(items)
+            if pooled is not None:
+                return pooled
+            if len(_TUPLES) < MAX_POOLED_TUPLES:
+                _TUPLES[items] = items
+        return items
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Inverse of freeze: a fresh JSON value (dicts and lists) that the caller may modify"""
+    kind = type(value)
+    if kind is tuple:
+        if value and type(value[0]) is Shape:
+            return dict(zip(value[0].keys, map(thaw, islice(value, 1, None))))
+        return [thaw(item) for item in value]
+    if kind is CompactRecord:
+        return value.to_dict()
+    return value
+
+
+class CompactRecord(Mapping):
+    """Read-only, memory-compact stand-in for a use case dict.
+
+    Values are stored in one tuple against a key order shared with every
+    other record of the same shape; nested dicts and lists are frozen
+    into tuples (see freeze()). Reading a key returns the value in its JSON shape (lists and
+    dicts, freshly built), so validators and uploaders can use a record
+    exactly like the dict it was built from. copy() and to_dict() return a
+    plain dict, and json_default() lets json.dumps serialize records
+    directly.
+    """
+
+    __slots__ = ("shape", "values")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.shape = shape_for(tuple(data))
+        self.values = tuple(map(freeze, data.values()))
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.values[self.shape.index[key]]
+        kind = type(value)
+        if kind is tuple or kind is CompactRecord:
+            return thaw(value)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        i = self.shape.index.get(key)
+        if i is None:
+            return default
+        value = self.values[i]
+        kind = type(value)
+        if kind is tuple or kind is CompactRecord:
+            return thaw(value)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.shape.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.shape.keys)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(zip(self.shape.keys, map(thaw, self.values)))
+
+    copy = to_dict
+
+    def __reduce__(self):
+        return CompactRecord, (self.to_dict(),)
+
+    def __repr__(self) -> str:
+        return f"CompactRecord({self.to_dict()!r})"
+
+
+def compact(use_case: Any) -> Any:
+    """CompactRecord for a dict; anything else (including a CompactRecord) is returned unchanged"""
+    return CompactRecord(use_case) if type(use_case) is dict else use_case
+
+
+def expand(use_case: Any) -> Any:
+    """Plain dict for a CompactRecord; anything else is returned unchanged"""
+    return use_case.to_dict() if type(use_case) is CompactRecord else use_case
+
+
+def json_default(obj: Any) -> Any:
+    """json.dumps(..., default=json_default) hook that serializes CompactRecords as their dicts"""
+    if type(obj) is CompactRecord:
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
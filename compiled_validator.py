@@ -0,0 +1,175 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from compact_record import expand
+from validation_cache import SCHEMA_PATH
+
+logger = logging.getLogger(__name__)
+
+# JSON Schema type name -> exact Python types produced by json.load.
+# bool is deliberately not an integer/number here, unlike isinstance().
+_JSON_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+    "object": (dict,),
+    "array": (list,),
+}
+
+_MISSING = object()
+
+
+def _path(p: Any) -> str:
+    """Render a lazily built (parent, key) path chain as e.g. questionnaires[0].sections[2].id"""
+    parts = []
+    while p is not None:
+        p, key = p
+        parts.append(f"[{key}]" if isinstance(key, int) else f".{key}")
+    return "".join(reversed(parts)).lstrip(".") or "<root>"
+
+
+class _Compiler:
+    """Translate a JSON Schema (the subset used by schema.json) into Python source.
+
+    $ref'd definitions are inlined into a single function per root, so a
+    nested use case (questionnaires -> sections -> questions) is checked in
+    one pass with no per-item function calls or setup. Each object checks
+    its own type, required keys, every known property and (if
+    additionalProperties is false) extra keys. Error paths are only built
+    when an error is actually reported.
+    """
+
+    # Guard against self-referencing schemas, which cannot be fully inlined
+    MAX_DEPTH = 16
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self.definitions = schema.get("definitions", {})
+        self.constants: Dict[str, Any] = {}
+
+    def const(self, value: Any) -> str:
+        name = f"_C{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def resolve(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        while "$ref" in node:
+            ref = node["$ref"]
+            if not ref.startswith("#/definitions/"):
+                raise ValueError(f"Unsupported $ref: {ref}")
+            node = self.definitions[ref.rsplit("/", 1)[1]]
+        return node
+
+    def type_check(self, names: List[str], var: str) -> str:
+        """Condition that is true when var does NOT have one of the given JSON types"""
+        types = [t for n in names for t in _JSON_TYPES[n]]
+        if len(types) == 1:
+            return f"type({var}) is not {types[0].__name__ if types[0] is not type(None) else 'type(None)'}"
+        return f"type({var}) not in {self.const(frozenset(types))}"
+
+    def check(self, node: Dict[str, Any], var: str, path: str, ind: str, depth: int) -> List[str]:
+        """Source lines validating the value in `var` against node"""
+        if depth > self.MAX_DEPTH:
+            raise ValueError("Schema nesting too deep (recursive $ref?)")
+        node = self.resolve(node)
+        types = node.get("type")
+        names = [types] if isinstance(types, str) else list(types or [])
+        lines = []
+        if names:
+            lines.append(f"{ind}if {self.type_check(names, var)}:")
+            lines.append(f"{ind}    errors.append(f\"{{_path({path})}}: expected {' or '.join(names)}, got {{type({var}).__name__}}\")")
+        if "enum" in node:
+            values = self.const(frozenset(node["enum"]))
+            lines.append(f"{ind}{'elif' if lines else 'if'} {var} not in {values}:")
+            lines.append(f"{ind}    errors.append(f\"{{_path({path})}}: must be one of {sorted(node['enum'])}\")")
+
+        # Deeper checks only run on values that passed the type check above
+        def branch(json_type: str) -> str:
+            if names == [json_type] and "enum" not in node:
+                return f"{ind}else:"
+            return f"{ind}{'elif' if lines else 'if'} type({var}) is {_JSON_TYPES[json_type][0].__name__}:"
+
+        if "properties" in node or "required" in node:
+            body = self.object_body(node, var, path, ind + "    ", depth)
+            lines.append(branch("object"))
+            lines.extend(body)
+        if "items" in node:
+            item, index, parent = f"x{depth}", f"j{depth}", f"pk{depth}"
+            inner = self.check(node["items"], item, f"({parent}, {index})", ind + "        ", depth + 1)
+            if inner:
+                lines.append(branch("array"))
+                lines.append(f"{ind}    {parent} = {path}")
+                lines.append(f"{ind}    for {index}, {item} in enumerate({var}):")
+                lines.extend(inner)
+        return lines
+
+    def object_body(self, node: Dict[str, Any], var: str, path: str, ind: str, depth: int) -> List[str]:
+        lines = []
+        for field in node.get("required", []):
+            lines.append(f"{ind}if {field!r} not in {var}:")
+            lines.append(f"{ind}    errors.append(f\"{{_path({path})}}: missing required field: {field}\")")
+        value = f"v{depth}"
+        for field, prop in node.get("properties", {}).items():
+            inner = self.check(prop, value, f"({path}, {field!r})", ind + "    ", depth + 1)
+            if inner:
+                lines.append(f"{ind}{value} = {var}.get({field!r}, _MISSING)")
+                lines.append(f"{ind}if {value} is not _MISSING:")
+                lines.extend(inner)
+        if node.get("additionalProperties") is False:
+            allowed = self.const(frozenset(node.get("properties", {})))
+            lines.append(f"{ind}if not {var}.keys() <= {allowed}:")
+            lines.append(f"{ind}    errors.append(f\"{{_path({path})}}: extra fields not allowed: {{sorted({var}.keys() - {allowed})}}\")")
+        return lines or [f"{ind}pass"]
+
+    def compile(self, definition: str) -> Dict[str, Any]:
+        fn = f"_v_{definition}"
+        body = self.check({"$ref": f"#/definitions/{definition}"}, "o", "p", "    ", 0)
+        source = "\n".join([f"def {fn}(o, p, errors):"] + body)
+        namespace = {"_path": _path, "_MISSING": _MISSING, **self.constants}
+        exec(compile(source, f"<compiled schema {self.schema.get('$id', '')}>", "exec"), namespace)
+        namespace["__source__"] = source
+        return namespace
+
+
+class CompiledValidator:
+    """Validator generated from schema.json once and reused for every record"""
+
+    def __init__(self, schema_path: str = SCHEMA_PATH, definition: str = "use_case"):
+        with open(schema_path, "r") as f:
+            schema = json.load(f)
+        namespace = _Compiler(schema).compile(definition)
+        self.source = namespace["__source__"]
+        self._validate = namespace[f"_v_{definition}"]
+
+    def validate(self, record: Any) -> List[str]:
+        """Return the list of schema violations for a single record (empty if valid)"""
+        errors: List[str] = []
+        self._validate(expand(record), None, errors)
+        return errors
+
+    def is_valid(self, record: Any) -> bool:
+        errors: List[str] = []
+        self._validate(expand(record), None, errors)
+        return not errors
+
+    def validate_document(self, data: Any) -> Dict[int, List[str]]:
+        """Validate a single use case or an array of them, returning errors by index"""
+        records = data if isinstance(data, list) else [data]
+        validate = self._validate
+        failures = {}
+        for i, record in enumerate(records):
+            errors: List[str] = []
+            validate(expand(record), None, errors)
+            if errors:
+                failures[i] = errors
+        return failures
+
+
+@lru_cache(maxsize=None)
+def get_validator(schema_path: str = SCHEMA_PATH, definition: str = "use_case") -> CompiledValidator:
+    """Return the process-wide compiled validator for a schema file"""
+    return CompiledValidator(schema_path, definition)
@@ -0,0 +1,119 @@
+import gzip
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import METRICS
+from request_scheduler import RequestScheduler
+from serialization import dumpb
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api.credo.ai/api/v2/credoai/use_cases"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30.0
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+
+class CredoClient:
+    """Single entry point for Credo AI use case API calls.
+
+    Owns one keep-alive requests.Session with a connection pool of
+    `pool_size`, so TCP/TLS handshakes are paid once per connection rather
+    than once per call, and builds the auth/content headers once. Requests
+    are routed through `scheduler` (rate limit, retries, circuit breaker)
+    when one is given. With compress=True, request bodies of at least
+    COMPRESS_MIN_BYTES are gzip-encoded; responses are always requested
+    compressed.
+    """
+
+    def __init__(self, api_url: str = DEFAULT_API_URL, authorization: str = "",
+                 pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT,
+                 compress: bool = False, scheduler: Optional[RequestScheduler] = None):
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.compress = compress
+        self.scheduler = scheduler
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": authorization,
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate"
+        })
+        self.pool_size = 0
+        self.resize_pool(pool_size)
+
+    def resize_pool(self, pool_size: int) -> None:
+        """Grow the connection pool so `pool_size` requests can run concurrently"""
+        if pool_size <= self.pool_size:
+            return
+        self.pool_size = pool_size
+        # Retries are handled by the scheduler, not urllib3
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method: str, path: str = "", body: Optional[bytes] = None,
+                params: Optional[Dict[str, Any]] = None, endpoint: str = "") -> requests.Response:
+        """Send a request to api_url + path with an already encoded JSON body.
+
+        The latency of every attempt (including retries) is recorded in the
+        http_request_seconds histogram, labelled by endpoint and status.
+        """
+        url = self.api_url + path
+        headers = None
+        if body is not None and self.compress and len(body) >= COMPRESS_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=5)
+            headers = {"Content-Encoding": "gzip"}
+
+        endpoint = endpoint or method
+
+        def send():
+            start = time.perf_counter()
+            status = "error"
+            try:
+                response = self.session.request(method, url, data=body, params=params,
+                                                headers=headers, timeout=self.timeout)
+                status = response.status_code
+                return response
+            finally:
+                METRICS.observe("http_request_seconds", time.perf_counter() - start,
+                                endpoint=endpoint, status=status)
+
+        # A POST that reached the server may have created the use case, so it is not blindly retried
+        return self.scheduler.request(send, idempotent=method != "POST") if self.scheduler else send()
+
+    @staticmethod
+    def encode(payload: Any) -> bytes:
+        """Request body for payload, encoded straight to bytes by the JSON backend"""
+        return dumpb(payload)
+
+    def create_use_case(self, body: bytes) -> requests.Response:
+        return self.request("POST", body=body, endpoint="create")
+
+    def import_use_cases(self, body: bytes) -> requests.Response:
+        return self.request("POST", "/import", body=body, endpoint="import")
+
+    def update_use_case(self, use_case_id: str, body: bytes) -> requests.Response:
+        return self.request("PATCH", f"/{use_case_id}", body=body, endpoint="update")
+
+    def set_custom_fields(self, use_case_id: str, custom_fields: Dict[str, Any]) -> requests.Response:
+        return self.request("PUT", f"/{use_case_id}/custom_fields",
+                            body=self.encode({"custom_fields": custom_fields}), endpoint="custom_fields")
+
+    def list_use_cases(self, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        return self.request("GET", params=params, endpoint="list")
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "CredoClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
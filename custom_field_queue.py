@@ -0,0 +1,78 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from metrics import METRICS
+from upload_journal import UploadJournal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_PENDING = 1000
+
+
+class CustomFieldQueue:
+    """Worker stage that sets custom fields on created use cases in the background.
+
+    Uploaders submit a use case id as soon as it is created and move on to
+    the next create; up to `concurrency` PUTs run alongside them. At most
+    `max_pending` ids wait in the queue, after which submit() blocks so a
+    slow custom fields endpoint throttles the creates instead of building
+    an unbounded backlog. With concurrency 0 every submit() sets the fields
+    in the calling thread, as the uploaders used to.
+
+    `set_fields(use_case_id) -> bool` does the actual PUT. Once it succeeds
+    the journal entry (if any) is marked complete.
+    """
+
+    def __init__(self, set_fields: Callable[[str], bool], concurrency: int = DEFAULT_CONCURRENCY,
+                 journal: Optional[UploadJournal] = None, max_pending: int = DEFAULT_MAX_PENDING):
+        self.set_fields = set_fields
+        self.journal = journal
+        self.concurrency = max(0, concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency) if self.concurrency else None
+        self.slots = threading.BoundedSemaphore(max(1, max_pending))
+        self.lock = threading.Lock()
+        self.stats = {"set": 0, "failed": 0}
+
+    def _run(self, key: Optional[str], use_case_id: str) -> bool:
+        try:
+            ok = self.set_fields(use_case_id)
+        except Exception as e:
+            logger.error(f"Error setting custom fields for use case {use_case_id}: {e}")
+            ok = False
+        if not ok:
+            METRICS.inc("custom_field_failures_total")
+            logger.error(f"Failed to set custom fields for use case {use_case_id}")
+        with self.lock:
+            self.stats["set" if ok else "failed"] += 1
+        if self.journal and key is not None:
+            self.journal.record(key, use_case_id, ok)
+        return ok
+
+    def _release(self, _future) -> None:
+        self.slots.release()
+
+    def submit(self, key: Optional[str], use_case_id: str) -> None:
+        """Queue a PUT for use_case_id (key is its journal key, if journaling)"""
+        if self.executor is None:
+            self._run(key, use_case_id)
+            return
+        self.slots.acquire()
+        self.executor.submit(self._run, key, use_case_id).add_done_callback(self._release)
+
+    def close(self) -> Dict[str, int]:
+        """Wait for every queued PUT to finish and return how many succeeded and failed"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        if self.stats["set"] or self.stats["failed"]:
+            logger.info(f"Custom fields set on {self.stats['set']} use cases ({self.stats['failed']} failed)")
+        return dict(self.stats)
+
+    def __enter__(self) -> "CustomFieldQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,16 @@
+import hashlib
+import json
+from typing import Any
+
+from compact_record import json_default
+
+
+def canonical_json(obj: Any) -> bytes:
+    """Serialize obj to a stable byte string (sorted keys, no whitespace)"""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+                      default=json_default).encode("utf-8")
+
+
+def content_hash(obj: Any) -> str:
+    """Return a stable 128-bit hex fingerprint of obj's canonical JSON"""
+    return hashlib.blake2b(canonical_json(obj), digest_size=16).hexdigest()
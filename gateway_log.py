@@ -0,0 +1,121 @@
+import gzip
+import logging
+import re
+from typing import Any, Dict, IO, Iterable, Iterator, Optional, Tuple
+
+from log_stream import CHUNK_SIZE, GZIP_MAGIC
+
+logger = logging.getLogger(__name__)
+
+SEPARATOR = " - "
+USER_PREFIX = "User: "
+ACTION_PREFIX = "Action: API call to "
+ENDPOINT_PREFIX = "Endpoint: "
+MODEL_PREFIX = "Model: "
+
+# Fallback for lines the split fast path rejects, e.g. a field value containing " - "
+LINE_RE = re.compile(
+    r"(?P<timestamp>\S+ \S+) - User: (?P<user>.*?) - Action: API call to (?P<provider>.*?)"
+    r" - Endpoint: (?P<endpoint>.*?) - Model: (?P<model>.*?)\s*$"
+)
+
+
+def open_gateway_log(path: str) -> IO[bytes]:
+    """Open a gateway log as bytes, transparently decompressing gzip"""
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == GZIP_MAGIC:
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def iter_lines(path: str, chunk_size: int = CHUNK_SIZE, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """Yield the lines of a file, reading and decoding it in large chunks.
+
+    Each chunk is cut at its last newline before decoding, so a multi-byte
+    character is never split and the per-line cost is a single str.split.
+    start/end limit an uncompressed log to that byte range.
+    """
+    tail = b""
+    ranged = bool(start) or end is not None
+    with open(path, "rb") if ranged else open_gateway_log(path) as f:
+        if start:
+            f.seek(start)
+        remaining = None if end is None else end - start
+        while True:
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+                chunk = f.read(min(chunk_size, remaining))
+                remaining -= len(chunk)
+            else:
+                chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            cut = chunk.rfind(b"\n")
+            if cut < 0:
+                tail += chunk
+                continue
+            text = (tail + chunk[:cut]).decode("utf-8", errors="replace")
+            tail = chunk[cut + 1:]
+            yield from text.split("\n")
+    if tail:
+        yield tail.decode("utf-8", errors="replace")
+
+
+def parse_line(line: str) -> Optional[Dict[str, str]]:
+    """Parse one gateway log line into an event, or None if it is not one.
+
+    Lines look like
+    "<timestamp> - User: <user> - Action: API call to <provider> - Endpoint: <endpoint> - Model: <model>".
+    """
+    parts = line.rstrip().split(SEPARATOR)
+    if len(parts) == 5:
+        timestamp, user, action, endpoint, model = parts
+        if (user.startswith(USER_PREFIX) and action.startswith(ACTION_PREFIX)
+                and endpoint.startswith(ENDPOINT_PREFIX) and model.startswith(MODEL_PREFIX)):
+            # Slice offsets are the prefix lengths above
+            return {
+                "timestamp": timestamp,
+                "user": user[6:],
+                "provider": action[20:],
+                "endpoint": endpoint[10:],
+                "model": model[7:]
+            }
+    match = LINE_RE.match(line)
+    return match.groupdict() if match else None
+
+
+def iter_gateway_events(path: str, chunk_size: int = CHUNK_SIZE, start: int = 0,
+                        end: Optional[int] = None) -> Iterator[Dict[str, str]]:
+    """Yield parsed events from a raw gateway log (or bytes [start, end) of it), skipping blank and malformed lines"""
+    skipped = 0
+    for line in iter_lines(path, chunk_size, start, end):
+        event = parse_line(line)
+        if event is not None:
+            yield event
+        elif line.strip():
+            skipped += 1
+    if skipped:
+        logger.warning(f"Skipped {skipped} malformed lines in {path}")
+
+
+def use_case_candidate(event: Dict[str, str]) -> Dict[str, Any]:
+    """Shape a gateway event like an entry of the JSON use case logs"""
+    return {
+        "name": f"{event['provider']} {event['model']}",
+        "description": (f"Unsanctioned {event['provider']} usage detected via gateway logs: "
+                        f"{event['endpoint']} with model {event['model']}, first seen "
+                        f"{event['timestamp']} ({event['user']})"),
+        "ai_type": event["provider"]
+    }
+
+
+def iter_use_case_candidates(events: Iterable[Dict[str, str]]) -> Iterator[Dict[str, Any]]:
+    """Yield one use case candidate per distinct (provider, model), in first-seen order"""
+    seen: set = set()
+    for event in events:
+        key: Tuple[str, str] = (event["provider"], event["model"])
+        if key not in seen:
+            seen.add(key)
+            yield use_case_candidate(event)
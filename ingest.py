@@ -0,0 +1,274 @@
+import glob
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, TypeVar, Union
+
+from aggregate import DEFAULT_GROUP_KEY, Aggregator
+from columnar import format_for_path, write_use_cases
+from serialization import dumps
+from gateway_log import iter_gateway_events, use_case_candidate
+from log_stream import iter_records
+from transform import DEFAULT_BATCH_SIZE, Transformer, json_array_item, transform_file
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Consecutive files are grouped into shards of about this many bytes; a
+# shard is the unit of work sent to a worker process
+DEFAULT_SHARD_BYTES = 8 << 20
+# Files picked up when the source is a directory
+LOG_SUFFIXES = (".json", ".ndjson", ".jsonl", ".log", ".gz")
+# Event field the incremental watermark is kept on
+WATERMARK_FIELD = "startTime"
+
+
+class FileSlice(NamedTuple):
+    """Part of a log file to read: bytes [start, end) (end None reads to the end of
+    the file), skipping JSON events whose startTime is at or before `after`"""
+    path: str
+    start: int = 0
+    end: Optional[int] = None
+    after: Optional[float] = None
+
+
+# A source is a whole file (its path) or a FileSlice of one
+Source = Union[str, FileSlice]
+
+
+class Watermark:
+    """Highest startTime read so far"""
+
+    def __init__(self, value: Optional[float] = None):
+        self.value = value
+
+    def observe(self, value: Optional[float]) -> None:
+        if value is not None and (self.value is None or value > self.value):
+            self.value = value
+
+
+def is_multi_source(source: str) -> bool:
+    """True for a directory or glob pattern rather than a single file"""
+    return os.path.isdir(source) or glob.has_magic(source)
+
+
+def expand_sources(source: str) -> List[str]:
+    """Files named by a file path, a directory or a glob pattern, sorted by path.
+
+    Rotated gateway exports are named by timestamp, so path order is also
+    the order the events were written in.
+    """
+    if os.path.isdir(source):
+        files = [os.path.join(source, name) for name in os.listdir(source) if name.endswith(LOG_SUFFIXES)]
+    elif glob.has_magic(source):
+        files = glob.glob(source, recursive=True)
+    else:
+        return [source]
+    return sorted(f for f in files if os.path.isfile(f))
+
+
+def _slice(source: Source) -> FileSlice:
+    return source if isinstance(source, FileSlice) else FileSlice(source)
+
+
+def _size(source: Source) -> int:
+    source = _slice(source)
+    end = os.path.getsize(source.path) if source.end is None else source.end
+    return end - source.start
+
+
+def shard_files(files: Sequence[Source], shard_bytes: int = DEFAULT_SHARD_BYTES) -> List[List[Source]]:
+    """Split files, in order, into runs of consecutive files of about shard_bytes each"""
+    shards: List[List[Source]] = []
+    size = 0
+    for source in files:
+        if not shards or size >= shard_bytes:
+            shards.append([])
+            size = 0
+        shards[-1].append(source)
+        size += _size(source)
+    return shards
+
+
+def iter_source_records(files: Iterable[Source], watermark: Optional[Watermark] = None) -> Iterator[Dict[str, Any]]:
+    """Records of every file (or file slice) in turn.
+
+    Events at or before a slice's `after` are skipped; with a watermark,
+    the highest startTime read is recorded on it once a file is done.
+    """
+    for source in files:
+        source = _slice(source)
+        records = iter_records(source.path, start=source.start, end=source.end)
+        if source.after is None and watermark is None:
+            yield from records
+            continue
+        after = source.after
+        latest = None
+        for record in records:
+            value = record.get(WATERMARK_FIELD) if type(record) is dict else None
+            if type(value) in (int, float):
+                if after is not None and value <= after:
+                    continue
+                if latest is None or value > latest:
+                    latest = value
+            yield record
+        if watermark is not None:
+            watermark.observe(latest)
+
+
+def map_shards(fn: Callable[[List[Source]], T], shards: Sequence[List[Source]],
+               workers: Optional[int] = None) -> Iterator[T]:
+    """Yield fn(shard) for every shard, in shard order, computed across a process pool.
+
+    At most two shards per worker are in flight, so results are merged as
+    they arrive instead of piling up. With one worker or one shard
+    everything runs in this process.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(shards))
+    if workers <= 1:
+        for shard in shards:
+            yield fn(shard)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for shard in shards:
+            pending.append(executor.submit(fn, shard))
+            # Collect in submission order so the merge is the same regardless of timing
+            while len(pending) >= 2 * workers or (pending and pending[0].done()):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _aggregate_shard(key_fields: Tuple[str, ...], track: bool,
+                     files: List[Source]) -> Tuple[Aggregator, Optional[float]]:
+    watermark = Watermark() if track else None
+    return Aggregator(key_fields).update(iter_source_records(files, watermark)), watermark and watermark.value
+
+
+def aggregate_files(files: Sequence[Source], key_fields: Iterable[str] = DEFAULT_GROUP_KEY,
+                    workers: Optional[int] = None, shard_bytes: int = DEFAULT_SHARD_BYTES,
+                    watermark: Optional[Watermark] = None) -> Aggregator:
+    """Aggregate raw gateway events from many files in parallel.
+
+    Each shard is aggregated in a worker and the partial aggregators are
+    merged in file order, so groups, their first-seen samples and counts
+    come out exactly as aggregating the files one after another would.
+    """
+    shards = shard_files(files, shard_bytes)
+    result = Aggregator(key_fields)
+    track = watermark is not None
+    for partial_result, latest in map_shards(partial(_aggregate_shard, result.key_fields, track), shards, workers):
+        result.merge(partial_result)
+        if track:
+            watermark.observe(latest)
+    logger.debug(f"Aggregated {result.events} events from {len(files)} files in {len(shards)} shards")
+    return result
+
+
+def _candidate_shard(files: List[Source]) -> List[Tuple[Tuple[str, str], Dict[str, Any]]]:
+    seen: set = set()
+    candidates = []
+    for source in map(_slice, files):
+        for event in iter_gateway_events(source.path, start=source.start, end=source.end):
+            key = (event["provider"], event["model"])
+            if key not in seen:
+                seen.add(key)
+                candidates.append((key, use_case_candidate(event)))
+    return candidates
+
+
+def iter_gateway_candidates(files: Sequence[Source], workers: Optional[int] = None,
+                            shard_bytes: int = DEFAULT_SHARD_BYTES) -> Iterator[Dict[str, Any]]:
+    """Yield one use case candidate per distinct (provider, model) across many gateway logs.
+
+    Workers deduplicate within their shard; candidates are then deduplicated
+    across shards in file order, which keeps the first-seen candidate just
+    like gateway_log.iter_use_case_candidates over the concatenated logs.
+    """
+    seen: set = set()
+    for candidates in map_shards(_candidate_shard, shard_files(files, shard_bytes), workers):
+        for key, candidate in candidates:
+            if key not in seen:
+                seen.add(key)
+                yield candidate
+
+
+# One transformer per worker process, rebuilt only when the mapping changes
+_worker_transformer: Optional[Tuple[str, Transformer]] = None
+
+
+def _transform_shard(mapping: Optional[Dict[str, Any]], batch_size: int, encoding: Optional[str],
+                     indent: Optional[int], track: bool, files: List[Source]) -> Tuple[List[Any], Optional[float]]:
+    """Transform a shard; use cases come back already encoded for the output file when possible,
+    which is much cheaper to send back to the parent than the objects"""
+    global _worker_transformer
+    signature = json.dumps([mapping, batch_size], sort_keys=True)
+    if _worker_transformer is None or _worker_transformer[0] != signature:
+        _worker_transformer = (signature, Transformer(mapping, batch_size))
+    transformer = _worker_transformer[1]
+    sources = [_slice(source) for source in files]
+    watermark = Watermark() if track else None
+    if track or any(source.after is not None for source in sources):
+        use_cases = transformer.transform(iter_source_records(sources, watermark))
+    else:
+        # Without watermarks each file goes through the typed decoder where it can
+        use_cases = (use_case for source in sources
+                     for use_case in transformer.transform_path(source.path, source.start, source.end))
+    if encoding == "json":
+        output = [json_array_item(use_case, indent) for use_case in use_cases]
+    elif encoding == "ndjson":
+        output = [dumps(use_case) for use_case in use_cases]
+    else:
+        output = list(use_cases)
+    return output, watermark and watermark.value
+
+
+def transform_files(files: Sequence[Source], output_file: str, mapping: Optional[Dict[str, Any]] = None,
+                    batch_size: int = DEFAULT_BATCH_SIZE, workers: Optional[int] = None,
+                    shard_bytes: int = DEFAULT_SHARD_BYTES, watermark: Optional[Watermark] = None,
+                    indent: Optional[int] = 4) -> int:
+    """Transform many raw event files into one use case file, sharded across a process pool.
+
+    The output is identical to transforming the files one after another:
+    shards are written in file order. A single file is streamed by
+    transform.transform_file instead, as a shard's output is held in
+    memory until it is written.
+    """
+    if len(files) == 1 and isinstance(files[0], str) and watermark is None:
+        return transform_file(files[0], output_file, mapping, batch_size, indent)
+    shards = shard_files(files, shard_bytes)
+    fmt = format_for_path(output_file)
+    encoding = fmt if fmt in ("json", "ndjson") else None
+    track = watermark is not None
+
+    def results() -> Iterator[List[Any]]:
+        for output, latest in map_shards(partial(_transform_shard, mapping, batch_size, encoding, indent, track),
+                                         shards, workers):
+            if track:
+                watermark.observe(latest)
+            yield output
+
+    count = 0
+    if encoding is None:
+        count = write_use_cases((use_case for result in results() for use_case in result), output_file)
+    else:
+        separator = ",\n" if encoding == "json" else "\n"
+        with open(output_file, "w", encoding="utf-8") as f:
+            for texts in results():
+                if not texts:
+                    continue
+                if encoding == "json":
+                    f.write(",\n" if count else "[\n")
+                f.write(separator.join(texts))
+                if encoding == "ndjson":
+                    f.write("\n")
+                count += len(texts)
+            if encoding == "json":
+                f.write("\n]" if count else "[]")
+    logger.info(f"Transformed {count} records from {len(files)} files in {len(shards)} shards into {output_file}")
+    return count
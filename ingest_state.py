@@ -0,0 +1,185 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from aggregate import Aggregator, EventGroup
+from ingest import FileSlice, Watermark
+from log_stream import GZIP_MAGIC
+from upload_journal import AppendOnlyLog
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes fingerprinted to recognise a file that was replaced or truncated
+HEAD_BYTES = 4096
+# Entry key of the startTime watermark (no file path is empty)
+WATERMARK_KEY = ""
+# Prefix of the entry keys of aggregated event groups (no file path contains a NUL)
+GROUP_PREFIX = "\0"
+# Files that are appended to line by line and can be read from an offset
+TAILABLE_SUFFIXES = (".ndjson", ".jsonl", ".log")
+
+
+class FileState(NamedTuple):
+    """How far a file has been read, and what it looked like at the time"""
+    offset: int
+    size: int
+    mtime: float
+    inode: int
+    head: str
+    head_len: int
+
+
+def _head(path: str, length: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(length), digest_size=8).hexdigest()
+
+
+def _is_tailable(path: str) -> bool:
+    """True for uncompressed line-oriented logs (NDJSON and gateway text logs),
+    which only ever grow by whole lines. Anything else is re-read in full when it changes."""
+    if not path.endswith(TAILABLE_SUFFIXES):
+        return False
+    with open(path, "rb") as f:
+        return f.read(2) != GZIP_MAGIC
+
+
+def _line_end(path: str, start: int, size: int) -> int:
+    """Offset just past the last newline in bytes [start, size), or start if there is none"""
+    with open(path, "rb") as f:
+        pos = size
+        while pos > start:
+            block = min(HEAD_BYTES, pos - start)
+            f.seek(pos - block)
+            cut = f.read(block).rfind(b"\n")
+            if cut >= 0:
+                return pos - block + cut + 1
+            pos -= block
+    return start
+
+
+class IngestState(AppendOnlyLog):
+    """Persistent read positions of incremental ingestion.
+
+    For every input file it records the offset read up to, its size, mtime,
+    inode and a fingerprint of its first bytes, plus the highest event
+    startTime processed (the watermark). plan() turns a list of files into
+    the slices still to read:
+
+    - unchanged files are skipped
+    - NDJSON and gateway text logs that grew are read from the recorded
+      offset; these are only ever read up to their last complete line
+    - a file renamed by log rotation (same inode and leading bytes under a
+      new path) carries its offset over
+    - new files, and other files (gzip, JSON arrays) that changed or were
+      truncated, are read in full, skipping events at or before the watermark
+
+    Raw gateway events are aggregated into use cases, so their running
+    totals are kept here as well: aggregate() merges the groups read this
+    run into the ones committed before, including their HyperLogLog user
+    counters, and commit() saves the groups that changed.
+
+    Nothing is persisted until commit(), which the caller runs once the
+    data read has been fully processed, so a failed run is simply retried.
+    Lines are {"f": path, "o": offset, "s": size, "m": mtime, "i": inode,
+    "h": head fingerprint, "n": head length}, {"f": "", "w": watermark} and
+    {"f": "\\0" + group key, "g": group state}.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        super().__init__(path, fsync)
+        self.pending: Dict[str, Any] = {}
+        self.seen = Watermark(self.watermark)
+
+    def _load(self, record: Dict[str, Any]) -> None:
+        if record["f"] == WATERMARK_KEY:
+            self.entries[WATERMARK_KEY] = record["w"]
+        elif record["f"].startswith(GROUP_PREFIX):
+            self.entries[record["f"]] = record["g"]
+        else:
+            self.entries[record["f"]] = FileState(record["o"], record["s"], record["m"], record["i"],
+                                                  record["h"], record["n"])
+
+    def _dump(self, key: str, entry: Any) -> Dict[str, Any]:
+        if key == WATERMARK_KEY:
+            return {"f": key, "w": entry}
+        if key.startswith(GROUP_PREFIX):
+            return {"f": key, "g": entry}
+        return {"f": key, "o": entry.offset, "s": entry.size, "m": entry.mtime, "i": entry.inode,
+                "h": entry.head, "n": entry.head_len}
+
+    @property
+    def watermark(self) -> Optional[float]:
+        """Highest startTime committed so far"""
+        return self.entries.get(WATERMARK_KEY)
+
+    def _previous(self, path: str, st: os.stat_result, inodes: Dict[int, FileState]) -> Optional[FileState]:
+        """State recorded for this file under its path, or under the name it had before rotation"""
+        entry = self.entries.get(path)
+        if entry is None:
+            entry = inodes.get(st.st_ino)
+        if entry is None or entry.size > st.st_size or _head(path, entry.head_len) != entry.head:
+            return None
+        return entry
+
+    def plan(self, files: Sequence[str]) -> List[FileSlice]:
+        """Slices of files not read yet; their new state is kept pending until commit()"""
+        inodes = {entry.inode: entry for entry in self.entries.values() if isinstance(entry, FileState)}
+        slices: List[FileSlice] = []
+        counts = {"new": 0, "appended": 0, "reread": 0, "unchanged": 0}
+        for path in files:
+            st = os.stat(path)
+            known = path in self.entries or st.st_ino in inodes
+            entry = self._previous(path, st, inodes)
+            if entry is not None and entry.size == st.st_size and entry.mtime == st.st_mtime:
+                counts["unchanged"] += 1
+                self.pending[path] = entry
+                continue
+            tailable = _is_tailable(path)
+            if entry is not None and tailable:
+                counts["appended"] += 1
+                end = _line_end(path, entry.offset, st.st_size)
+                if end > entry.offset:
+                    slices.append(FileSlice(path, entry.offset, end))
+            else:
+                counts["reread" if known else "new"] += 1
+                end = _line_end(path, 0, st.st_size) if tailable else st.st_size
+                slices.append(FileSlice(path, 0, end if tailable else None, self.watermark))
+            head_len = min(st.st_size, HEAD_BYTES)
+            self.pending[path] = FileState(end, st.st_size, st.st_mtime, st.st_ino, _head(path, head_len), head_len)
+        logger.info(f"Incremental ingestion of {len(files)} files: {counts['new']} new, {counts['appended']} appended, "
+                    f"{counts['reread']} re-read, {counts['unchanged']} unchanged (watermark {self.watermark})")
+        return slices
+
+    def aggregate(self, aggregator: Aggregator) -> Aggregator:
+        """Add the events aggregated this run to the totals of earlier runs.
+
+        Returns the groups aggregator touched, each holding its running
+        total since the first run; they are saved by commit().
+        """
+        totals = Aggregator(aggregator.key_fields)
+        for key, group in aggregator.groups.items():
+            entry_key = GROUP_PREFIX + json.dumps([aggregator.key_fields, key])
+            stored = self.entries.get(entry_key)
+            total = EventGroup.from_state(stored) if stored is not None else EventGroup(key)
+            total.merge(group)
+            totals.groups[key] = total
+            self.pending[entry_key] = total.state()
+        totals.events = aggregator.events
+        return totals
+
+    def commit(self) -> None:
+        """Persist the planned file positions, aggregated groups and the highest startTime read"""
+        for path, state in self.pending.items():
+            if self.entries.get(path) != state:
+                self.put(path, state)
+        self.pending = {}
+        if self.seen.value is not None and self.seen.value != self.watermark:
+            self.put(WATERMARK_KEY, self.seen.value)
+
+    def close(self) -> None:
+        # Rotated files keep adding paths; compact once most lines are stale
+        if self.lines > 2 * len(self.entries) + 1000:
+            self.compact()
+        super().close()
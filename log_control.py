@@ -0,0 +1,113 @@
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from compact_record import CompactRecord
+
+# Full request/response payloads go to this logger (at DEBUG), separate from progress messages
+PAYLOAD_LOGGER = "shadow_ai.payloads"
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def _default(obj: Any) -> Any:
+    return obj.to_dict() if isinstance(obj, CompactRecord) else str(obj)
+
+
+class LazyJSON:
+    """Defer json.dumps until a log record is actually emitted.
+
+    logger.debug("Payload: %s", LazyJSON(payload)) costs nothing when DEBUG
+    is disabled or the record is dropped by a filter.
+    """
+
+    __slots__ = ("obj", "indent", "limit")
+
+    def __init__(self, obj: Any, indent: Optional[int] = 2, limit: Optional[int] = None):
+        self.obj = obj
+        self.indent = indent
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = self.obj if isinstance(self.obj, str) else json.dumps(self.obj, indent=self.indent, default=_default)
+        if self.limit is not None and len(text) > self.limit:
+            return f"{text[:self.limit]}... ({len(text)} chars)"
+        return text
+
+
+class RateLimitFilter(logging.Filter):
+    """Let at most `rate` records per second through for each message template.
+
+    Each template has a token bucket of `burst` records. When a record gets
+    through after others were dropped, the number dropped is appended to it.
+    A rate of 0 or less disables the limit.
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 5):
+        super().__init__()
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.buckets: Dict[Any, Tuple[float, float, int]] = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        with self.lock:
+            tokens, last, dropped = self.buckets.get(record.msg, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self.buckets[record.msg] = (tokens, now, dropped + 1)
+                return False
+            self.buckets[record.msg] = (tokens - 1, now, 0)
+        if dropped:
+            record.msg = f"{record.msg} [{dropped} similar messages suppressed]"
+        return True
+
+
+class ProgressLogger:
+    """Log a one-line progress summary every `every` items or `interval` seconds, whichever comes first"""
+
+    def __init__(self, logger: logging.Logger, label: str, every: int = 1000, interval: float = 10.0):
+        self.logger = logger
+        self.label = label
+        self.every = max(1, every)
+        self.interval = interval
+        self.count = 0
+        self.failed = 0
+        self.start = self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def update(self, ok: bool = True) -> None:
+        with self.lock:
+            self.count += 1
+            if not ok:
+                self.failed += 1
+            if self.count % self.every and time.monotonic() - self.last < self.interval:
+                return
+            self.last = time.monotonic()
+            count, failed = self.count, self.failed
+        if self.logger.isEnabledFor(logging.INFO):
+            rate = count / max(self.last - self.start, 1e-9)
+            self.logger.info("%s: %d done (%d failed), %.1f/sec", self.label, count, failed, rate)
+
+
+def configure_logging(level: str = "INFO", quiet: bool = False, log_payloads: bool = False,
+                      payload_rate: float = 1.0) -> None:
+    """Set up root logging plus the payload logger.
+
+    quiet raises the level to WARNING so only problems are reported.
+    Payload dumps are off unless log_payloads is set, and then limited to
+    payload_rate records per second per message (0 = unlimited).
+    """
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    root_level = logging.WARNING if quiet else getattr(logging, level.upper(), logging.INFO)
+    logging.getLogger().setLevel(root_level)
+    payloads = logging.getLogger(PAYLOAD_LOGGER)
+    payloads.setLevel(logging.DEBUG if log_payloads and not quiet else logging.CRITICAL + 1)
+    for f in [f for f in payloads.filters if isinstance(f, RateLimitFilter)]:
+        payloads.removeFilter(f)
+    payloads.addFilter(RateLimitFilter(payload_rate))
@@ -0,0 +1,279 @@
+import codecs
+import gzip
+import json
+import logging
+import mmap
+import os
+import re
+from typing import Iterator, Iterable, Dict, Any, IO, List, Optional, Sequence
+
+try:
+    import msgspec
+except ImportError:  # optional, splits JSON arrays into raw elements without decoding them
+    msgspec = None
+
+from columnar import format_for_path, is_parquet, iter_parquet
+from serialization import loads
+
+logger = logging.getLogger(__name__)
+
+# Amount of text pulled from the file per read
+CHUNK_SIZE = 1 << 20
+
+GZIP_MAGIC = b"\x1f\x8b"
+WHITESPACE = " \t\r\n"
+# Uncompressed JSON files up to this size are decoded with a single loads()
+# call, several times quicker with orjson or msgspec than the incremental
+# decoder; larger ones are streamed to keep memory flat
+WHOLE_FILE_MAX_BYTES = 16 << 20
+# Longer than any JSON token other than a string (-Infinity, \uXXXX escapes,
+# the tail of a number), so a decode error further from the end of the
+# buffer than this cannot be caused by the buffer ending there
+MAX_TOKEN_CHARS = 32
+
+_decoder = json.JSONDecoder()
+# Characters that may continue a number, up to the end of the buffer
+_NUMBER_TAIL = re.compile(r"[-+.0-9eE]*\Z")
+_UNDECODED = object()
+# Skips over each element of a JSON array, keeping only where it starts and ends
+_raw_array_decoder = msgspec.json.Decoder(List[msgspec.Raw]) if msgspec is not None else None
+
+
+def open_log_file(path: str) -> IO[str]:
+    """Open a log file as text, transparently decompressing gzip"""
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == GZIP_MAGIC:
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def read_byte_range(path: str, start: int = 0, end: Optional[int] = None,
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield bytes [start, end) of a file in chunks, transparently decompressing gzip"""
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    with gzip.open(path, "rb") if magic == GZIP_MAGIC else open(path, "rb") as f:
+        if start:
+            f.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def read_text_range(path: str, start: int = 0, end: Optional[int] = None,
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Yield the UTF-8 text of bytes [start, end) of a file in chunks"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in read_byte_range(path, start, end, chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def iter_ndjson_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split newline-delimited JSON, as an iterable of byte chunks, into its non-blank lines"""
+    tail = b""
+    for chunk in chunks:
+        lines = (tail + chunk).split(b"\n") if tail else chunk.split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            if line and not line.isspace():
+                yield line
+    if tail and not tail.isspace():
+        yield tail
+
+
+def iter_ndjson_values(chunks: Iterable[bytes], raw: bool = False) -> Iterator[Any]:
+    """Decode newline-delimited JSON from an iterable of byte chunks, one loads() per line.
+
+    Lines go to the JSON backend as bytes, without decoding them to str
+    first. Blank lines are skipped. With raw=True each line's text is
+    yielded instead.
+    """
+    if raw:
+        return (line.decode("utf-8") for line in iter_ndjson_lines(chunks))
+    return map(loads, iter_ndjson_lines(chunks))
+
+
+def iter_json_values(chunks: Iterable[str], raw: bool = False) -> Iterator[Any]:
+    """Incrementally decode JSON values from an iterable of text chunks.
+
+    A top-level array is unwrapped and its elements are yielded one at a
+    time. Anything else is treated as a stream of whitespace-separated
+    values, which covers both a single object and newline-delimited JSON.
+    Only the current chunk plus one partially read value is held in memory.
+    With raw=True the source text of each value is yielded instead, which
+    is much cheaper to hand to another process than the decoded object.
+    """
+    chunks = iter(chunks)
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            return False
+        # Drop the already consumed prefix before growing the buffer
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip(chars: str) -> bool:
+        """Advance past any of chars, returning False at end of input"""
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf):
+                return True
+            if not fill():
+                return False
+
+    if not skip(WHITESPACE):
+        return
+
+    in_array = buf[pos] == "["
+    if in_array:
+        pos += 1
+
+    while True:
+        if not skip(WHITESPACE + "," if in_array else WHITESPACE):
+            if in_array:
+                raise ValueError("Unterminated JSON array")
+            return
+        if in_array and buf[pos] == "]":
+            return
+
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+                # A value touching the end of the buffer may be truncated, and so may
+                # a number followed only by what could continue it (e.g. "-1." of "-1.5")
+                if eof or (end < len(buf) and not (isinstance(value, (int, float))
+                                                   and _NUMBER_TAIL.match(buf, end))):
+                    break
+            except json.JSONDecodeError as e:
+                # Only an error near the end of the buffer, or a string running past it,
+                # can be a value cut off by the chunk boundary; anything before that is
+                # invalid whatever follows, so there is no point in reading on
+                if eof or (e.pos < len(buf) - MAX_TOKEN_CHARS and not e.msg.startswith("Unterminated string")):
+                    raise
+            if not fill():
+                value, end = _decoder.raw_decode(buf, pos)
+                break
+
+        start, pos = pos, end
+        yield buf[start:end] if raw else value
+
+
+def split_json_array(path: str) -> Optional[Iterator[str]]:
+    """Source text of each element of an uncompressed JSON array file, or None if
+    msgspec is not installed or the file is not a single valid JSON array.
+
+    The file is memory-mapped and msgspec scans it as a list of raw
+    elements, matching brackets and strings without building any objects,
+    several times quicker than finding each element's end by decoding it.
+    """
+    if _raw_array_decoder is None:
+        return None
+    with open(path, "rb") as f:
+        if f.read(2) == GZIP_MAGIC or os.fstat(f.fileno()).st_size == 0:
+            return None
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        elements = _raw_array_decoder.decode(mapped)
+    except msgspec.DecodeError:
+        # Not an array, or invalid JSON: the incremental decoder reports where it breaks
+        mapped.close()
+        return None
+    return _iter_raw_elements(mapped, elements)
+
+
+def _iter_raw_elements(mapped: mmap.mmap, elements: List[Any]) -> Iterator[str]:
+    # Each Raw points into the mapping, which can only be closed once all are released
+    elements.reverse()
+    try:
+        while elements:
+            yield str(elements.pop(), "utf-8")
+    finally:
+        elements.clear()
+        mapped.close()
+
+
+def iter_records(path: str, chunk_size: int = CHUNK_SIZE, raw: bool = False,
+                 columns: Optional[Sequence[str]] = None, start: int = 0,
+                 end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Yield records one at a time from a JSON array, NDJSON, gzip-compressed or parquet file.
+
+    With columns, only those fields are returned; for parquet input the
+    other columns are never read from disk. start/end limit an uncompressed
+    NDJSON file to the records in that byte range, e.g. lines appended
+    since the last read. .ndjson/.jsonl files are decoded a line at a time
+    and small JSON files in one call, both by the fast JSON backend (see
+    serialization.py); other files go through the incremental decoder.
+    With raw=True, a JSON array file is split into elements without
+    decoding them when msgspec is installed (see split_json_array).
+    """
+    ranged = bool(start) or end is not None
+    if not ranged and is_parquet(path):
+        for record in iter_parquet(path, columns):
+            yield json.dumps(record) if raw else record
+        return
+    raw_values = raw and columns is None
+    if format_for_path(path) == "ndjson":
+        values = iter_ndjson_values(read_byte_range(path, start, end, chunk_size), raw=raw_values)
+    elif ranged:
+        values = iter_json_values(read_text_range(path, start, end, chunk_size), raw=raw_values)
+    elif not raw_values and os.path.getsize(path) <= WHOLE_FILE_MAX_BYTES:
+        values = _iter_whole_file(path, chunk_size)
+    else:
+        values = (split_json_array(path) if raw_values else None) or _iter_streamed(path, chunk_size, raw_values)
+    if columns is None:
+        yield from values
+        return
+    for value in values:
+        record = {k: value[k] for k in columns if k in value} if isinstance(value, dict) else value
+        yield json.dumps(record) if raw else record
+
+
+def _iter_streamed(path: str, chunk_size: int, raw: bool) -> Iterator[Any]:
+    with open_log_file(path) as f:
+        yield from iter_json_values(iter(lambda: f.read(chunk_size), ""), raw=raw)
+
+
+def read_whole_file(path: str) -> Optional[bytes]:
+    """Contents of an uncompressed file of at most WHOLE_FILE_MAX_BYTES, or None for anything else"""
+    if os.path.getsize(path) > WHOLE_FILE_MAX_BYTES:
+        return None
+    with open(path, "rb") as f:
+        magic = f.read(2)
+        return magic + f.read() if magic != GZIP_MAGIC else None
+
+
+def _iter_whole_file(path: str, chunk_size: int) -> Iterator[Any]:
+    value = _UNDECODED
+    data = read_whole_file(path)
+    if data is not None:
+        try:
+            value = loads(data)
+        except ValueError:
+            # Several concatenated values, or invalid JSON: the incremental
+            # decoder handles the former and reports where the latter breaks
+            pass
+        del data
+    if value is _UNDECODED:
+        yield from _iter_streamed(path, chunk_size, False)
+    elif isinstance(value, list):
+        yield from value
+    else:
+        yield value
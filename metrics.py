@@ -0,0 +1,293 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PREFIX = "shadow_ai"
+# Upper bounds (seconds) of the HTTP latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _render_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Any:
+        """Upper bound of the bucket holding the q-th quantile ("+Inf" if past the last bucket)"""
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(list(self.buckets) + ["+Inf"], self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return "+Inf"
+
+    def merge(self, other: "_Histogram") -> "_Histogram":
+        """New histogram with the observations of both (same buckets)"""
+        merged = _Histogram(self.buckets)
+        merged.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        merged.sum = self.sum + other.sum
+        merged.count = self.count + other.count
+        return merged
+
+
+class _Stage:
+    __slots__ = ("seconds", "calls")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+
+
+class Metrics:
+    """Counters, latency histograms and exclusive per-stage timers for one run.
+
+    Stage time is exclusive: while a nested stage runs (e.g. a generator
+    pulling from the stage upstream of it) the outer stage's clock is
+    paused, so the stage totals add up to the instrumented wall time.
+    Stage timing keeps per-thread totals and counters/histograms are keyed
+    by the labels exactly as passed, so the hot path does no sorting or
+    string formatting; both are merged when exported.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # Keyed by (name, labels as passed); canonicalized only when exported
+        self.counters: Dict[Tuple[str, tuple], float] = {}
+        self.histograms: Dict[Tuple[str, tuple], _Histogram] = {}
+        # Per-thread stage totals, so timing the hot loops never takes the lock
+        self.thread_stages: List[Dict[str, _Stage]] = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, tuple(labels.items()))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = (name, tuple(labels.items()))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    def _local(self) -> Tuple[List[List[Any]], Dict[str, _Stage]]:
+        try:
+            return self.local.stack, self.local.stages
+        except AttributeError:
+            self.local.stack, self.local.stages = [], {}
+            with self.lock:
+                self.thread_stages.append(self.local.stages)
+            return self.local.stack, self.local.stages
+
+    # Stack frames are [stage totals, start of the current uninterrupted slice]
+
+    def _enter(self, stage: str) -> None:
+        now = time.perf_counter()
+        stack, stages = self._local()
+        if stack:
+            # Pause the enclosing stage
+            outer = stack[-1]
+            outer[0].seconds += now - outer[1]
+        entry = stages.get(stage)
+        if entry is None:
+            entry = stages[stage] = _Stage()
+        stack.append([entry, now])
+
+    def _exit(self) -> None:
+        now = time.perf_counter()
+        stack, _ = self._local()
+        entry, start = stack.pop()
+        entry.seconds += now - start
+        entry.calls += 1
+        if stack:
+            stack[-1][1] = now
+
+    @property
+    def stages(self) -> Dict[str, _Stage]:
+        """Stage totals summed over all threads"""
+        totals: Dict[str, _Stage] = {}
+        with self.lock:
+            for stages in self.thread_stages:
+                for name, entry in list(stages.items()):
+                    total = totals.setdefault(name, _Stage())
+                    total.seconds += entry.seconds
+                    total.calls += entry.calls
+        return totals
+
+    def _merged(self, metrics: Dict[Tuple[str, tuple], Any]) -> List[Tuple[Tuple[str, Labels], Any]]:
+        """Entries keyed by canonical (name, sorted string labels); entries with equal keys are combined"""
+        merged: Dict[Tuple[str, Labels], Any] = {}
+        for (name, labels), value in metrics.items():
+            key = (name, _labels(dict(labels)))
+            if key not in merged:
+                merged[key] = value
+            elif isinstance(value, _Histogram):
+                merged[key] = merged[key].merge(value)
+            else:
+                merged[key] += value
+        return sorted(merged.items(), key=lambda kv: kv[0])
+
+    def stage(self, name: str) -> "_StageContext":
+        """Context manager timing a block as stage `name`"""
+        return _StageContext(self, name)
+
+    def timed(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Pass items through, timing each pull from the source as stage `name`"""
+        iterator = iter(items)
+        # _enter/_exit inlined: this wraps every record of every pipeline stage
+        stack, stages = self._local()
+        entry = stages.get(name)
+        if entry is None:
+            entry = stages[name] = _Stage()
+        clock = time.perf_counter
+        try:
+            while True:
+                now = clock()
+                if stack:
+                    outer = stack[-1]
+                    outer[0].seconds += now - outer[1]
+                frame = [entry, now]
+                stack.append(frame)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    now = clock()
+                    stack.pop()
+                    entry.seconds += now - frame[1]
+                    entry.calls += 1
+                    if stack:
+                        stack[-1][1] = now
+                yield item
+        finally:
+            # Propagate an early close to the source so its cleanup runs now
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def counter(self, name: str, **labels: Any) -> float:
+        wanted = (name, _labels(labels))
+        with self.lock:
+            return sum(v for k, v in self._merged(self.counters) if k == wanted)
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot of everything recorded so far"""
+        stages = self.stages
+        with self.lock:
+            return {
+                "started": self.started,
+                "elapsed_seconds": time.time() - self.started,
+                "stages": {name: {"seconds": s.seconds, "calls": s.calls} for name, s in stages.items()},
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in self._merged(self.counters)],
+                "histograms": [{
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": h.count,
+                    "sum": h.sum,
+                    "p50": h.quantile(0.5),
+                    "p99": h.quantile(0.99),
+                    "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], h.counts))
+                } for (name, labels), h in self._merged(self.histograms)]
+            }
+
+    def prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        stages = sorted(self.stages.items())
+        with self.lock:
+            lines.append(f"# TYPE {PREFIX}_stage_seconds_total counter")
+            for name, s in stages:
+                lines.append(f'{PREFIX}_stage_seconds_total{{stage="{name}"}} {s.seconds}')
+            lines.append(f"# TYPE {PREFIX}_stage_calls_total counter")
+            for name, s in stages:
+                lines.append(f'{PREFIX}_stage_calls_total{{stage="{name}"}} {s.calls}')
+            typed = set()
+            for (name, labels), value in self._merged(self.counters):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {PREFIX}_{name} counter")
+                lines.append(f"{PREFIX}_{name}{_render_labels(labels)} {value}")
+            for (name, labels), h in self._merged(self.histograms):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {PREFIX}_{name} histogram")
+                cumulative = 0
+                for bound, n in zip(list(self.buckets) + ["+Inf"], h.counts):
+                    cumulative += n
+                    lines.append(f"{PREFIX}_{name}_bucket{_render_labels(labels, ('le', str(bound)))} {cumulative}")
+                lines.append(f"{PREFIX}_{name}_sum{_render_labels(labels)} {h.sum}")
+                lines.append(f"{PREFIX}_{name}_count{_render_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Write a JSON summary (.json) or a Prometheus text file (anything else)"""
+        with open(path, "w") as f:
+            if path.endswith(".json"):
+                json.dump(self.summary(), f, indent=2)
+            else:
+                f.write(self.prometheus())
+        logger.info(f"Wrote metrics to {path}")
+
+    def log_summary(self) -> None:
+        """One INFO line per stage and per HTTP endpoint"""
+        summary = self.summary()
+        for name, s in sorted(summary["stages"].items(), key=lambda kv: -kv[1]["seconds"]):
+            logger.info(f"Stage {name}: {s['seconds']:.3f}s over {s['calls']} calls")
+        for h in summary["histograms"]:
+            labels = " ".join(f"{k}={v}" for k, v in h["labels"].items())
+            logger.info(f"{h['name']} {labels}: {h['count']} requests, "
+                        f"mean {h['sum'] / max(h['count'], 1) * 1000:.1f}ms, p50 <= {h['p50']}s, p99 <= {h['p99']}s")
+
+
+class _StageContext:
+    __slots__ = ("metrics", "name")
+
+    def __init__(self, metrics: Metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.metrics._enter(self.name)
+
+    def __exit__(self, *exc) -> None:
+        self.metrics._exit()
+
+
+# Process-wide registry used by the detector, client and uploaders
+METRICS = Metrics()
@@ -0,0 +1,182 @@
+import gzip
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; avoid Nagle/delayed-ACK stalls on reused connections
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+        if self.headers.get("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+        return json.loads(data or b"null")
+
+    def _maybe_fail(self) -> bool:
+        """Simulate a throttled/overloaded API for a fraction of requests"""
+        if self.server.error_rate and self.server.random.random() < self.server.error_rate:
+            self.server.count("ERROR")
+            data = b'{"errors": [{"detail": "service unavailable"}]}'
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return True
+        return False
+
+    def do_POST(self):
+        server = self.server
+        payload = self._read_json()
+        if server.latency:
+            time.sleep(server.latency)
+        if self._maybe_fail():
+            return
+        if self.path.rstrip("/").endswith("/import"):
+            server.count("IMPORT")
+            self._import(payload)
+            return
+        server.count("POST")
+        name = payload.get("name") if isinstance(payload, dict) else None
+        use_case_id = server.create(name, payload.get("custom_fields") if isinstance(payload, dict) else None)
+        if use_case_id is None:
+            self._send(422, {"errors": [{"detail": "name has already been taken"}]})
+        else:
+            self._send(201, {"data": {"id": use_case_id, "name": name}})
+
+    def _import(self, payload: Any) -> None:
+        items = payload.get("data", {}).get("items", []) if isinstance(payload, dict) else []
+        created, errors = [], []
+        for index, item in enumerate(items):
+            name = item.get("name")
+            use_case_id = self.server.create(name, item.get("custom_fields"))
+            if use_case_id is None:
+                created.append({"name": name, "errors": ["name has already been taken"]})
+                errors.append({"detail": "name has already been taken",
+                               "source": {"pointer": f"/data/items/{index}"}})
+            else:
+                created.append({"id": use_case_id, "name": name})
+        self._send(201, {"data": {"items": created}, "errors": errors})
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        server.count("GET")
+        query = parse_qs(urlparse(self.path).query)
+        page = int(query.get("page[number]", ["1"])[0])
+        size = int(query.get("page[size]", ["100"])[0])
+        with server.lock:
+            names = list(server.names.items())[(page - 1) * size:page * size]
+        self._send(200, {"data": [{"id": use_case_id, "name": name} for name, use_case_id in names]})
+
+    def do_PATCH(self):
+        server = self.server
+        self._read_json()
+        if server.latency:
+            time.sleep(server.latency)
+        if self._maybe_fail():
+            return
+        server.count("PATCH")
+        self._send(200, {"data": {}})
+
+    def do_PUT(self):
+        server = self.server
+        payload = self._read_json()
+        if server.latency:
+            time.sleep(server.latency)
+        if self._maybe_fail():
+            return
+        server.count("PUT")
+        parts = urlparse(self.path).path.rstrip("/").split("/")
+        if len(parts) >= 2 and parts[-1] == "custom_fields" and isinstance(payload, dict):
+            with server.lock:
+                server.custom_fields[parts[-2]] = payload.get("custom_fields")
+        self._send(200, {"data": {}})
+
+
+class MockCredoServer(ThreadingHTTPServer):
+    """Local stand-in for the Credo AI use case API, used for benchmarks.
+
+    GET <url>?page[number]=&page[size]= lists existing use cases,
+    POST <url> creates a use case (422 if the name already exists),
+    POST <url>/import creates many at once and reports per-item errors, and
+    PATCH <url>/<id> and PUT <url>/<id>/custom_fields always succeed.
+    Custom fields sent with a create, an import item or a PUT are kept in
+    `custom_fields` by use case id. `latency` adds a fixed
+    server-side delay to every request to mimic a remote API, and
+    `error_rate` makes that fraction of requests fail with 503.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0, seed: int = 0):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.names: Dict[str, str] = {}
+        self.custom_fields: Dict[str, Any] = {}
+        self.requests: Dict[str, int] = {}
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/v2/credoai/use_cases"
+
+    def count(self, method: str) -> None:
+        with self.lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+
+    def create(self, name: str, custom_fields: Any = None) -> Optional[str]:
+        """Register a use case name, returning its new id or None if taken"""
+        with self.lock:
+            if name in self.names:
+                return None
+            use_case_id = uuid.uuid4().hex
+            self.names[name] = use_case_id
+            if custom_fields:
+                self.custom_fields[use_case_id] = custom_fields
+            return use_case_id
+
+    def start(self) -> "MockCredoServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "MockCredoServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,91 @@
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+from credo_client import CredoClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 500
+
+
+class NameIndex:
+    """Local index of use case names already present in Credo AI.
+
+    reserve() hands out a name that is guaranteed not to collide with any
+    known name and records it immediately, so duplicates are resolved before
+    a request is sent. Collisions are renamed deterministically to
+    "<name>_2", "<name>_3", ... (the lowest free suffix), so the same input
+    against the same existing names always yields the same result.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: Set[str] = set(names)
+        self.next_suffix: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def reserve(self, name: str) -> str:
+        """Return a collision-free variant of name and mark it as taken"""
+        with self.lock:
+            candidate = name
+            if candidate in self.names:
+                n = self.next_suffix.get(name, 2)
+                candidate = f"{name}_{n}"
+                while candidate in self.names:
+                    n += 1
+                    candidate = f"{name}_{n}"
+                self.next_suffix[name] = n + 1
+            self.names.add(candidate)
+            return candidate
+
+    def add(self, name: str) -> None:
+        """Record a name that is known to exist remotely"""
+        with self.lock:
+            self.names.add(name)
+
+
+def _item_name(item: Any) -> Optional[str]:
+    if not isinstance(item, dict):
+        return None
+    name = item.get("name")
+    if name is None and isinstance(item.get("attributes"), dict):
+        name = item["attributes"].get("name")
+    return name if isinstance(name, str) else None
+
+
+def iter_remote_names(client: CredoClient, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[str]:
+    """Yield the names of all existing use cases, one page at a time.
+
+    Each listing response is expected to have the use cases under "data".
+    Paging stops on a short page, an empty page, or a page that adds no new
+    names (an API that ignores the paging parameters returns everything on
+    the first call).
+    """
+    seen: Set[str] = set()
+    page = 1
+    while True:
+        response = client.list_use_cases({"page[number]": page, "page[size]": page_size})
+        if response.status_code != 200:
+            raise RuntimeError(f"Listing use cases failed with status {response.status_code}: {response.text}")
+        body = response.json()
+        items = body.get("data") if isinstance(body, dict) else body
+        if isinstance(items, dict):
+            items = items.get("items")
+        if not isinstance(items, list) or not items:
+            return
+        new = 0
+        for item in items:
+            name = _item_name(item)
+            if name is not None and name not in seen:
+                seen.add(name)
+                new += 1
+                yield name
+        if new == 0 or len(items) < page_size:
+            return
+        page += 1
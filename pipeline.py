@@ -0,0 +1,136 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Iterable, Iterator, List, Optional, TypeVar
+
+from metrics import METRICS, Metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_QUEUE_SIZE = 1000
+# Items are handed between threads in lists of this many, so the queue
+# locking and thread switches are paid once per batch rather than per item
+DEFAULT_BATCH_SIZE = 64
+# A partial batch is handed over early when the consumer is idle, but at
+# most this often, so a starving consumer does not cost a switch per item
+FLUSH_SECONDS = 0.002
+_POLL_SECONDS = 0.1
+
+_DONE = object()
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def background(items: Iterable[T], name: str = "stage", queue_size: int = DEFAULT_QUEUE_SIZE,
+               batch_size: int = DEFAULT_BATCH_SIZE, metrics: Optional[Metrics] = None) -> Iterator[T]:
+    """Iterate `items` on a worker thread and yield them here, in order, through a bounded queue.
+
+    At most about queue_size items wait between the two threads, so a
+    producer that gets ahead blocks until the consumer catches up
+    (backpressure) and memory stays bounded. An exception in the producer
+    is re-raised in the consumer after the items produced before it.
+    Closing the returned iterator stops the worker and closes `items`, so
+    upstream cleanup (e.g. finishing an output file) runs before close()
+    returns.
+
+    With metrics, the worker's time is recorded as stage `name`, time it
+    spends blocked on a full queue as "<name>_blocked" and time the
+    consumer spends waiting on an empty one as "<name>_wait", all measured
+    per batch rather than per item.
+    """
+    batch_size = max(1, min(batch_size, queue_size))
+    handoff: "queue.Queue[Any]" = queue.Queue(max(1, queue_size // batch_size))
+    stop = threading.Event()
+    stage = metrics.stage if metrics is not None else _no_stage
+
+    def put(obj: Any) -> bool:
+        with stage(f"{name}_blocked"):
+            while not stop.is_set():
+                try:
+                    handoff.put(obj, timeout=_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    pass
+        return False
+
+    def produce() -> None:
+        iterator = iter(items)
+        clock = time.monotonic
+        batch: List[T] = []
+        try:
+            with stage(name):
+                flushed = clock()
+                for item in iterator:
+                    batch.append(item)
+                    if len(batch) >= batch_size or (clock() - flushed >= FLUSH_SECONDS and not handoff.qsize()):
+                        if not put(batch):
+                            return
+                        batch = []
+                        flushed = clock()
+                if not batch or put(batch):
+                    put(_DONE)
+        except BaseException as e:
+            # Hand over what was read before the failure, then the failure itself
+            if not batch or put(batch):
+                put(_Failure(e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name=f"pipeline-{name}", daemon=True)
+    thread.start()
+    return _consume(handoff, stop, thread, stage, f"{name}_wait")
+
+
+def _no_stage(name: str) -> ContextManager[None]:
+    return nullcontext()
+
+
+def _consume(handoff: "queue.Queue[Any]", stop: threading.Event, thread: threading.Thread,
+             stage: Callable[[str], ContextManager[None]], wait_stage: str) -> Iterator[Any]:
+    try:
+        while True:
+            with stage(wait_stage):
+                batch = handoff.get()
+            if batch is _DONE:
+                return
+            if type(batch) is _Failure:
+                raise batch.error
+            yield from batch
+    finally:
+        stop.set()
+        thread.join()
+
+
+class Pipeline:
+    """Chain of generator stages, each running on its own thread behind a bounded queue.
+
+    stage(name, items) moves `items` onto a worker thread and times it as
+    metrics stage `name` (see background()). Time a stage spends waiting
+    for the one before it is reported as "<upstream>_wait" rather than
+    counted against it, so the slowest stage is the one with the most time
+    of its own. Because stages overlap, stage totals can add up to more
+    than the wall time. With queue_size 0 the stages instead run lazily in
+    the consuming thread, one item at a time, timed per item.
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 metrics: Metrics = METRICS):
+        self.queue_size = max(0, queue_size)
+        self.batch_size = batch_size
+        self.metrics = metrics
+
+    def stage(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        if not self.queue_size:
+            return self.metrics.timed(name, items)
+        return background(items, name, self.queue_size, self.batch_size, self.metrics)
@@ -0,0 +1,257 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, UTC
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Statuses that mean "try again later" rather than "this request is wrong"
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is open and requests are being refused"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Open after `failure_threshold` consecutive failures, probe again after `reset_timeout` seconds.
+
+    While half-open a single probe request is let through; other callers
+    wait for its outcome and then proceed (it succeeded) or are refused
+    (it failed and the circuit re-opened).
+    """
+
+    def __init__(self, failure_threshold: int = 10, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.lock = threading.Lock()
+        self.probe_done = threading.Condition(self.lock)
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self.lock:
+            while True:
+                state = self._state()
+                if state != "half_open":
+                    return state == "closed"
+                if not self.probing:
+                    self.probing = True
+                    return True
+                self.probe_done.wait()
+
+    def _probe_finished(self) -> None:
+        self.probing = False
+        self.probe_done.notify_all()
+
+    def abandon(self) -> None:
+        """Called when an allowed request ended without a success or failure to record,
+        so that a probe cut short lets the next caller probe instead"""
+        with self.lock:
+            self._probe_finished()
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_finished()
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            # A failed probe while half-open re-opens the circuit immediately
+            if self.failures >= self.failure_threshold or self._state() == "half_open":
+                if self._state() != "open":
+                    logger.error(f"Circuit breaker opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+            self._probe_finished()
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that adapts with AIMD to observed latency and errors.
+
+    The limit grows by one per `limit` fast successes (roughly +1 per round
+    trip) and is halved on a throttling/server error or when latency exceeds
+    `latency_target` seconds.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 64, latency_target: float = 2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, overloaded: bool) -> None:
+        with self.cond:
+            self.in_flight -= 1
+            if overloaded or latency > self.latency_target:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.cond.notify_all()
+
+
+def connect_failed(error: Exception) -> bool:
+    """True if a request failed while connecting, so the server never received it"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying failure
+    # (NewConnectionError, including DNS failures, subclasses ConnectTimeoutError)
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, ConnectTimeoutError)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the delay in seconds requested by a Retry-After header, if any"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=UTC)
+    return max(0.0, (when - datetime.now(UTC)).total_seconds())
+
+
+class RequestScheduler:
+    """Shared gatekeeper for every outbound Credo AI API call.
+
+    Each call waits for a rate-limit token and a concurrency slot, and is
+    retried on connection errors, 429 and 5xx responses using jittered
+    exponential backoff (or the server's Retry-After). Consecutive failures
+    trip a circuit breaker so a struggling API is not hammered further.
+
+    Non-idempotent requests (creates and imports) are only retried when the
+    server provably did not process them: the connection could not be made,
+    or it answered 429, or 503 with a Retry-After. After a read timeout or
+    another 5xx the use case may already exist, and a retry would create it
+    twice, so the failure is returned to the caller instead.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: Optional[float] = None, max_retries: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 30.0, max_concurrency: int = 64,
+                 latency_target: float = 2.0, failure_threshold: int = 10, reset_timeout: float = 30.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AdaptiveLimiter(maximum=max_concurrency, latency_target=latency_target)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number `attempt` (0-based), using full jitter"""
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @staticmethod
+    def retryable(response: Optional[requests.Response], error: Optional[Exception], idempotent: bool) -> bool:
+        """Whether a failed attempt may be sent again"""
+        if idempotent:
+            return True
+        if error is not None:
+            return connect_failed(error)
+        return response.status_code == 429 or (
+            response.status_code == 503 and response.headers.get("Retry-After") is not None)
+
+    def request(self, send: Callable[[], requests.Response], idempotent: bool = True) -> requests.Response:
+        """Run send() under rate limiting, retrying transient failures
+        (for a non-idempotent send(), only those it was certainly not processed after)"""
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Credo AI API circuit breaker is open, refusing request")
+
+            self.bucket.acquire()
+            self.limiter.acquire()
+            start = time.monotonic()
+            response = None
+            try:
+                response = send()
+                error = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except BaseException:
+                self.breaker.abandon()
+                raise
+            finally:
+                overloaded = response is None or response.status_code in RETRYABLE_STATUSES
+                self.limiter.release(time.monotonic() - start, overloaded)
+
+            if not overloaded:
+                self.breaker.record_success()
+                return response
+
+            self.breaker.record_failure()
+            if attempt >= self.max_retries or not self.retryable(response, error, idempotent):
+                if error is not None:
+                    raise error
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+            delay = self.backoff(attempt, retry_after)
+            reason = str(error) if error is not None else f"status {response.status_code}"
+            METRICS.inc("http_retries_total", reason=type(error).__name__ if error is not None else response.status_code)
+            logger.warning(f"Request failed ({reason}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
@@ -1,8 +1,18 @@
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 import uuid
 
+from validation_cache import DEFAULT_MAX_ENTRIES, SCHEMA_PATH, ValidationCache, schema_version
+
+# What a cached result was checked against: the schema and these rules
+SCHEMA_VERSION = schema_version(SCHEMA_PATH, __file__)
+
+
+def open_cache(path: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> ValidationCache:
+    """A persistent cache of validate_use_case results (see validation_cache.py)"""
+    return ValidationCache(path, SCHEMA_VERSION, max_entries)
+
 def validate_use_case(use_case: Dict[str, Any]) -> List[str]:
     """Validate a use case against the Credo AI schema"""
     errors = []
@@ -176,12 +186,21 @@ def format_use_case(use_case: Dict[str, Any]) -> Dict[str, Any]:
     
     return formatted
 
-def format_use_cases(use_cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Format multiple use cases to match the Credo AI schema"""
+def format_use_cases(use_cases: List[Dict[str, Any]], cache: Optional[ValidationCache] = None) -> List[Dict[str, Any]]:
+    """Format multiple use cases to match the Credo AI schema.
+
+    With a cache (see open_cache), use cases validated by an earlier run
+    are not validated again. Results are keyed on the input use case: the
+    ids and timestamps format_use_case generates for it differ every run
+    but are always strings, so they cannot change the result.
+    """
     formatted_cases = []
     for use_case in use_cases:
         formatted = format_use_case(use_case)
-        errors = validate_use_case(formatted)
+        if cache is not None:
+            errors = cache.validate(formatted, validate_use_case, source=use_case)
+        else:
+            errors = validate_use_case(formatted)
         if errors:
             print(f"Warning: Use case {formatted['id']} has validation errors: {errors}")
         formatted_cases.append(formatted)
@@ -0,0 +1,100 @@
+import json
+import logging
+import os
+from typing import Any, Callable, IO, List, Union
+
+try:
+    import orjson
+except ImportError:  # optional, the fastest backend
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional, used when orjson is missing
+    msgspec = None
+
+from compact_record import json_default
+
+logger = logging.getLogger(__name__)
+
+# In order of preference for "auto"
+BACKENDS = ("orjson", "msgspec", "json")
+
+
+def available_backends() -> List[str]:
+    return [name for name, module in (("orjson", orjson), ("msgspec", msgspec), ("json", json)) if module is not None]
+
+
+class Serializer:
+    """JSON encoding and decoding over orjson, msgspec or the stdlib json module.
+
+    Every backend lays output out the same way: compact by default, or
+    indented by two spaces with indent=True (the only width orjson
+    supports). Objects the backend cannot encode natively, such as
+    CompactRecords, go through `default`. dumpb() returns UTF-8 bytes, which
+    orjson and msgspec produce directly, so HTTP bodies skip the str ->
+    bytes copy. loads() accepts str or bytes.
+
+    The stdlib backend keeps json.dumps's ASCII escaping and float repr;
+    the others write non-ASCII characters as UTF-8 and e.g. 1e16 rather
+    than 1e+16. All of them decode to the same values.
+    """
+
+    def __init__(self, backend: str = "auto", default: Callable[[Any], Any] = json_default):
+        if backend == "auto":
+            backend = available_backends()[0]
+        if backend not in available_backends():
+            raise ImportError(f"JSON backend {backend!r} is not installed (available: {', '.join(available_backends())})")
+        self.backend = backend
+        self.default = default
+        if backend == "msgspec":
+            self._encoder = msgspec.json.Encoder(enc_hook=default)
+            self._sorted_encoder = msgspec.json.Encoder(enc_hook=default, order="sorted")
+            self._decode = msgspec.json.decode
+
+    def dumpb(self, obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+        """obj as UTF-8 encoded JSON"""
+        if self.backend == "orjson":
+            option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+            try:
+                return orjson.dumps(obj, default=self.default, option=option)
+            except orjson.JSONEncodeError:
+                # e.g. integers beyond 64 bits; the stdlib raises for genuinely unencodable values
+                return self._stdlib(obj, indent, sort_keys).encode("utf-8")
+        if self.backend == "msgspec":
+            data = (self._sorted_encoder if sort_keys else self._encoder).encode(obj)
+            return msgspec.json.format(data, indent=2) if indent else data
+        return self._stdlib(obj, indent, sort_keys).encode("utf-8")
+
+    def dumps(self, obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+        """obj as JSON text"""
+        if self.backend == "json":
+            return self._stdlib(obj, indent, sort_keys)
+        return self.dumpb(obj, indent, sort_keys).decode("utf-8")
+
+    def _stdlib(self, obj: Any, indent: bool, sort_keys: bool) -> str:
+        if indent:
+            return json.dumps(obj, indent=2, sort_keys=sort_keys, default=self.default)
+        return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys, default=self.default)
+
+    def dump(self, obj: Any, f: IO[str], indent: bool = False) -> None:
+        f.write(self.dumps(obj, indent))
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Decode JSON text; invalid input raises ValueError with every backend"""
+        if self.backend == "orjson":
+            return orjson.loads(data)
+        if self.backend == "msgspec":
+            try:
+                return self._decode(data)
+            except msgspec.DecodeError as e:
+                # Same exception type as the other backends
+                raise ValueError(str(e)) from e
+        return json.loads(data)
+
+
+# Shared by every stage; JSON_BACKEND picks orjson, msgspec or json (default: the fastest installed)
+SERIALIZER = Serializer(os.getenv("JSON_BACKEND", "auto").lower())
+dumpb = SERIALIZER.dumpb
+dumps = SERIALIZER.dumps
+loads = SERIALIZER.loads
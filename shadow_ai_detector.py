@@ -1,38 +1,174 @@
-import json
 import logging
-from typing import List, Dict, Any
+from collections import deque
+from typing import List, Dict, Any, Callable, Deque, Iterable, Iterator, Optional, Tuple
 import os
-from datetime import datetime, UTC
-import requests
+import threading
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+from columnar import UseCaseWriter
+from compact_record import compact
+from serialization import dumps
+from metrics import METRICS
+from pipeline import DEFAULT_QUEUE_SIZE, Pipeline
+from log_control import PAYLOAD_LOGGER, LazyJSON, ProgressLogger, configure_logging
+from aggregate import DEFAULT_GROUP_KEY
+from ingest import aggregate_files, expand_sources, iter_gateway_candidates, iter_source_records
+from ingest_state import IngestState
+from async_uploader import AsyncUploader
+from custom_field_queue import CustomFieldQueue, DEFAULT_CONCURRENCY as DEFAULT_CUSTOM_FIELD_CONCURRENCY
+from request_scheduler import RequestScheduler
+from credo_client import CredoClient, DEFAULT_API_URL, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+from upload_journal import UploadJournal
+from fingerprint import content_hash
+from name_index import NameIndex, iter_remote_names
+from sync_store import DEFAULT_KEY_FIELDS, FingerprintStore, sync_key
+from batch_upload import (
+    DEFAULT_MAX_BYTES, DEFAULT_MAX_ITEMS, chunk_use_cases, encode_import_body,
+    import_item_ids, inline_custom_fields, parse_import_failures
+)
+
+# Configure logging (LOG_LEVEL, QUIET, LOG_PAYLOADS, LOG_PAYLOAD_RATE; see README)
+configure_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    quiet=os.getenv("QUIET", "false").lower() == "true",
+    log_payloads=os.getenv("LOG_PAYLOADS", "false").lower() == "true",
+    payload_rate=float(os.getenv("LOG_PAYLOAD_RATE", "1"))
 )
 logger = logging.getLogger(__name__)
+payload_logger = logging.getLogger(PAYLOAD_LOGGER)
+
+# Custom field values assigned to every uploaded use case
+SHADOW_AI_CUSTOM_FIELDS = {
+    "dDWtfWDZAL6fFmMKpppHLE": "ShadowAI"
+}
 
 class UseCaseFormatter:
     def __init__(self):
-        self.output_file = "formatted_use_cases.json"
-        self.api_url = "https://api.credo.ai/api/v2/credoai/use_cases"
+        # "json" (pretty-printed), "ndjson" (compact, one per line) or "parquet" (needs pyarrow)
+        self.output_format = os.getenv("OUTPUT_FORMAT", "json").lower()
+        self.output_file = "formatted_use_cases." + self.output_format
+        self.api_url = os.getenv("CREDO_AI_API_URL", DEFAULT_API_URL)
         self.api_key = os.getenv("CREDO_AI_API_KEY")
         if not self.api_key:
             logger.error("CREDO_AI_API_KEY environment variable not set")
             raise ValueError("CREDO_AI_API_KEY environment variable not set")
+        # Every outbound API call goes through this shared scheduler
+        self.scheduler = RequestScheduler(
+            rate=float(os.getenv("API_RATE_LIMIT", "20")),
+            max_retries=int(os.getenv("API_MAX_RETRIES", "5"))
+        )
+        # Pooled keep-alive client shared by every upload path
+        self.client = CredoClient(
+            self.api_url, self.api_key,
+            pool_size=int(os.getenv("API_POOL_SIZE", DEFAULT_POOL_SIZE)),
+            timeout=float(os.getenv("API_TIMEOUT", DEFAULT_TIMEOUT)),
+            compress=os.getenv("API_COMPRESS", "false").lower() == "true",
+            scheduler=self.scheduler
+        )
+        # "json", "gateway" (raw proxy text logs), "events" (raw gateway JSON events,
+        # aggregated by group_key) or "auto" to pick json/gateway by file extension
+        self.log_format = os.getenv("LOG_FORMAT", "auto").lower()
+        self.group_key = tuple(f.strip() for f in os.getenv("AGGREGATE_KEY", ",".join(DEFAULT_GROUP_KEY)).split(","))
+        # Processes reading LOG_FILE when it is a directory or glob of rotated logs (0 = one per core)
+        self.ingest_workers = int(os.getenv("INGEST_WORKERS", "0")) or None
+        # Upload progress journal used to resume an interrupted run (off unless a path is set)
+        self.journal_path = os.getenv("UPLOAD_JOURNAL", "")
+        self._journal = None
+        # Existing use case names, fetched once per run to avoid 422 round trips
+        self.prefetch_names = os.getenv("PREFETCH_NAMES", "true").lower() == "true"
+        self._name_index = None
+        # Keep formatted use cases as CompactRecords (see compact_record.py) to cut memory
+        # when many are held at once; they are serialized to plain JSON only when sent or saved
+        self.compact_records = os.getenv("COMPACT_RECORDS", "false").lower() == "true"
+        # Save formatted_use_cases.json without indentation when only machines read it
+        self.compact_json = os.getenv("COMPACT_JSON", "false").lower() == "true"
+        # Send custom fields inside the create request when the use case has none of its own;
+        # otherwise they are set by a PUT on a background worker stage of this many threads
+        self.inline_custom_fields = os.getenv("INLINE_CUSTOM_FIELDS", "true").lower() == "true"
+        self.custom_field_concurrency = int(os.getenv("CUSTOM_FIELDS_CONCURRENCY", DEFAULT_CUSTOM_FIELD_CONCURRENCY))
+        self._custom_field_queue = None
+        # Called as on_created(use_case, use_case_id) once a use case exists remotely
+        self.on_created: Optional[Callable[[Dict[str, Any], Optional[str]], None]] = None
+        # Set by iter_sync_changes, which leaves nothing to upload when everything is in sync
+        self.syncing = False
+
+    @property
+    def journal(self) -> Optional[UploadJournal]:
+        """Upload journal, opened on first use so dry runs never touch it"""
+        if self._journal is None and self.journal_path:
+            self._journal = UploadJournal(self.journal_path)
+        return self._journal
+
+    def close_journal(self, completed: bool) -> None:
+        """Close the upload journal; a completed run leaves nothing to resume, so it is cleared"""
+        if self._journal is None:
+            return
+        if completed:
+            self._journal.clear()
+        self._journal.close()
+        self._journal = None
+
+    @property
+    def name_index(self) -> NameIndex:
+        """Index of taken use case names, prefetched from the API on first use"""
+        if self._name_index is None:
+            self._name_index = NameIndex()
+            if self.prefetch_names:
+                self._prefetch_names(self._name_index)
+        return self._name_index
+
+    def _prefetch_names(self, index: NameIndex) -> None:
+        """Load all existing use case names into the index in bulk"""
+        try:
+            for name in iter_remote_names(self.client):
+                index.add(name)
+            logger.info(f"Prefetched {len(index)} existing use case names")
+        except Exception as e:
+            # Conflicts are still caught by the 422 fallback, just less cheaply
+            logger.warning(f"Could not prefetch existing use case names: {e}")
 
     def read_logs(self, log_file: str) -> List[Dict[str, Any]]:
         """Read AI use case logs from JSON file"""
         try:
-            logger.info(f"Reading from input file: {log_file}")
-            with open(log_file, 'r') as f:
-                data = json.load(f)
+            data = list(self.iter_logs(log_file))
             logger.info(f"Read {len(data)} use cases from input file")
             return data
         except Exception as e:
             logger.error(f"Error reading log file: {e}")
             return []
 
+    def iter_logs(self, log_file: str, state: Optional[IngestState] = None) -> Iterator[Dict[str, Any]]:
+        """Lazily yield AI use case logs from a JSON array or NDJSON file (optionally gzipped).
+
+        log_file may also be a directory or glob pattern, whose files are
+        read in path order. Raw gateway text logs are parsed into one use
+        case candidate per distinct provider and model; raw gateway JSON
+        events are aggregated into one use case per distinct group key.
+        Both are sharded across INGEST_WORKERS processes when there are
+        several files. With an ingestion state only what was added since
+        its last commit is read (see ingest_state.py); aggregated events then
+        yield only the use cases that changed, with their running totals.
+        """
+        logger.info(f"Reading from input file: {log_file}")
+        files = expand_sources(log_file)
+        if not files:
+            raise FileNotFoundError(f"No log files match {log_file}")
+        log_format = self.log_format
+        if log_format == "auto":
+            log_format = "gateway" if files[0].endswith((".log", ".log.gz")) else "json"
+        sources = state.plan(files) if state is not None else files
+        watermark = state.seen if state is not None else None
+        if log_format == "gateway":
+            yield from iter_gateway_candidates(sources, self.ingest_workers)
+        elif log_format == "events":
+            aggregator = aggregate_files(sources, self.group_key, self.ingest_workers, watermark=watermark)
+            if state is not None:
+                aggregator = state.aggregate(aggregator)
+            logger.info(f"Aggregated {aggregator.events} events into {len(aggregator)} use cases "
+                        f"by {', '.join(self.group_key)}")
+            yield from aggregator.iter_use_cases()
+        else:
+            yield from iter_source_records(sources, watermark)
+
     def format_use_case(self, use_case):
         """Format a use case according to the schema."""
         formatted = {
@@ -50,28 +186,95 @@ class UseCaseFormatter:
 
     def format_use_cases(self, logs: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Format all log entries to match Credo AI schema exactly"""
-        formatted_cases = [self.format_use_case(log) for log in logs]
+        formatted_cases = list(self.iter_formatted_use_cases(logs))
         # Try a different payload structure
         return {
             "use_cases": formatted_cases
         }
 
+    def iter_formatted_use_cases(self, logs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Lazily format log entries one at a time"""
+        if self.compact_records:
+            for log in logs:
+                yield compact(self.format_use_case(log))
+        else:
+            for log in logs:
+                yield self.format_use_case(log)
+
     def save_formatted_cases(self, formatted_data: Dict[str, Any]) -> bool:
         """Save formatted use cases to a JSON file"""
         try:
             logger.info(f"Saving to output file: {self.output_file}")
-            # Print the formatted JSON for debugging
-            logger.info("Generated JSON:")
-            logger.info(json.dumps(formatted_data, indent=2))
+            # Only serialized for the log if payload logging is enabled
+            payload_logger.debug("Generated JSON:\n%s", LazyJSON(formatted_data))
             
-            with open(self.output_file, 'w') as f:
-                json.dump(formatted_data, f, indent=2)
+            with open(self.output_file, 'w', encoding='utf-8') as f:
+                f.write(dumps(formatted_data, indent=not self.compact_json))
             logger.info(f"Successfully saved {len(formatted_data['use_cases'])} formatted use cases to {self.output_file}")
             return True
         except Exception as e:
             logger.error(f"Error saving formatted use cases: {e}")
             return False
 
+    def save_formatted_stream(self, use_cases: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Write use cases to the output file as they pass through, yielding each one downstream.
+
+        They go to a temporary file that replaces the output file only once
+        the input was read to the end and held at least one use case, so a
+        missing, empty or unreadable input leaves the previous output as it was.
+        """
+        logger.info(f"Streaming to output file: {self.output_file}")
+        tmp_path = f"{self.output_file}.tmp"
+        save = self._save_json_stream if self.output_format == "json" else self._save_columnar_stream
+        stream = save(tmp_path, use_cases)
+        count = 0
+        complete = False
+        try:
+            for use_case in stream:
+                count += 1
+                yield use_case
+            complete = True
+        finally:
+            stream.close()
+            if complete and count:
+                os.replace(tmp_path, self.output_file)
+                logger.info(f"Saved {count} formatted use cases to {self.output_file}")
+            else:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                reason = "no use cases were read" if complete else "the input was not read to the end"
+                logger.warning(f"{self.output_file} left unchanged: {reason}")
+
+    def _save_json_stream(self, path: str, use_cases: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Write {"use_cases": [...]} indented like json.dump(..., indent=2), or without
+        any whitespace with COMPACT_JSON, one use case at a time"""
+        with open(path, 'w', encoding='utf-8') as f:
+            if self.compact_json:
+                f.write('{"use_cases":[')
+                for i, use_case in enumerate(use_cases):
+                    if i:
+                        f.write(",")
+                    f.write(dumps(use_case))
+                    yield use_case
+                f.write("]}\n")
+                return
+            f.write('{\n  "use_cases": [')
+            for i, use_case in enumerate(use_cases):
+                f.write(",\n    " if i else "\n    ")
+                # JSON strings never contain a raw newline, so this only re-indents lines
+                f.write(dumps(use_case, indent=True).replace("\n", "\n    "))
+                yield use_case
+            f.write("\n  ]\n}\n")
+
+    def _save_columnar_stream(self, path: str, use_cases: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        writer = UseCaseWriter(path, self.output_format)
+        try:
+            for use_case in use_cases:
+                writer.write(use_case)
+                yield use_case
+        finally:
+            writer.close()
+
     def validate_use_cases(self, formatted_data: Dict[str, Any]) -> bool:
         """Validate the formatted use cases before sending to API"""
         try:
@@ -86,149 +289,441 @@ class UseCaseFormatter:
                     logger.error(f"Use case {i} has an empty name")
                     return False
                 
-                # Log the name for debugging
-                logger.info(f"Validating use case {i} name: {repr(name)}")
+                logger.debug("Validating use case %d name: %r", i, name)
             
             return True
         except Exception as e:
             logger.error(f"Error validating use cases: {str(e)}")
             return False
 
+    def iter_valid_use_cases(self, use_cases: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Pass through use cases that can be uploaded, logging and dropping the rest"""
+        for i, use_case in enumerate(use_cases, 1):
+            name = use_case.get("name")
+            if not isinstance(name, str) or not name.strip():
+                METRICS.inc("invalid_use_cases_total")
+                logger.error(f"Use case {i} has an empty name, skipping it")
+                continue
+            yield use_case
+
+    def iter_pipeline(self, log_file: str, queue_size: int = DEFAULT_QUEUE_SIZE,
+                      store: Optional[FingerprintStore] = None,
+                      key_fields: Tuple[str, ...] = DEFAULT_KEY_FIELDS,
+                      ingest_state: Optional[IngestState] = None) -> Iterator[Dict[str, Any]]:
+        """Read -> format -> validate -> save (-> sync against store) as a staged pipeline.
+
+        Each stage runs on its own thread with at most about queue_size use
+        cases queued after it (see pipeline.py), so reading and formatting
+        overlap with the upload that consumes the returned iterator while
+        memory stays bounded. queue_size 0 runs every stage lazily in the
+        consuming thread instead.
+        """
+        pipeline = Pipeline(queue_size)
+        logs = pipeline.stage("read", self.iter_logs(log_file, ingest_state))
+        formatted = pipeline.stage("format", self.iter_formatted_use_cases(logs))
+        valid = pipeline.stage("validate", self.iter_valid_use_cases(formatted))
+        use_cases = pipeline.stage("save", self.save_formatted_stream(valid))
+        if store is not None:
+            # Only send the delta since the previous sync
+            use_cases = pipeline.stage("sync", self.iter_sync_changes(use_cases, store, key_fields))
+        return use_cases
+
     def _set_custom_fields(self, use_case_id: str) -> bool:
         """Set custom fields for a use case after creation"""
         try:
-            url = f"{self.api_url}/{use_case_id}/custom_fields"
-            headers = {
-                "Authorization": self.api_key,
-                "Content-Type": "application/json"
-            }
+            logger.debug("Setting custom fields for use case %s", use_case_id)
+            payload_logger.debug("Custom fields payload: %s", LazyJSON({"custom_fields": SHADOW_AI_CUSTOM_FIELDS}))
             
-            # Prepare the payload
-            payload = {
-                "custom_fields": {
-                    "dDWtfWDZAL6fFmMKpppHLE": "ShadowAI"
-                }
-            }
+            response = self.client.set_custom_fields(use_case_id, SHADOW_AI_CUSTOM_FIELDS)
             
-            logging.info(f"Setting custom fields for use case {use_case_id}")
-            logging.info(f"Custom fields payload: {json.dumps(payload, indent=2)}")
-            
-            response = requests.put(url, headers=headers, json=payload)
-            
-            logging.info(f"Custom fields response status: {response.status_code}")
-            logging.info(f"Custom fields response: {response.text}")
+            logger.debug("Custom fields response status: %d", response.status_code)
+            payload_logger.debug("Custom fields response: %s", LazyJSON(response.text, limit=2000))
             
             return response.status_code in [200, 201]
         except Exception as e:
-            logging.error(f"Error setting custom fields: {str(e)}")
+            logger.error(f"Error setting custom fields: {str(e)}")
             return False
 
-    def upload_use_cases(self):
-        """Upload use cases to Credo AI."""
-        if not self.formatted_use_cases:
-            logging.error("No formatted use cases to upload")
-            return
+    @property
+    def custom_field_queue(self) -> CustomFieldQueue:
+        if self._custom_field_queue is None:
+            self._custom_field_queue = CustomFieldQueue(self._set_custom_fields, self.custom_field_concurrency,
+                                                        self.journal)
+        return self._custom_field_queue
 
-        logging.info(f"Using API URL: {self.api_url}")
-        logging.info(f"Using API key: {self.api_key[:3]}...")
+    def _finish_custom_fields(self) -> None:
+        """Wait for custom field PUTs still queued by the last upload"""
+        if self._custom_field_queue is not None:
+            self._custom_field_queue.close()
+            self._custom_field_queue = None
+
+    def _create_payload(self, use_case: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Copy of use_case to POST, and whether its custom fields still need a PUT afterwards"""
+        if self.inline_custom_fields:
+            item = inline_custom_fields(use_case, SHADOW_AI_CUSTOM_FIELDS)
+            if item is not use_case:
+                return item, False
+        return use_case.copy(), bool(SHADOW_AI_CUSTOM_FIELDS)
+
+    def _created(self, use_case: Dict[str, Any], use_case_id: Optional[str]) -> None:
+        if self.on_created:
+            self.on_created(use_case, use_case_id)
+
+    def _update_one(self, i: int, use_case_id: str, use_case: Dict[str, Any]) -> bool:
+        """Update an existing use case in place (its remote name is left unchanged)"""
+        try:
+            payload = {k: v for k, v in use_case.items() if k != "name"}
+            encoded_data = self.client.encode(payload)
+            logger.debug("Updating use case %d (%s)", i, use_case_id)
+            response = self.client.update_use_case(use_case_id, encoded_data)
+            if response.status_code in [200, 201, 204]:
+                return True
+            logger.error(f"Failed to update use case {use_case_id}: {response.status_code} {response.text}")
+            return False
+        except Exception as e:
+            logger.error(f"Error updating use case {use_case_id}: {str(e)}")
+            return False
+
+    def _upload_one(self, i: int, use_case: Dict[str, Any], name: Optional[str] = None,
+                    key: Optional[str] = None) -> bool:
+        """Create a single use case via the per-item endpoint and set its custom fields.
+
+        Custom fields are inlined into the create request when possible,
+        otherwise queued on custom_field_queue. name is a name already
+        reserved in the name index; if omitted, one is reserved from the use
+        case's own name. key is the use case's journal key, if the caller
+        already took one.
+        """
+        journal = self.journal
+        if journal and key is None:
+            key = journal.key(use_case)
+        entry = journal.get(key) if journal else None
+        if entry and entry[1]:
+            logger.debug("Skipping use case %d, already uploaded as %s", i, entry[0])
+            METRICS.inc("uploads_total", result="skipped")
+            self._created(use_case, entry[0])
+            return True
+        if entry and entry[0]:
+            logger.debug("Use case %d already created as %s, resuming at custom fields", i, entry[0])
+            METRICS.inc("uploads_total", result="resumed")
+            self.custom_field_queue.submit(key, entry[0])
+            self._created(use_case, entry[0])
+            return True
+
+        payload, needs_custom_fields = self._create_payload(use_case)
 
-        for i, use_case in enumerate(self.formatted_use_cases["use_cases"], 1):
-            logging.info(f"Uploading use case {i} of {len(self.formatted_use_cases['use_cases'])}")
+        try:
+            payload["name"] = name or self.name_index.reserve(use_case["name"])
+            response = self._create(i, payload)
             
-            payload = use_case.copy()
+            if response.status_code == 422 and "name has already been taken" in response.text:
+                # Only happens if the name was created after the index was prefetched
+                METRICS.inc("name_conflicts_total")
+                payload["name"] = self.name_index.reserve(use_case["name"])
+                logger.info(f"Name already taken, trying {payload['name']!r}...")
+                response = self._create(i, payload)
             
-            try:
-                name = use_case["name"]
-                logging.info(f"Raw data before encoding:")
-                logging.info(json.dumps(payload, indent=2))
-                
-                encoded_data = json.dumps(payload).encode('utf-8')
-                logging.info(f"Encoded data (first 100 chars):")
-                logging.info(encoded_data[:100])
-                
-                logging.info(f"Uploading use case with name: {name}")
-                
-                headers = {
-                    'Authorization': self.api_key,
-                    'Content-Type': 'application/json'
-                }
-                
-                response = requests.post(self.api_url, data=encoded_data, headers=headers)
-                
-                logging.info(f"Response status code: {response.status_code}")
-                logging.info(f"Response headers: {response.headers}")
-                logging.info(f"Response body: {response.text}")
-                
-                if response.status_code == 422 and "name has already been taken" in response.text:
-                    logging.info("Name already taken, trying with timestamp...")
-                    timestamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
-                    payload["name"] = f"{name}_{timestamp}"
-                    
-                    logging.info(f"Raw data before encoding:")
-                    logging.info(json.dumps(payload, indent=2))
-                    
-                    encoded_data = json.dumps(payload).encode('utf-8')
-                    logging.info(f"Encoded data (first 100 chars):")
-                    logging.info(encoded_data[:100])
-                    
-                    logging.info(f"Uploading use case with name: {payload['name']}")
-                    
-                    response = requests.post(self.api_url, data=encoded_data, headers=headers)
-                    
-                    logging.info(f"Response status code: {response.status_code}")
-                    logging.info(f"Response headers: {response.headers}")
-                    logging.info(f"Response body: {response.text}")
+            if response.status_code in [200, 201]:
+                response_data = response.json()
+                use_case_id = response_data.get("data", {}).get("id")
+                logger.debug("Uploaded use case %d as %s", i, use_case_id)
+                METRICS.inc("uploads_total", result="created")
+                needs_custom_fields = bool(use_case_id and needs_custom_fields)
+                if journal:
+                    journal.record(key, use_case_id, not needs_custom_fields)
+                self._created(use_case, use_case_id)
+                if needs_custom_fields:
+                    # Set by the worker stage while the next use case is created
+                    self.custom_field_queue.submit(key, use_case_id)
+                return True
+            else:
+                METRICS.inc("uploads_total", result="failed")
+                logger.error(f"Failed to upload use case {i}: {response.status_code} {response.text}")
+                return False
                 
-                if response.status_code in [200, 201]:
-                    logging.info(f"Successfully uploaded use case {i}")
-                    response_data = response.json()
-                    use_case_id = response_data.get("data", {}).get("id")
-                    logging.info(f"Created use case ID: {use_case_id}")
-                    
-                    # Set custom fields after successful creation
-                    if use_case_id:
-                        if self._set_custom_fields(use_case_id):
-                            logging.info(f"Successfully set custom fields for use case {use_case_id}")
-                        else:
-                            logging.error(f"Failed to set custom fields for use case {use_case_id}")
-                else:
-                    logging.error(f"Failed to upload use case {i}")
-                    logging.error(f"Status code: {response.status_code}")
-                    logging.error(f"Response: {response.text}")
-                    
-            except Exception as e:
-                logging.error(f"Error uploading use case {i}: {str(e)}")
-                continue
-        
+        except Exception as e:
+            METRICS.inc("uploads_total", result="failed")
+            logger.error(f"Error uploading use case {i}: {str(e)}")
+            return False
+
+    def _create(self, i: int, payload: Dict[str, Any]):
+        """POST one use case, logging the payload and response only if payload logging is on"""
+        logger.debug("Uploading use case %d with name: %s", i, payload["name"])
+        payload_logger.debug("Use case %d payload:\n%s", i, LazyJSON(payload))
+        response = self.client.create_use_case(self.client.encode(payload))
+        logger.debug("Use case %d response status code: %d", i, response.status_code)
+        payload_logger.debug("Use case %d response headers: %s, body: %s", i, response.headers,
+                             LazyJSON(response.text, limit=2000))
+        return response
+
+    def upload_use_cases(self, use_cases: Optional[Iterable[Dict[str, Any]]] = None):
+        """Upload use cases to Credo AI.
+
+        use_cases may be any iterable (including a generator); it defaults to
+        the use cases in self.formatted_use_cases.
+        """
+        if use_cases is None:
+            if not getattr(self, "formatted_use_cases", None):
+                logging.error("No formatted use cases to upload")
+                return
+            use_cases = self.formatted_use_cases["use_cases"]
+
+        logging.info(f"Using API URL: {self.api_url}")
+        logging.info(f"Using API key: {self.api_key[:3]}...")
+
+        progress = ProgressLogger(logger, "Upload")
+        i = 0
+        try:
+            for i, use_case in enumerate(use_cases, 1):
+                progress.update(self._upload_one(i, use_case))
+        finally:
+            self._finish_custom_fields()
+
+        if i == 0:
+            if self.syncing:
+                logging.info("No new use cases to upload, everything else is in sync")
+            else:
+                logging.error("No formatted use cases to upload")
+            return
+
         logging.info("Successfully processed use cases")
 
+    def upload_use_cases_async(self, use_cases: Iterable[Dict[str, Any]], concurrency: int = 16) -> Dict[str, Any]:
+        """Upload use cases concurrently over a pooled keep-alive session"""
+        logging.info(f"Using API URL: {self.api_url}")
+        logging.info(f"Uploading with concurrency {concurrency}")
+        uploader = AsyncUploader(self.client, concurrency=concurrency,
+                                 custom_fields=SHADOW_AI_CUSTOM_FIELDS,
+                                 journal=self.journal, name_index=lambda: self.name_index,
+                                 on_created=self.on_created, inline_custom_fields=self.inline_custom_fields,
+                                 custom_field_concurrency=self.custom_field_concurrency)
+        stats = uploader.run(use_cases)
+        logging.info(f"Uploaded {stats['uploaded']} use cases ({stats['failed']} failed) "
+                     f"in {stats['elapsed']:.2f}s, {stats['items_per_sec']:.1f} items/sec")
+        return stats
+
+    def upload_use_cases_batch(self, use_cases: Iterable[Dict[str, Any]],
+                               max_items: int = DEFAULT_MAX_ITEMS,
+                               max_bytes: int = DEFAULT_MAX_BYTES) -> Dict[str, int]:
+        """Upload use cases in chunks through the import endpoint.
+
+        Items that fail inside an import (or whose whole chunk is rejected)
+        fall back to the per-item upload path.
+        """
+        url = f"{self.api_url}/import"
+        stats = {"chunks": 0, "imported": 0, "skipped": 0, "fallback": 0, "failed": 0}
+        logging.info(f"Using import URL: {url} (max {max_items} items / {max_bytes} bytes per chunk)")
+
+        journal = self.journal
+
+        def prepare(use_case):
+            item = inline_custom_fields(use_case, SHADOW_AI_CUSTOM_FIELDS)
+            if item is use_case:
+                item = dict(use_case)
+            item["name"] = self.name_index.reserve(use_case["name"])
+            return item
+
+        # Journal keys of the items yielded by not_yet_created, in order
+        keys: Deque[Optional[str]] = deque()
+
+        def not_yet_created(items):
+            """Drop items the journal has seen; finish any left half-done by a previous run"""
+            for use_case in items:
+                key = journal.key(use_case) if journal else None
+                entry = journal.get(key) if journal else None
+                if entry is None:
+                    keys.append(key)
+                    yield use_case
+                elif not entry[1]:
+                    self._upload_one(0, use_case, key=key)
+                else:
+                    stats["skipped"] += 1
+                    self._created(use_case, entry[0])
+
+        try:
+            for chunk in chunk_use_cases(not_yet_created(use_cases), max_items, max_bytes, prepare):
+                stats["chunks"] += 1
+                first, last = chunk[0][0], chunk[-1][0]
+                chunk_keys = [keys.popleft() for _ in chunk]
+                try:
+                    body = encode_import_body(chunk)
+                    response = self.client.import_use_cases(body)
+                    logging.info(f"Import of use cases {first}-{last} returned {response.status_code}")
+                    if response.status_code in [200, 201]:
+                        response_data = response.json()
+                        failures = parse_import_failures(response_data, len(chunk))
+                        ids = import_item_ids(response_data, len(chunk))
+                        for pos, (_, use_case, _, _) in enumerate(chunk):
+                            if pos not in failures:
+                                # Custom fields were inlined unless the use case brought its own
+                                needs_custom_fields = bool(ids[pos] and "custom_fields" in use_case
+                                                           and SHADOW_AI_CUSTOM_FIELDS)
+                                key = chunk_keys[pos]
+                                if journal:
+                                    journal.record(key, ids[pos], not needs_custom_fields)
+                                self._created(use_case, ids[pos])
+                                if needs_custom_fields:
+                                    self.custom_field_queue.submit(key, ids[pos])
+                    else:
+                        logging.error(f"Import of use cases {first}-{last} failed: {response.text}")
+                        failures = {pos: f"import returned {response.status_code}" for pos in range(len(chunk))}
+                except Exception as e:
+                    logging.error(f"Error importing use cases {first}-{last}: {str(e)}")
+                    failures = {pos: str(e) for pos in range(len(chunk))}
+
+                stats["imported"] += len(chunk) - len(failures)
+                METRICS.inc("uploads_total", len(chunk) - len(failures), result="imported")
+                for pos in sorted(failures):
+                    i, use_case, item, _ = chunk[pos]
+                    logging.warning(f"Use case {i} failed in import ({failures[pos]}), falling back to per-item upload")
+                    if self._upload_one(i, use_case, name=item["name"], key=chunk_keys[pos]):
+                        stats["fallback"] += 1
+                    else:
+                        stats["failed"] += 1
+        finally:
+            self._finish_custom_fields()
+
+        logging.info(f"Imported {stats['imported']} use cases in {stats['chunks']} requests, "
+                     f"{stats['skipped']} already uploaded, {stats['fallback']} via per-item fallback, "
+                     f"{stats['failed']} failed")
+        return stats
+
+    def iter_sync_changes(self, use_cases: Iterable[Dict[str, Any]], store: FingerprintStore,
+                          key_fields: Tuple[str, ...] = DEFAULT_KEY_FIELDS) -> Iterator[Dict[str, Any]]:
+        """Incremental sync filter: yield only use cases that do not exist yet.
+
+        Unchanged use cases (same fingerprint as last sync) are dropped and
+        changed ones are updated in place. Use cases yielded here should be
+        passed to one of the upload methods; their fingerprints are recorded
+        through on_created once they exist remotely.
+        """
+        # Keys of yielded use cases not created yet, by their occurrence-0 key: [(fingerprint, key)]
+        pending: Dict[str, List[Tuple[str, str]]] = {}
+        lock = threading.Lock()
+
+        def record(use_case, use_case_id):
+            fingerprint = content_hash(use_case)
+            base = sync_key(use_case, key_fields)
+            with lock:
+                waiting = pending.get(base)
+                if waiting:
+                    # Duplicates may be created out of order; match them up by content
+                    pos = next((n for n, (fp, _) in enumerate(waiting) if fp == fingerprint), 0)
+                    key = waiting.pop(pos)[1]
+                else:
+                    key = base
+            store.record(key, fingerprint, use_case_id)
+
+        # Installed eagerly so uploaders that capture the hook up front see it
+        self.on_created = record
+        self.syncing = True
+
+        def changes():
+            stats = {"new": 0, "updated": 0, "unchanged": 0, "failed": 0}
+            occurrences: Dict[str, int] = {}
+            for i, use_case in enumerate(use_cases, 1):
+                base = sync_key(use_case, key_fields)
+                occurrence = occurrences.get(base, 0)
+                occurrences[base] = occurrence + 1
+                key = sync_key(use_case, key_fields, occurrence) if occurrence else base
+                fingerprint = content_hash(use_case)
+                entry = store.get(key)
+                if entry is None or not entry[1]:
+                    stats["new"] += 1
+                    with lock:
+                        pending.setdefault(base, []).append((fingerprint, key))
+                    yield use_case
+                elif entry[0] == fingerprint:
+                    stats["unchanged"] += 1
+                elif self._update_one(i, entry[1], use_case):
+                    stats["updated"] += 1
+                    store.record(key, fingerprint, entry[1])
+                else:
+                    stats["failed"] += 1
+            for result, n in stats.items():
+                METRICS.inc("sync_total", n, result=result)
+            logging.info(f"Sync: {stats['new']} new, {stats['updated']} updated, "
+                         f"{stats['unchanged']} unchanged, {stats['failed']} failed updates")
+
+        return changes()
+
 def main():
     # Get input file from environment variable or use default
     log_file = os.getenv("LOG_FILE", "ai_logs.json")
     dry_run = os.getenv("DRY_RUN", "true").lower() == "true"
+    concurrency = int(os.getenv("UPLOAD_CONCURRENCY", "1"))
+    upload_mode = os.getenv("UPLOAD_MODE", "item").lower()
+    sync = os.getenv("SYNC", "false").lower() == "true"
 
     # Initialize formatter
     formatter = UseCaseFormatter()
-
-    # Read and process logs
-    logs = formatter.read_logs(log_file)
-    if not logs:
-        logger.error("No logs found or error reading logs")
+    ingest_state_path = os.getenv("INGEST_STATE", "")
+    if ingest_state_path and formatter.log_format == "events" and not sync and not dry_run:
+        # New events change the totals of use cases created by earlier runs,
+        # which only sync updates in place; uploading would duplicate them
+        logger.error("INGEST_STATE with LOG_FORMAT=events requires SYNC=true")
         return
 
-    # Format use cases
-    formatted_data = formatter.format_use_cases(logs)
-    
-    # Save formatted cases to file
-    success = formatter.save_formatted_cases(formatted_data)
-    if not success:
-        logger.error("Failed to save formatted use cases")
-        return
+    store = None
+    key_fields = DEFAULT_KEY_FIELDS
+    if sync and not dry_run:
+        store = FingerprintStore(os.getenv("SYNC_STORE", "sync_state.jsonl"))
+        key_fields = tuple(f.strip() for f in os.getenv("SYNC_KEY_FIELDS", ",".join(DEFAULT_KEY_FIELDS)).split(","))
+
+    # Only read what was appended since the last successful run (see ingest_state.py)
+    ingest_state = IngestState(ingest_state_path) if ingest_state_path else None
+    failures_before = METRICS.counter("uploads_total", result="failed") + METRICS.counter("custom_field_failures_total")
+    completed = False
 
-    # Upload to API if not in dry run mode
-    if not dry_run:
-        formatter.formatted_use_cases = formatted_data
-        formatter.upload_use_cases()
+    # Read, format, validate and save on overlapping pipeline stages with bounded
+    # queues between them, so memory stays flat while the upload below runs.
+    # A dry run has no upload to overlap with, so it runs the stages in this thread.
+    queue_size = int(os.getenv("PIPELINE_QUEUE_SIZE", 0 if dry_run else DEFAULT_QUEUE_SIZE))
+    use_cases = formatter.iter_pipeline(log_file, queue_size, store, key_fields, ingest_state)
+
+    try:
+        with METRICS.stage("drain" if dry_run else "upload"):
+            # Upload to API if not in dry run mode
+            if not dry_run and upload_mode == "batch":
+                formatter.upload_use_cases_batch(
+                    use_cases,
+                    max_items=int(os.getenv("BATCH_MAX_ITEMS", DEFAULT_MAX_ITEMS)),
+                    max_bytes=int(os.getenv("BATCH_MAX_BYTES", DEFAULT_MAX_BYTES))
+                )
+            elif not dry_run and concurrency > 1:
+                formatter.upload_use_cases_async(use_cases, concurrency=concurrency)
+            elif not dry_run:
+                formatter.upload_use_cases(use_cases)
+            elif sum(1 for _ in use_cases) == 0 and ingest_state is None:
+                logger.error("No logs found or error reading logs")
+                return
+        failures = (METRICS.counter("uploads_total", result="failed")
+                    + METRICS.counter("custom_field_failures_total") - failures_before)
+        # Nothing is left to resume once every use case was uploaded
+        completed = not dry_run and not failures
+        if ingest_state is not None:
+            if dry_run:
+                logger.info("Dry run: ingestion state not advanced")
+            elif failures:
+                logger.warning(f"{failures:.0f} uploads failed: ingestion state not advanced, "
+                               f"the same input will be read again next run")
+            else:
+                ingest_state.commit()
+    except Exception as e:
+        logger.error(f"Error processing logs: {e}")
+        return
+    finally:
+        # Stop any stage still running (e.g. after an upload error) before closing what it writes to
+        use_cases.close()
+        if store is not None:
+            store.close()
+        if ingest_state is not None:
+            ingest_state.close()
+        formatter.close_journal(completed)
+        METRICS.log_summary()
+        metrics_file = os.getenv("METRICS_FILE")
+        if metrics_file:
+            METRICS.write(metrics_file)
 
     logger.info("Successfully processed use cases")
 
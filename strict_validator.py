@@ -1,18 +1,41 @@
-import json
 import logging
-from typing import Dict, Any, List
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+from log_stream import iter_records
+from serialization import loads
+from validation_cache import DEFAULT_MAX_ENTRIES, SCHEMA_PATH, ValidationCache, schema_version
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# What a cached result was checked against: the schema and these rules
+SCHEMA_VERSION = schema_version(SCHEMA_PATH, __file__)
+
+
 class StrictValidator:
-    def __init__(self):
+    def __init__(self, cache: Optional[ValidationCache] = None):
         self.errors = []
+        self.cache = cache
         
     def validate_use_case(self, use_case: Dict[str, Any]) -> bool:
         """Validate a single use case against the schema"""
+        if self.cache is not None:
+            self.errors = self.cache.validate(use_case, self._errors)
+        else:
+            self._check(use_case)
+        return len(self.errors) == 0
+
+    def _errors(self, use_case: Dict[str, Any]) -> List[str]:
+        self._check(use_case)
+        return self.errors
+
+    def _check(self, use_case: Dict[str, Any]) -> None:
         self.errors = []
         
         # Required fields
@@ -65,8 +88,6 @@ class StrictValidator:
         extra_fields = set(use_case.keys()) - allowed_fields
         if extra_fields:
             self.errors.append(f"Extra fields not allowed: {extra_fields}")
-        
-        return len(self.errors) == 0
     
     def _validate_custom_field(self, cf: Dict[str, Any]) -> None:
         """Validate a custom field"""
@@ -167,16 +188,21 @@ class StrictValidator:
         if extra_fields:
             self.errors.append(f"Question has extra fields not allowed: {extra_fields}")
 
-def validate_file(input_file: str) -> None:
-    """Validate a JSON file against the schema"""
+def open_cache(path: Optional[str], max_entries: int = DEFAULT_MAX_ENTRIES) -> Optional[ValidationCache]:
+    """The StrictValidator result cache at path, or None without a path"""
+    return ValidationCache(path, SCHEMA_VERSION, max_entries) if path else None
+
+
+def validate_file(input_file: str, cache_path: Optional[str] = None,
+                  cache_size: int = DEFAULT_MAX_ENTRIES) -> None:
+    """Validate a JSON file against the schema, reusing results cached at cache_path"""
+    cache = None
     try:
-        with open(input_file, 'r') as f:
-            data = json.load(f)
+        cache = open_cache(cache_path, cache_size)
+        validator = StrictValidator(cache)
         
-        validator = StrictValidator()
-        
-        # Handle both single use case and array of use cases
-        use_cases = data if isinstance(data, list) else [data]
+        # Handles a single use case, an array of use cases, NDJSON and parquet
+        use_cases = iter_records(input_file)
         
         for i, use_case in enumerate(use_cases):
             logger.info(f"\nValidating use case {i+1}:")
@@ -189,10 +215,169 @@ def validate_file(input_file: str) -> None:
     
     except Exception as e:
         logger.error(f"Error validating file: {e}")
+    finally:
+        if cache is not None:
+            cache.close()
+
+def error_type(message: str) -> str:
+    """Collapse an error message to its type by dropping the offending values"""
+    message = message.split(". Expected", 1)[0]
+    if "not allowed" in message or "not a string" in message:
+        message = message.split(":", 1)[0]
+    return message
+
+
+# One validator per worker process, created on first use
+_worker_validator = None
+
+
+def _validate_chunk(chunk: Tuple[int, List[str]]) -> Tuple[int, List[Tuple[int, List[str]]]]:
+    """Validate a chunk of raw JSON records, returning the errors of invalid ones by index"""
+    global _worker_validator
+    if _worker_validator is None:
+        _worker_validator = StrictValidator()
+    start, texts = chunk
+    invalid = []
+    for offset, text in enumerate(texts):
+        try:
+            use_case = loads(text)
+        except ValueError as e:
+            invalid.append((start + offset, [f"Invalid JSON: {e}"]))
+            continue
+        if not _worker_validator.validate_use_case(use_case):
+            invalid.append((start + offset, _worker_validator.errors))
+    return len(texts), invalid
+
+
+def _chunks(input_file: str, chunk_size: int):
+    records = iter_records(input_file, raw=True)
+    start = 0
+    while True:
+        texts = list(islice(records, chunk_size))
+        if not texts:
+            return
+        yield start, texts
+        start += len(texts)
+
+
+def _split_cached(chunk: Tuple[int, List[str]], cache: ValidationCache
+                  ) -> Tuple[List[Tuple[int, List[str]]], List[Tuple[int, Optional[str]]], List[str]]:
+    """Look up a chunk's records in the cache: the cached invalid records, and the
+    (index, cache key) and text of every record that still has to be validated"""
+    start, texts = chunk
+    invalid, misses, miss_texts = [], [], []
+    for offset, text in enumerate(texts):
+        try:
+            key = cache.key(loads(text))
+        except ValueError:
+            # Invalid JSON, which the worker reports
+            key = None
+        errors = cache.get(key) if key is not None else None
+        if errors is None:
+            misses.append((start + offset, key))
+            miss_texts.append(text)
+        elif errors:
+            invalid.append((start + offset, errors))
+    return invalid, misses, miss_texts
+
+
+def validate_file_parallel(input_file: str, workers: Optional[int] = None, chunk_size: int = 1000,
+                           cache_path: Optional[str] = None,
+                           cache_size: int = DEFAULT_MAX_ENTRIES) -> Dict[str, Any]:
+    """Validate a JSON/NDJSON file across a process pool.
+
+    Records are streamed from disk in chunks of raw JSON text (cheap to send
+    between processes) and decoded and validated in the workers. At most
+    two chunks per worker are in flight, so memory stays bounded. Invalid
+    records are reported in file order, followed by a summary of error
+    counts by type, which is also returned.
+
+    With cache_path, records are first looked up in a ValidationCache in
+    this process and only the ones not validated before are sent to the
+    workers; their results are added to the cache.
+    """
+    workers = workers or os.cpu_count() or 1
+    error_counts: Counter = Counter()
+    records = invalid_records = 0
+    cache = None
+
+    def report(result) -> None:
+        nonlocal records, invalid_records
+        count, invalid = result
+        records += count
+        invalid_records += len(invalid)
+        for index, errors in invalid:
+            logger.error(f"Use case {index + 1} is invalid:")
+            for error in errors:
+                logger.error(f"  - {error}")
+                error_counts[error_type(error)] += 1
+
+    def submit(executor: ProcessPoolExecutor, chunk: Tuple[int, List[str]]):
+        if cache is None:
+            return executor.submit(_validate_chunk, chunk), None
+        invalid, misses, texts = _split_cached(chunk, cache)
+        future = executor.submit(_validate_chunk, (0, texts)) if texts else None
+        return future, (len(chunk[1]), invalid, misses)
+
+    def collect(entry) -> Tuple[int, List[Tuple[int, List[str]]]]:
+        future, cached = entry
+        if cached is None:
+            return future.result()
+        count, invalid, misses = cached
+        if future is not None:
+            failed = dict(future.result()[1])
+            for offset, (index, key) in enumerate(misses):
+                errors = failed.get(offset, [])
+                if key is not None:
+                    cache.put(key, errors)
+                if errors:
+                    invalid.append((index, errors))
+            invalid.sort(key=lambda item: item[0])
+        return count, invalid
+
+    try:
+        cache = open_cache(cache_path, cache_size)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for chunk in _chunks(input_file, chunk_size):
+                pending.append(submit(executor, chunk))
+                # Collect in submission order so output is stable regardless of timing
+                while len(pending) >= 2 * workers or (pending and (pending[0][0] is None or pending[0][0].done())):
+                    report(collect(pending.popleft()))
+            while pending:
+                report(collect(pending.popleft()))
+    except Exception as e:
+        logger.error(f"Error validating file: {e}")
+    finally:
+        if cache is not None:
+            cache.close()
+
+    logger.info(f"Validated {records} use cases with {workers} workers: "
+                f"{records - invalid_records} valid, {invalid_records} invalid")
+    for kind, count in error_counts.most_common():
+        logger.info(f"  {count:>8}  {kind}")
+    return {
+        "records": records,
+        "valid": records - invalid_records,
+        "invalid": invalid_records,
+        "error_counts": dict(error_counts)
+    }
 
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) > 1:
-        validate_file(sys.argv[1])
+    import argparse
+    parser = argparse.ArgumentParser(description="Validate use cases against the Credo AI schema")
+    parser.add_argument("input_file")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="validate in parallel with this many processes (0 = one per core)")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="records sent to a worker at a time in parallel mode")
+    parser.add_argument("--cache", help="validation cache file: records validated by an earlier run "
+                                        "against the same schema are not checked again")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="results kept in the cache; the least recently used are dropped first")
+    args = parser.parse_args()
+    if args.workers is None:
+        validate_file(args.input_file, args.cache, args.cache_size)
     else:
-        print("Usage: python strict_validator.py <input_file>") 
\ No newline at end of file
+        validate_file_parallel(args.input_file, workers=args.workers or None, chunk_size=args.chunk_size,
+                               cache_path=args.cache, cache_size=args.cache_size) 
\ No newline at end of file
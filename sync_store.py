@@ -0,0 +1,44 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fingerprint import content_hash
+from upload_journal import AppendOnlyLog
+
+DEFAULT_KEY_FIELDS = ("name",)
+
+
+def sync_key(use_case: Dict[str, Any], key_fields: Iterable[str] = DEFAULT_KEY_FIELDS, occurrence: int = 0) -> str:
+    """Identity of a use case across runs, derived from its key fields.
+
+    Use cases sharing key fields (e.g. a name, created remotely as "A",
+    "A_2", ...) are told apart by occurrence: how many earlier use cases
+    of the same run had the same key fields.
+    """
+    values = [use_case.get(field) for field in key_fields]
+    return content_hash(values + [occurrence] if occurrence else values)
+
+
+class FingerprintStore(AppendOnlyLog):
+    """Persistent map of use case identity -> (content fingerprint, remote use_case_id).
+
+    Used by incremental sync to tell new, changed and unchanged use cases
+    apart. Lines are {"k": key, "fp": fingerprint, "id": use_case_id}.
+    """
+
+    def _load(self, record: Dict[str, Any]) -> None:
+        self.entries[record["k"]] = (record["fp"], record.get("id"))
+
+    def _dump(self, key: str, entry: Tuple[str, Optional[str]]) -> Dict[str, Any]:
+        return {"k": key, "fp": entry[0], "id": entry[1]}
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Return (fingerprint, use_case_id) for a key, if synced before"""
+        return self.entries.get(key)
+
+    def record(self, key: str, fingerprint: str, use_case_id: Optional[str]) -> None:
+        self.put(key, (fingerprint, use_case_id))
+
+    def close(self) -> None:
+        # Daily runs rewrite the same keys, so keep the file proportional to the key count
+        if self.lines > 2 * len(self.entries) + 1000:
+            self.compact()
+        super().close()
@@ -0,0 +1,88 @@
+"""HyperLogLog sparse/dense modes and merging, and event aggregation across shards."""
+import pytest
+
+from aggregate import Aggregator, HyperLogLog
+from benchmarks.synthetic import make_events
+
+
+def users(start, stop):
+    return [f"user{i}@example.com" for i in range(start, stop)]
+
+
+def counter(values, **kwargs):
+    hll = HyperLogLog(**kwargs)
+    for value in values:
+        hll.add(value)
+    return hll
+
+
+def test_exact_while_sparse_and_densified_past_the_limit():
+    hll = counter(users(0, 64) * 2)
+    assert hll.sparse is not None and hll.count() == 64
+    hll.add("one more")
+    assert hll.sparse is None and len(hll.registers) == 1024
+    # Linear counting keeps small counts close once dense
+    assert abs(hll.count() - 65) <= 2
+
+
+@pytest.mark.parametrize("distinct", [500, 20000])
+def test_dense_estimate_is_within_the_expected_error(distinct):
+    # ~3% standard error at precision 10
+    assert abs(counter(users(0, distinct)).count() - distinct) <= 0.1 * distinct
+
+
+@pytest.mark.parametrize("left, right", [
+    (20, 30),    # sparse + sparse, staying sparse
+    (40, 50),    # sparse + sparse, densified by the merge
+    (20, 500),   # sparse into dense
+    (500, 20),   # dense + sparse
+    (500, 800),  # dense + dense
+])
+def test_merge_equals_one_counter_over_everything(left, right):
+    values = users(0, left + right)
+    merged = counter(values[:left])
+    merged.merge(counter(values[left - 10:]))  # overlapping
+    whole = counter(values)
+    assert merged.sparse == whole.sparse
+    assert merged.registers == whole.registers
+    assert merged.count() == whole.count()
+
+
+def test_merge_rejects_other_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(10).merge(HyperLogLog(12))
+    with pytest.raises(ValueError):
+        HyperLogLog(3)
+
+
+@pytest.mark.parametrize("distinct", [10, 1000])
+def test_state_round_trip(distinct):
+    hll = counter(users(0, distinct), precision=8)
+    restored = HyperLogLog.from_state(hll.state())
+    assert (restored.precision, restored.sparse, restored.registers) == (8, hll.sparse, hll.registers)
+    restored.add("one more")
+    assert restored.count() >= hll.count()
+
+
+def test_sharded_aggregation_matches_a_single_pass():
+    events = make_events(3000, users=400)
+    whole = Aggregator().update(events)
+    merged = Aggregator().update(events[:1000])
+    for shard in (events[1000:1700], events[1700:]):
+        merged.merge(Aggregator().update(shard))
+    assert merged.events == whole.events == 3000
+    assert list(merged.iter_use_cases()) == list(whole.iter_use_cases())
+
+
+def test_group_use_case():
+    events = [
+        {"serviceName": "ChatGPT", "intent": {"request": [{"actionName": "write code", "departmentName": "eng"}]},
+         "policyDecision": {"label": label}, "userClaim": {"email": email}, "startTime": start, "endTime": start + 5}
+        for label, email, start in [("REDACT", "a@x", 3000), ("REROUTE", "b@x", 1000), ("REDACT", "a@x", 2000)]
+    ]
+    use_case, = Aggregator().update(events).iter_use_cases()
+    assert use_case["name"] == "ChatGPT: write code (eng)"
+    assert use_case["description"] == "3 ChatGPT events from 2 users in eng"
+    assert use_case["governance_status"] == 3
+    assert use_case["custom_fields"][2]["value"] == "REDACT: 2, REROUTE: 1"
+    assert (use_case["inserted_at"], use_case["updated_at"]) == ("1970-01-01T00:00:01Z", "1970-01-01T00:00:03.005000Z")
@@ -0,0 +1,118 @@
+"""AsyncUploader against the mock Credo AI API."""
+import threading
+
+import pytest
+
+import shadow_ai_detector
+from async_uploader import AsyncUploader
+from credo_client import CredoClient
+from fingerprint import content_hash
+from metrics import METRICS
+from mock_credo_api import MockCredoServer
+from name_index import NameIndex
+from request_scheduler import RequestScheduler
+from upload_journal import UploadJournal
+
+CUSTOM_FIELDS = {"field": "ShadowAI"}
+
+
+@pytest.fixture
+def server():
+    with MockCredoServer() as server:
+        yield server
+
+
+def uploader(server, **kwargs):
+    client = CredoClient(server.url, "key", scheduler=RequestScheduler(rate=0, max_retries=0))
+    kwargs.setdefault("custom_fields", CUSTOM_FIELDS)
+    return AsyncUploader(client, **kwargs)
+
+
+def use_cases(n, name="Use case"):
+    return [{"name": f"{name} {i}", "description": "d"} for i in range(n)]
+
+
+def test_every_result_is_collected(server):
+    server.latency = 0.01
+    created = {}
+    pulled = []
+    in_flight = []
+
+    def source():
+        for use_case in use_cases(20):
+            pulled.append(use_case)
+            in_flight.append(len(pulled) - len(created))
+            yield use_case
+
+    def on_created(use_case, use_case_id):
+        created[use_case["name"]] = use_case_id
+
+    stats = uploader(server, concurrency=4, on_created=on_created).run(source())
+    assert (stats["uploaded"], stats["failed"]) == (20, 0)
+    assert created == server.names
+    # The source is only read as slots free up
+    assert max(in_flight) <= 4 + 1
+
+
+def test_failures_are_counted(server):
+    server.error_rate = 1.0
+    stats = uploader(server, concurrency=3).run(use_cases(5))
+    assert (stats["uploaded"], stats["failed"]) == (0, 5)
+
+
+def test_name_taken_since_prefetch_is_retried_under_a_new_name(server):
+    server.create("Chatbot")
+    conflicts = METRICS.counter("name_conflicts_total")
+    # An index that does not know about the existing name, as if it was created after the prefetch
+    stats = uploader(server, name_index=NameIndex()).run([{"name": "Chatbot", "description": "d"}])
+    assert stats["uploaded"] == 1
+    assert set(server.names) == {"Chatbot", "Chatbot_2"}
+    assert METRICS.counter("name_conflicts_total") == conflicts + 1
+
+
+def test_journal_skips_finished_and_resumes_half_done_use_cases(server, tmp_path):
+    done, half_done, new = use_cases(3)
+    # A use case with custom fields of its own needs a PUT after the create
+    half_done["custom_fields"] = [{"name": "own"}]
+    journal = UploadJournal(str(tmp_path / "journal.jsonl"))
+    journal.record(content_hash(done), "id-done", True)
+    journal.record(content_hash(half_done), "id-half", False)
+    created = {}
+    stats = uploader(server, journal=journal,
+                     on_created=lambda use_case, use_case_id: created.update({use_case["name"]: use_case_id})
+                     ).run([done, half_done, new])
+    assert stats["uploaded"] == 3
+    # Only the new use case is created, and only the half-done one gets its custom fields
+    assert list(server.names) == [new["name"]]
+    assert server.requests.get("PUT") == 1 and "id-half" in server.custom_fields
+    assert created[done["name"]] == "id-done" and created[half_done["name"]] == "id-half"
+    assert journal.is_complete(content_hash(half_done)) and journal.is_complete(content_hash(new))
+    journal.close()
+
+
+def test_name_index_is_built_on_the_first_create_only(server, tmp_path):
+    builds = []
+
+    def build():
+        builds.append(threading.current_thread())
+        return NameIndex()
+
+    journal = UploadJournal(str(tmp_path / "journal.jsonl"))
+    done = use_cases(1)[0]
+    journal.record(content_hash(done), "id-done", True)
+    uploader(server, journal=journal, name_index=build).run([done])
+    assert builds == []
+    uploader(server, concurrency=4, name_index=build).run(use_cases(8))
+    assert len(builds) == 1
+    journal.close()
+
+
+def test_nothing_to_upload_makes_no_listing_request(server, monkeypatch):
+    monkeypatch.setenv("CREDO_AI_API_KEY", "key")
+    monkeypatch.setenv("CREDO_AI_API_URL", server.url)
+    monkeypatch.delenv("UPLOAD_JOURNAL", raising=False)
+    formatter = shadow_ai_detector.UseCaseFormatter()
+    formatter.upload_use_cases_async([], concurrency=4)
+    assert server.requests == {}
+    formatter.upload_use_cases_async(use_cases(2), concurrency=4)
+    assert server.requests.get("GET") == 1 and server.requests.get("POST") == 2
@@ -0,0 +1,87 @@
+"""Chunking for the import endpoint and reading its per-item results."""
+import json
+
+from batch_upload import (
+    DEFAULT_MAX_BYTES, chunk_use_cases, encode_import_body, import_item_ids, inline_custom_fields,
+    parse_import_failures
+)
+
+
+def use_cases(n, description=""):
+    return [{"name": f"Use case {i}", "description": description} for i in range(n)]
+
+
+def test_chunks_are_bounded_by_item_count():
+    chunks = list(chunk_use_cases(use_cases(7), max_items=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    # Positions are 1-based across the whole input
+    assert [i for chunk in chunks for i, _, _, _ in chunk] == list(range(1, 8))
+
+
+def test_chunks_are_bounded_by_encoded_body_size():
+    items = use_cases(10, description="x" * 100)
+    max_bytes = 500
+    chunks = list(chunk_use_cases(items, max_bytes=max_bytes))
+    assert len(chunks) > 1
+    assert [use_case for chunk in chunks for _, use_case, _, _ in chunk] == items
+    for chunk in chunks:
+        body = encode_import_body(chunk)
+        assert len(body) <= max_bytes
+        assert json.loads(body) == {"data": {"items": [item for _, _, item, _ in chunk]}}
+    # Each chunk is as full as the limit allows
+    for chunk, following in zip(chunks, chunks[1:]):
+        assert len(encode_import_body(chunk + following[:1])) > max_bytes
+
+
+def test_oversized_item_is_sent_alone():
+    items = use_cases(1) + use_cases(1, description="x" * 1000) + use_cases(1)
+    chunks = list(chunk_use_cases(items, max_bytes=200))
+    assert [[i for i, _, _, _ in chunk] for chunk in chunks] == [[1], [2], [3]]
+
+
+def test_prepare_runs_once_per_item_and_keeps_the_original():
+    calls = []
+
+    def prepare(use_case):
+        calls.append(use_case["name"])
+        return inline_custom_fields(use_case, {"field": "ShadowAI"})
+
+    items = use_cases(4)
+    chunks = list(chunk_use_cases(items, max_items=2, max_bytes=DEFAULT_MAX_BYTES, prepare=prepare))
+    assert calls == [use_case["name"] for use_case in items]
+    _, original, item, encoded = chunks[0][0]
+    assert original is items[0] and "custom_fields" not in original
+    assert item["custom_fields"] == [{"custom_field_id": "field", "value": "ShadowAI"}]
+    assert json.loads(encoded) == item
+
+
+def test_import_failures_from_error_lists_and_items():
+    body = {
+        "errors": [
+            {"detail": "name has already been taken", "source": {"pointer": "/data/items/1"}},
+            {"message": "bad row", "row": 3},
+            {"detail": "rate limited"},
+            {"detail": "out of range", "index": 9},
+        ],
+        "data": {
+            "errors": [{"detail": "invalid", "item_index": 0}],
+            "items": [{"id": "a"}, {"id": "b"}, {"status": "failed"}, {"error": "ignored, already reported"}],
+        },
+    }
+    assert parse_import_failures(body, 4) == {
+        0: "invalid", 1: "name has already been taken", 2: "failed", 3: "bad row"
+    }
+
+
+def test_import_failures_of_unexpected_bodies():
+    assert parse_import_failures(None, 2) == {}
+    assert parse_import_failures(["not", "a", "dict"], 2) == {}
+    assert parse_import_failures({"data": {"items": [{"id": "a"}, {"id": "b"}]}}, 2) == {}
+
+
+def test_import_item_ids():
+    body = {"data": {"items": [{"id": "a"}, {"errors": ["taken"]}, {"id": 3}, {"id": "d"}]}}
+    assert import_item_ids(body, 3) == ["a", None, None]
+    assert import_item_ids(body, 5) == ["a", None, None, "d", None]
+    assert import_item_ids({"data": []}, 2) == [None, None]
+    assert import_item_ids(None, 1) == [None]
@@ -0,0 +1,73 @@
+"""Synthetic data is deterministic and the benchmark runner records and compares results."""
+import json
+import logging
+
+import pytest
+
+from benchmarks import run
+from benchmarks.synthetic import iter_gateway_lines, make_events, make_use_cases
+
+
+def test_generators_are_deterministic():
+    assert make_use_cases(20) == make_use_cases(20)
+    assert make_events(50) == make_events(50)
+    assert list(iter_gateway_lines(50)) == list(iter_gateway_lines(50))
+    assert make_events(50, seed=1) != make_events(50)
+    # A longer run starts with the shorter one
+    assert make_events(80)[:50] == make_events(50)
+
+
+def test_use_case_shape():
+    use_case, = make_use_cases(1, sections=3, questions=4, questionnaires=2, custom_fields=5)
+    assert len(use_case["custom_fields"]) == 5
+    assert len(use_case["questionnaires"]) == 2
+    assert len(use_case["questionnaires"][0]["sections"]) == 3
+    assert len(use_case["questionnaires"][0]["sections"][0]["questions"]) == 4
+
+
+@pytest.fixture
+def runner_env(monkeypatch):
+    # main() sets these and disables logging; undo both afterwards
+    monkeypatch.setenv("CREDO_AI_API_KEY", "bench")
+    monkeypatch.setenv("API_RATE_LIMIT", "0")
+    monkeypatch.setenv("UPLOAD_JOURNAL", "")
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def test_results_are_written_and_compared(tmp_path, runner_env, capsys):
+    baseline = tmp_path / "baseline.json"
+    args = ["--only", "aggregate,gateway_parse", "--repeat", "2", "--warmup", "0",
+            "--events", "500", "--lines", "500"]
+    run.main(args + ["-o", str(baseline)])
+    results = json.loads(baseline.read_text())
+    assert set(results["results"]) == {"aggregate", "gateway_parse"}
+    aggregate = results["results"]["aggregate"]
+    assert aggregate["items"] == 500 and len(aggregate["times"]) == 2
+    assert aggregate["best"] == min(aggregate["times"])
+    assert results["environment"]["python"] and "msgspec" in results["environment"]["optional_packages"]
+
+    # Pretend the baseline was 100x faster
+    for result in results["results"].values():
+        result["rate"] *= 100
+    baseline.write_text(json.dumps(results))
+    run.main(args + ["--compare", str(baseline)])
+    assert "aggregate" in capsys.readouterr().out.split("change")[-1]
+    with pytest.raises(SystemExit) as exit_info:
+        run.main(args + ["--compare", str(baseline), "--max-regression", "50"])
+    assert exit_info.value.code == 1
+
+
+def test_compare_reports_the_worst_change(capsys):
+    params = {"events": 1}
+    baseline = {"params": params, "results": {"a": {"rate": 100.0}, "b": {"rate": 100.0}}}
+    current = {"params": params, "results": {"a": {"rate": 150.0}, "b": {"rate": 80.0}, "new": {"rate": 1.0}}}
+    assert run.compare(current, baseline) == pytest.approx(-20.0)
+    assert "different parameters" not in capsys.readouterr().out
+    assert run.compare(current, dict(baseline, params={"events": 2})) == pytest.approx(-20.0)
+    assert "different parameters" in capsys.readouterr().out
+
+
+def test_unknown_benchmark_is_rejected(runner_env):
+    with pytest.raises(SystemExit):
+        run.main(["--only", "nope"])
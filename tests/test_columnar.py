@@ -0,0 +1,59 @@
+"""Compact NDJSON and parquet intermediate files."""
+import pytest
+
+import columnar
+from benchmarks.synthetic import make_use_cases
+from columnar import UseCaseWriter, format_for_path, write_use_cases
+from log_stream import iter_records
+
+
+@pytest.mark.parametrize("path, fmt", [
+    ("out.parquet", "parquet"), ("out.ndjson", "ndjson"), ("out.jsonl.gz", "ndjson"),
+    ("out.json", "json"), ("out.json.gz", "json"), ("out", "json"),
+])
+def test_format_for_path(path, fmt):
+    assert format_for_path(path) == fmt
+
+
+def test_ndjson_round_trip(tmp_path):
+    use_cases = make_use_cases(20, sections=2, questions=2)
+    path = str(tmp_path / "use_cases.ndjson")
+    assert write_use_cases(iter(use_cases), path) == 20
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 20 and all("\n" not in line and ": " not in line for line in lines)
+    assert list(iter_records(path)) == use_cases
+
+
+def test_unsupported_format():
+    with pytest.raises(ValueError):
+        UseCaseWriter("use_cases.json")
+
+
+def test_parquet_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, "pq", None)
+    with pytest.raises(ImportError):
+        UseCaseWriter(str(tmp_path / "use_cases.parquet"))
+    with pytest.raises(ImportError):
+        list(columnar.iter_parquet(str(tmp_path / "use_cases.parquet")))
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    use_cases = make_use_cases(25, sections=2, questions=2)
+    use_cases[0]["extra"] = {"nested": [1, 2]}
+    path = str(tmp_path / "use_cases.parquet")
+    assert write_use_cases(use_cases, path, row_group_size=10) == 25
+    assert columnar.is_parquet(path)
+    rows = list(columnar.iter_parquet(path, batch_size=7))
+    # Rows without the extra column read it back as None
+    assert rows == [dict(use_case, extra=use_case.get("extra")) for use_case in use_cases]
+    assert list(columnar.iter_parquet(path, columns=["name", "custom_fields"]))[1] == {
+        "name": use_cases[1]["name"], "custom_fields": use_cases[1]["custom_fields"]}
+
+
+def test_empty_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "use_cases.parquet")
+    assert write_use_cases([], path) == 0
+    assert list(columnar.iter_parquet(path)) == []
@@ -0,0 +1,86 @@
+"""CompactRecord stores a use case compactly and gives back exactly the dict it was built from."""
+import json
+import pickle
+
+import pytest
+
+from benchmarks.synthetic import make_use_cases
+from compact_record import INTERN_MAX_LEN, CompactRecord, compact, expand, freeze, json_default, thaw
+from compiled_validator import CompiledValidator
+from serialization import dumps
+
+NESTED = {
+    "name": "Chatbot",
+    "empty_list": [],
+    "empty_dict": {},
+    "dicts": [{"a": 1}, {"a": 2, "b": [None, True, 1.5]}],
+    "strings": ["Retail", "E-commerce"],
+    "mixed": ["x", 1, {"y": []}],
+    "long": "z" * (INTERN_MAX_LEN + 1),
+    "nested": {"deeper": {"deepest": [[1, 2], []]}},
+}
+
+
+@pytest.mark.parametrize("value", [NESTED, [NESTED, NESTED], [], {}, "text", 3, None, [[{}]]])
+def test_freeze_thaw_round_trip(value):
+    assert thaw(freeze(value)) == value
+
+
+def test_shared_shapes_and_pooled_strings():
+    first, second = freeze(NESTED), freeze(dict(NESTED))
+    assert first[0] is second[0]
+    strings = list(NESTED).index("strings") + 1
+    assert first[strings] is second[strings] == ("Retail", "E-commerce")
+
+
+@pytest.mark.parametrize("use_case", [NESTED] + make_use_cases(3, sections=2, questions=3))
+def test_record_reads_like_its_dict(use_case):
+    record = CompactRecord(use_case)
+    assert record == use_case
+    assert record.to_dict() == record.copy() == use_case
+    assert list(record) == list(use_case) and len(record) == len(use_case)
+    for key, value in use_case.items():
+        assert key in record
+        assert record[key] == record.get(key) == value
+    assert "missing" not in record and record.get("missing", 0) == 0
+    with pytest.raises(KeyError):
+        record["missing"]
+
+
+def test_values_read_from_a_record_are_fresh():
+    record = CompactRecord(NESTED)
+    record["dicts"][0]["a"] = 99
+    record.to_dict()["nested"]["deeper"] = None
+    assert record == NESTED
+
+
+def test_serialization_matches_the_dict():
+    record = CompactRecord(NESTED)
+    assert json.dumps(record, default=json_default) == json.dumps(NESTED)
+    assert json.dumps({"wrapped": [record]}, default=json_default) == json.dumps({"wrapped": [NESTED]})
+    assert dumps(record) == dumps(NESTED)
+    with pytest.raises(TypeError):
+        json_default(object())
+
+
+def test_pickle_and_repr():
+    record = CompactRecord(NESTED)
+    restored = pickle.loads(pickle.dumps(record))
+    assert type(restored) is CompactRecord and restored == NESTED
+    assert repr(record) == f"CompactRecord({NESTED!r})"
+
+
+def test_compact_and_expand():
+    record = compact(NESTED)
+    assert type(record) is CompactRecord
+    assert compact(record) is record
+    assert type(expand(record)) is dict and expand(record) == NESTED
+    assert expand(NESTED) is NESTED and compact("text") == expand("text") == "text"
+
+
+def test_validation_is_the_same_for_records():
+    validator = CompiledValidator()
+    valid, invalid = make_use_cases(2)
+    invalid["governance_status"] = "not a number"
+    for use_case in (valid, invalid):
+        assert validator.validate(CompactRecord(use_case)) == validator.validate(use_case)
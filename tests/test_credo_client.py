@@ -0,0 +1,83 @@
+"""CredoClient endpoints, request compression, latency metrics and retries."""
+import json
+
+import pytest
+
+from credo_client import COMPRESS_MIN_BYTES, CredoClient
+from metrics import METRICS
+from mock_credo_api import MockCredoServer
+from request_scheduler import RequestScheduler
+
+
+@pytest.fixture(scope="module")
+def server():
+    with MockCredoServer() as server:
+        yield server
+
+
+def client_for(server, **kwargs):
+    return CredoClient(server.url, "key", scheduler=RequestScheduler(rate=0, max_retries=0), **kwargs)
+
+
+def latency_count(endpoint, status):
+    return sum(h["count"] for h in METRICS.summary()["histograms"]
+               if h["name"] == "http_request_seconds" and h["labels"] == {"endpoint": endpoint, "status": status})
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_endpoints(server, compress):
+    created = latency_count("create", "201")
+    description = "x" * (2 * COMPRESS_MIN_BYTES)
+    with client_for(server, compress=compress) as client:
+        assert client.session.headers["Authorization"] == "key"
+        response = client.create_use_case(client.encode({"name": f"Chatbot {compress}", "description": description}))
+        assert response.status_code == 201
+        use_case_id = response.json()["data"]["id"]
+        assert server.names[f"Chatbot {compress}"] == use_case_id
+
+        assert client.set_custom_fields(use_case_id, {"field": "ShadowAI"}).status_code == 200
+        assert server.custom_fields[use_case_id] == {"field": "ShadowAI"}
+        assert client.update_use_case(use_case_id, client.encode({"description": "new"})).status_code == 200
+
+        body = {"data": {"items": [{"name": f"Imported {compress}"}]}}
+        items = client.import_use_cases(json.dumps(body).encode()).json()["data"]["items"]
+        assert server.names[f"Imported {compress}"] == items[0]["id"]
+
+        listed = client.list_use_cases({"page[number]": 1, "page[size]": 1000}).json()["data"]
+        assert {"id": use_case_id, "name": f"Chatbot {compress}"} in listed
+    assert latency_count("create", "201") == created + 1
+
+
+def test_encode_matches_json():
+    payload = {"name": "Zoë", "fields": [1, 2.5, None, True]}
+    assert json.loads(CredoClient.encode(payload)) == payload
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.idempotent = []
+
+    def request(self, send, idempotent=True):
+        self.idempotent.append(idempotent)
+        return send()
+
+
+def test_only_posts_are_sent_as_non_idempotent(server):
+    scheduler = RecordingScheduler()
+    with CredoClient(server.url, "key", scheduler=scheduler) as client:
+        use_case_id = client.create_use_case(client.encode({"name": "Scheduled"})).json()["data"]["id"]
+        client.import_use_cases(client.encode({"data": {"items": []}}))
+        client.update_use_case(use_case_id, client.encode({"description": "new"}))
+        client.set_custom_fields(use_case_id, {"field": "ShadowAI"})
+        client.list_use_cases()
+    assert scheduler.idempotent == [False, False, True, True, True]
+
+
+def test_failed_attempts_are_retried_and_timed():
+    with MockCredoServer(error_rate=1.0) as server:
+        failed = latency_count("custom_fields", "503")
+        client = CredoClient(server.url, "key", scheduler=RequestScheduler(rate=0, max_retries=2, base_delay=0))
+        assert client.set_custom_fields("id", {"field": "ShadowAI"}).status_code == 503
+        client.close()
+        assert server.requests.get("ERROR") == 3
+        assert latency_count("custom_fields", "503") == failed + 3
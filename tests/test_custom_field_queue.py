@@ -0,0 +1,118 @@
+"""CustomFieldQueue inline and on worker threads, and custom fields set by the serial uploader."""
+import threading
+import time
+
+import pytest
+
+import shadow_ai_detector
+from custom_field_queue import CustomFieldQueue
+from metrics import METRICS
+from mock_credo_api import MockCredoServer
+from upload_journal import UploadJournal
+
+
+class Recorder:
+    """set_fields stand-in that records which thread set what, and how many ran at once"""
+
+    def __init__(self, fail=(), delay=0.0):
+        self.fail = set(fail)
+        self.delay = delay
+        self.calls = []
+        self.threads = set()
+        self.running = 0
+        self.most_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, use_case_id):
+        with self.lock:
+            self.calls.append(use_case_id)
+            self.threads.add(threading.current_thread().name)
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+        if use_case_id == "raises":
+            raise RuntimeError("connection reset")
+        return use_case_id not in self.fail
+
+
+def test_concurrency_zero_sets_fields_inline_in_order(tmp_path):
+    recorder = Recorder(fail={"id-2"})
+    with UploadJournal(str(tmp_path / "journal.jsonl")) as journal:
+        queue = CustomFieldQueue(recorder, concurrency=0, journal=journal)
+        for n in range(4):
+            queue.submit(f"key-{n}", f"id-{n}")
+            # Already done when submit() returns
+            assert recorder.calls[-1] == f"id-{n}"
+        assert queue.close() == {"set": 3, "failed": 1}
+        assert journal.get("key-1") == ("id-1", True)
+        assert journal.get("key-2") == ("id-2", False)
+    assert recorder.threads == {threading.current_thread().name}
+
+
+def test_concurrency_n_runs_up_to_n_puts_at_once(tmp_path):
+    recorder = Recorder(fail={"id-5"}, delay=0.02)
+    with UploadJournal(str(tmp_path / "journal.jsonl")) as journal:
+        queue = CustomFieldQueue(recorder, concurrency=3, journal=journal)
+        for n in range(12):
+            queue.submit(f"key-{n}", f"id-{n}")
+        # close() waits for every queued PUT
+        assert queue.close() == {"set": 11, "failed": 1}
+        assert sorted(recorder.calls) == sorted(f"id-{n}" for n in range(12))
+        assert all(journal.get(f"key-{n}") == (f"id-{n}", n != 5) for n in range(12))
+    assert recorder.most_running == 3
+    assert threading.current_thread().name not in recorder.threads
+
+
+def test_errors_count_as_failures():
+    failures = METRICS.counter("custom_field_failures_total")
+    for concurrency in (0, 2):
+        queue = CustomFieldQueue(Recorder(), concurrency=concurrency)
+        queue.submit(None, "raises")
+        queue.submit(None, "ok")
+        assert queue.close() == {"set": 1, "failed": 1}
+    assert METRICS.counter("custom_field_failures_total") == failures + 2
+
+
+def test_submit_blocks_once_max_pending_are_queued():
+    release = threading.Event()
+    queue = CustomFieldQueue(lambda use_case_id: release.wait(5), concurrency=1, max_pending=2)
+    queue.submit(None, "id-0")
+    queue.submit(None, "id-1")
+    submitted = threading.Event()
+    thread = threading.Thread(target=lambda: (queue.submit(None, "id-2"), submitted.set()))
+    thread.start()
+    assert not submitted.wait(0.2)
+    release.set()
+    assert submitted.wait(5)
+    thread.join()
+    assert queue.close() == {"set": 3, "failed": 0}
+
+
+@pytest.mark.parametrize("concurrency", ["0", "4"])
+def test_serial_upload_inlines_or_queues_custom_fields(monkeypatch, concurrency):
+    monkeypatch.setenv("CREDO_AI_API_KEY", "test")
+    monkeypatch.setenv("API_RATE_LIMIT", "0")
+    monkeypatch.setenv("PREFETCH_NAMES", "false")
+    monkeypatch.setenv("UPLOAD_JOURNAL", "")
+    monkeypatch.setenv("CUSTOM_FIELDS_CONCURRENCY", concurrency)
+    own_fields = [{"custom_field_id": "own", "value": "x"}]
+    use_cases = [{"name": f"Plain {n}", "description": "d"} for n in range(3)]
+    use_cases += [{"name": f"Own fields {n}", "description": "d", "custom_fields": own_fields} for n in range(3)]
+    with MockCredoServer() as server:
+        monkeypatch.setenv("CREDO_AI_API_URL", server.url)
+        formatter = shadow_ai_detector.UseCaseFormatter()
+        formatter.upload_use_cases(use_cases)
+        formatter.client.close()
+    shadow_ai = [{"custom_field_id": field_id, "value": value}
+                 for field_id, value in shadow_ai_detector.SHADOW_AI_CUSTOM_FIELDS.items()]
+    assert len(server.names) == 6
+    for name, use_case_id in server.names.items():
+        if name.startswith("Plain"):
+            # Sent with the create request
+            assert server.custom_fields[use_case_id] == shadow_ai
+        else:
+            # Set by a PUT after the create
+            assert server.custom_fields[use_case_id] == shadow_ai_detector.SHADOW_AI_CUSTOM_FIELDS
+    assert server.requests.get("PUT") == 3
@@ -0,0 +1,61 @@
+"""The formatted use case file is only replaced by a run that read its whole input."""
+import json
+
+import pytest
+
+import shadow_ai_detector
+
+PREVIOUS = '{\n  "use_cases": [\n    {"name": "kept"}\n  ]\n}\n'
+LOG = [{"name": "Chatbot", "description": "Support bot"}, {"name": "Scorer", "description": "Lead scoring"}]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CREDO_AI_API_KEY", "test")
+    monkeypatch.setenv("DRY_RUN", "true")
+    for name in ("OUTPUT_FORMAT", "COMPACT_JSON", "INGEST_STATE", "SYNC", "UPLOAD_JOURNAL"):
+        monkeypatch.delenv(name, raising=False)
+    (tmp_path / "formatted_use_cases.json").write_text(PREVIOUS, encoding="utf-8")
+    return tmp_path
+
+
+def run(workdir, monkeypatch, log_file):
+    monkeypatch.setenv("LOG_FILE", str(log_file))
+    shadow_ai_detector.main()
+    return (workdir / "formatted_use_cases.json").read_text(encoding="utf-8")
+
+
+def test_missing_input_leaves_output_unchanged(workdir, monkeypatch):
+    assert run(workdir, monkeypatch, workdir / "missing.json") == PREVIOUS
+    assert not (workdir / "formatted_use_cases.json.tmp").exists()
+
+
+@pytest.mark.parametrize("text", ["[]", ""])
+def test_empty_input_leaves_output_unchanged(workdir, monkeypatch, text):
+    log_file = workdir / "logs.json"
+    log_file.write_text(text, encoding="utf-8")
+    assert run(workdir, monkeypatch, log_file) == PREVIOUS
+    assert not (workdir / "formatted_use_cases.json.tmp").exists()
+
+
+def test_complete_input_replaces_output(workdir, monkeypatch):
+    log_file = workdir / "logs.json"
+    log_file.write_text(json.dumps(LOG), encoding="utf-8")
+    saved = json.loads(run(workdir, monkeypatch, log_file))
+    assert [use_case["name"] for use_case in saved["use_cases"]] == ["Chatbot", "Scorer"]
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_output_layout(workdir, monkeypatch, compact):
+    if compact:
+        monkeypatch.setenv("COMPACT_JSON", "true")
+    log_file = workdir / "logs.json"
+    log_file.write_text(json.dumps(LOG), encoding="utf-8")
+    saved = run(workdir, monkeypatch, log_file)
+    expected = {"use_cases": [shadow_ai_detector.UseCaseFormatter().format_use_case(log) for log in LOG]}
+    if compact:
+        assert saved == json.dumps(expected, separators=(",", ":")) + "\n"
+    else:
+        # What the formatter wrote before it streamed: json.dump(..., indent=2)
+        assert saved == json.dumps(expected, indent=2) + "\n"
@@ -0,0 +1,104 @@
+"""Raw gateway log parsing: the split fast path agrees with the regex it falls back to."""
+import gzip
+
+import pytest
+
+from benchmarks.synthetic import iter_gateway_lines
+from gateway_log import LINE_RE, iter_gateway_events, iter_lines, iter_use_case_candidates, parse_line
+
+LINE = ("2024-03-18 09:15:02 - User: alice@example.com - Action: API call to OpenAI - "
+        "Endpoint: /v1/chat/completions - Model: gpt-4")
+
+
+def regex_parse(line):
+    match = LINE_RE.match(line)
+    return match.groupdict() if match else None
+
+
+def test_fast_path_matches_regex_on_generated_logs():
+    for line in iter_gateway_lines(1000):
+        event = parse_line(line)
+        assert event is not None
+        assert event == regex_parse(line)
+
+
+@pytest.mark.parametrize("line", [
+    LINE,
+    LINE + "   ",
+    LINE + "\r",
+    LINE.replace("alice@example.com", ""),
+    LINE.replace("gpt-4", "gpt-4 turbo"),
+])
+def test_fast_path_matches_regex(line):
+    event = parse_line(line)
+    assert event is not None
+    assert event == regex_parse(line)
+
+
+@pytest.mark.parametrize("line, field, value", [
+    (LINE.replace("alice@example.com", "alice - admin"), "user", "alice - admin"),
+    (LINE.replace("OpenAI", "Azure - OpenAI"), "provider", "Azure - OpenAI"),
+    (LINE.replace("gpt-4", "gpt-4 - preview"), "model", "gpt-4 - preview"),
+])
+def test_values_containing_the_separator_fall_back_to_the_regex(line, field, value):
+    event = parse_line(line)
+    assert event == regex_parse(line)
+    assert event[field] == value
+
+
+@pytest.mark.parametrize("line", [
+    "",
+    "not a gateway line",
+    LINE.replace("User: ", "Username: "),
+    LINE.replace("API call to ", "call to "),
+    LINE.split(" - Model: ")[0],
+])
+def test_malformed_lines(line):
+    assert parse_line(line) is None
+    assert regex_parse(line) is None
+
+
+def write_log(path, lines, compress=False):
+    data = "".join(lines).encode("utf-8")
+    with (gzip.open(path, "wb") if compress else open(path, "wb")) as f:
+        f.write(data)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_lines_survive_chunk_boundaries(tmp_path, compress, chunk_size):
+    lines = [LINE.replace("alice", "zoë ångström") + "\n", LINE + "\n", LINE]  # no final newline
+    path = tmp_path / "gateway.log"
+    write_log(path, lines, compress)
+    assert list(iter_lines(str(path), chunk_size)) == [line.rstrip("\n") for line in lines]
+
+
+def test_byte_range(tmp_path):
+    lines = list(iter_gateway_lines(10))
+    path = tmp_path / "gateway.log"
+    write_log(path, lines)
+    start = len("".join(lines[:3]).encode())
+    end = start + len("".join(lines[3:7]).encode())
+    events = list(iter_gateway_events(str(path), chunk_size=16, start=start, end=end))
+    assert events == [parse_line(line) for line in lines[3:7]]
+
+
+def test_events_skip_blank_and_malformed_lines(tmp_path, caplog):
+    path = tmp_path / "gateway.log"
+    write_log(path, [LINE + "\n", "\n", "garbage\n", LINE.replace("alice", "bob") + "\n"])
+    events = list(iter_gateway_events(str(path)))
+    assert [event["user"] for event in events] == ["alice@example.com", "bob@example.com"]
+    assert "Skipped 1 malformed lines" in caplog.text
+
+
+def test_candidates_are_distinct_provider_models_in_first_seen_order():
+    events = [parse_line(line) for line in [
+        LINE,
+        LINE.replace("alice", "bob"),
+        LINE.replace("gpt-4", "gpt-4o"),
+        LINE.replace("OpenAI", "Anthropic").replace("gpt-4", "claude-3-opus"),
+    ]]
+    candidates = list(iter_use_case_candidates(events))
+    assert [c["name"] for c in candidates] == ["OpenAI gpt-4", "OpenAI gpt-4o", "Anthropic claude-3-opus"]
+    assert "(alice@example.com)" in candidates[0]["description"]
+    assert candidates[2]["ai_type"] == "Anthropic"
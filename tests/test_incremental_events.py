@@ -0,0 +1,67 @@
+"""Incremental runs over aggregated gateway events must keep each use case's totals since the first run."""
+import json
+
+import pytest
+
+import shadow_ai_detector
+from aggregate import Aggregator
+from benchmarks.synthetic import make_events
+from mock_credo_api import MockCredoServer
+
+EVENTS = make_events(600, users=300)
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CREDO_AI_API_KEY", "test")
+    monkeypatch.setenv("DRY_RUN", "false")
+    monkeypatch.setenv("LOG_FILE", str(tmp_path / "events.ndjson"))
+    monkeypatch.setenv("LOG_FORMAT", "events")
+    monkeypatch.setenv("INGEST_STATE", str(tmp_path / "ingest_state.jsonl"))
+    monkeypatch.setenv("SYNC", "true")
+    monkeypatch.setenv("SYNC_STORE", str(tmp_path / "sync_state.jsonl"))
+    monkeypatch.setenv("API_RATE_LIMIT", "0")
+    for name in ("UPLOAD_JOURNAL", "UPLOAD_MODE", "UPLOAD_CONCURRENCY", "OUTPUT_FORMAT", "COMPACT_JSON"):
+        monkeypatch.delenv(name, raising=False)
+    return tmp_path
+
+
+def append(path, events):
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(json.dumps(event) + "\n" for event in events)
+
+
+def descriptions(path):
+    with open(path, encoding="utf-8") as f:
+        return {use_case["name"]: use_case["description"] for use_case in json.load(f)["use_cases"]}
+
+
+# Service alone gives a few groups with many users (dense HyperLogLogs), the default key many small ones
+@pytest.mark.parametrize("group_key", ["serviceName", "serviceName,actionName,departmentName"])
+def test_second_run_reports_totals(env, monkeypatch, group_key):
+    monkeypatch.setenv("AGGREGATE_KEY", group_key)
+    expected = {u["name"]: u["description"]
+                for u in Aggregator(group_key.split(",")).update(EVENTS).iter_use_cases()}
+    with MockCredoServer() as server:
+        monkeypatch.setenv("CREDO_AI_API_URL", server.url)
+        append(env / "events.ndjson", EVENTS[:400])
+        shadow_ai_detector.main()
+        append(env / "events.ndjson", EVENTS[400:])
+        shadow_ai_detector.main()
+        second = descriptions(env / "formatted_use_cases.json")
+
+    assert second and all(second[name] == expected[name] for name in second)
+    # Every group was created once and updated in place afterwards
+    assert sorted(server.names) == sorted(expected)
+    assert server.requests.get("PATCH", 0) > 0
+
+
+def test_upload_without_sync_is_refused(env, monkeypatch):
+    monkeypatch.setenv("SYNC", "false")
+    append(env / "events.ndjson", EVENTS[:10])
+    with MockCredoServer() as server:
+        monkeypatch.setenv("CREDO_AI_API_URL", server.url)
+        shadow_ai_detector.main()
+    assert server.requests == {}
+    assert not (env / "ingest_state.jsonl").exists()
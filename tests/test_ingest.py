@@ -0,0 +1,96 @@
+"""Sharded ingestion of many log files gives the same result as reading them one after another."""
+import json
+import os
+
+import pytest
+
+from aggregate import Aggregator
+from benchmarks.synthetic import iter_gateway_lines, make_events, write_records
+from gateway_log import iter_gateway_events, iter_use_case_candidates
+from ingest import aggregate_files, expand_sources, iter_gateway_candidates, map_shards, shard_files, transform_files
+from transform import transform_file
+
+
+def write_exports(directory, events, files=5):
+    """Split events over timestamp-named NDJSON and JSON array files"""
+    paths = []
+    per_file = -(-len(events) // files)
+    for n in range(files):
+        suffix = ".ndjson" if n % 2 else ".json"
+        path = os.path.join(directory, f"2024-12-{n + 10:02d}T00-00-00Z{suffix}")
+        write_records(path, events[n * per_file:(n + 1) * per_file])
+        paths.append(path)
+    return paths
+
+
+def test_expand_sources(tmp_path):
+    for name in ["b.json", "a.ndjson", "c.log.gz", "notes.txt"]:
+        (tmp_path / name).write_text("")
+    (tmp_path / "sub.json").mkdir()
+    expected = [str(tmp_path / name) for name in ["a.ndjson", "b.json", "c.log.gz"]]
+    assert expand_sources(str(tmp_path)) == expected
+    assert expand_sources(str(tmp_path / "*.json")) == [str(tmp_path / "b.json")]
+    assert expand_sources("missing.json") == ["missing.json"]
+
+
+def test_shards_group_consecutive_files_by_size(tmp_path):
+    paths = []
+    for n, size in enumerate([5, 5, 20, 1, 1, 1]):
+        path = tmp_path / f"{n}.log"
+        path.write_bytes(b"x" * size)
+        paths.append(str(path))
+    assert shard_files(paths, shard_bytes=10) == [paths[:2], paths[2:3], paths[3:]]
+    assert shard_files(paths, shard_bytes=1000) == [paths]
+
+
+def test_results_come_back_in_shard_order():
+    shards = [["x"] * n for n in [3, 1, 4, 1, 5, 9, 2, 6]]
+    assert list(map_shards(len, shards, workers=3)) == [3, 1, 4, 1, 5, 9, 2, 6]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_aggregation_matches_a_single_pass(tmp_path, workers):
+    events = make_events(600, users=50)
+    paths = write_exports(str(tmp_path), events)
+    aggregator = aggregate_files(paths, workers=workers, shard_bytes=20000)
+    expected = Aggregator().update(events)
+    assert aggregator.events == 600
+    assert list(aggregator.iter_use_cases()) == list(expected.iter_use_cases())
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_gateway_candidates_match_a_single_log(tmp_path, workers):
+    lines = list(iter_gateway_lines(300))
+    paths = []
+    for n in range(4):
+        path = tmp_path / f"gateway-{n}.log"
+        path.write_text("".join(lines[n * 75:(n + 1) * 75]))
+        paths.append(str(path))
+    whole = tmp_path / "whole.log"
+    whole.write_text("".join(lines))
+    expected = list(iter_use_case_candidates(iter_gateway_events(str(whole))))
+    assert list(iter_gateway_candidates(paths, workers=workers, shard_bytes=5000)) == expected
+
+
+@pytest.mark.parametrize("output", ["out.json", "out.ndjson"])
+@pytest.mark.parametrize("indent", [4, None])
+def test_transform_output_matches_a_single_file(tmp_path, output, indent):
+    events = make_events(400)
+    exports = tmp_path / "exports"
+    exports.mkdir()
+    paths = write_exports(str(exports), events)
+    whole = str(tmp_path / "whole.json")
+    write_records(whole, events)
+    expected, actual = str(tmp_path / f"expected-{output}"), str(tmp_path / output)
+    assert transform_file(whole, expected, indent=indent) == 400
+    assert transform_files(paths, actual, workers=2, shard_bytes=30000, indent=indent) == 400
+    with open(expected, encoding="utf-8") as f, open(actual, encoding="utf-8") as g:
+        assert g.read() == f.read()
+
+
+def test_transform_of_empty_files(tmp_path):
+    paths = write_exports(str(tmp_path), [], files=2)
+    output = str(tmp_path / "out.json")
+    assert transform_files(paths, output, workers=2) == 0
+    with open(output, encoding="utf-8") as f:
+        assert json.load(f) == []
@@ -0,0 +1,162 @@
+"""IngestState.plan reads only what changed since the last commit, including across rotation and truncation."""
+import gzip
+import json
+import os
+
+from ingest import FileSlice, iter_source_records
+from ingest_state import HEAD_BYTES, IngestState
+
+
+def event(n):
+    return {"id": n, "startTime": 1000 + n}
+
+
+def write_lines(path, events, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.writelines(json.dumps(e) + "\n" for e in events)
+
+
+def touch(path, mtime):
+    # Distinct mtimes, so a rewrite of the same size is never mistaken for no change
+    os.utime(path, (mtime, mtime))
+
+
+def run(state, files):
+    """One incremental run: plan, read the slices, commit; returns the ids read"""
+    slices = state.plan(files)
+    ids = [record["id"] for record in iter_source_records(slices, state.seen)]
+    state.commit()
+    return slices, ids
+
+
+def test_new_unchanged_and_appended(tmp_path):
+    log = str(tmp_path / "events.ndjson")
+    write_lines(log, map(event, range(3)))
+    touch(log, 1)
+    with IngestState(str(tmp_path / "state.jsonl")) as state:
+        slices, ids = run(state, [log])
+        assert slices == [FileSlice(log, 0, os.path.getsize(log), None)] and ids == [0, 1, 2]
+        assert state.watermark == 1002
+
+        assert run(state, [log]) == ([], [])
+
+        size = os.path.getsize(log)
+        write_lines(log, map(event, range(3, 5)), mode="a")
+        touch(log, 2)
+        slices, ids = run(state, [log])
+        assert slices == [FileSlice(log, size, os.path.getsize(log))] and ids == [3, 4]
+        assert state.watermark == 1004
+
+
+def test_partial_line_is_deferred(tmp_path):
+    log = str(tmp_path / "events.ndjson")
+    write_lines(log, [event(0)])
+    with open(log, "a", encoding="utf-8") as f:
+        f.write('{"id": 1, "startTi')
+    touch(log, 1)
+    with IngestState(str(tmp_path / "state.jsonl")) as state:
+        assert run(state, [log])[1] == [0]
+        with open(log, "a", encoding="utf-8") as f:
+            f.write('me": 1001}\n')
+        touch(log, 2)
+        assert run(state, [log])[1] == [1]
+
+
+def test_rotated_file_keeps_its_offset(tmp_path):
+    log, rotated = str(tmp_path / "events.ndjson"), str(tmp_path / "events-1.ndjson")
+    write_lines(log, map(event, range(3)))
+    touch(log, 1)
+    with IngestState(str(tmp_path / "state.jsonl")) as state:
+        run(state, [log])
+        os.rename(log, rotated)
+        # The writer finished its last lines into the old file before the rotation
+        write_lines(rotated, [event(3)], mode="a")
+        touch(rotated, 2)
+        write_lines(log, map(event, range(10, 12)))
+        touch(log, 3)
+        slices, ids = run(state, [rotated, log])
+        assert slices[0].path == rotated and slices[0].start > 0
+        assert ids == [3, 10, 11]
+        assert run(state, [rotated, log]) == ([], [])
+
+
+def test_truncated_and_replaced_files_are_read_again(tmp_path):
+    log = str(tmp_path / "events.ndjson")
+    write_lines(log, map(event, range(5)))
+    touch(log, 1)
+    with IngestState(str(tmp_path / "state.jsonl")) as state:
+        run(state, [log])
+        # Truncated: smaller than before, so read from the start past the watermark
+        write_lines(log, [event(2), event(8)])
+        touch(log, 2)
+        slices, ids = run(state, [log])
+        assert slices == [FileSlice(log, 0, os.path.getsize(log), 1004)] and ids == [8]
+
+        # Replaced by a file of the same size with other leading bytes
+        write_lines(log, [event(2), event(9)])
+        touch(log, 3)
+        slices, ids = run(state, [log])
+        assert slices[0].start == 0 and slices[0].after == 1008 and ids == [9]
+
+
+def test_gzip_and_json_arrays_are_read_in_full(tmp_path):
+    array, archive = str(tmp_path / "events.json"), str(tmp_path / "events.ndjson.gz")
+    with open(array, "w", encoding="utf-8") as f:
+        json.dump([event(0), event(1)], f)
+    with gzip.open(archive, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(event(2)) + "\n")
+    touch(array, 1)
+    touch(archive, 1)
+    with IngestState(str(tmp_path / "state.jsonl")) as state:
+        slices, ids = run(state, [array, archive])
+        assert [s.end for s in slices] == [None, None] and ids == [0, 1, 2]
+        with open(array, "w", encoding="utf-8") as f:
+            json.dump([event(0), event(1), event(5)], f)
+        touch(array, 2)
+        slices, ids = run(state, [array, archive])
+        assert slices == [FileSlice(array, 0, None, 1002)] and ids == [5]
+
+
+def test_state_survives_reopening(tmp_path):
+    log, path = str(tmp_path / "events.ndjson"), str(tmp_path / "state.jsonl")
+    write_lines(log, map(event, range(3)))
+    touch(log, 1)
+    with IngestState(path) as state:
+        run(state, [log])
+        # Planned but never committed: the next run reads it again
+        write_lines(log, [event(3)], mode="a")
+        touch(log, 2)
+        assert state.plan([log])
+    with IngestState(path) as state:
+        assert state.watermark == 1002
+        assert run(state, [log])[1] == [3]
+    with IngestState(path) as state:
+        assert state.watermark == 1003 and run(state, [log]) == ([], [])
+
+
+def test_only_leading_bytes_are_fingerprinted(tmp_path):
+    log = str(tmp_path / "events.ndjson")
+    write_lines(log, map(event, range(HEAD_BYTES // 20)))
+    touch(log, 1)
+    with IngestState(str(tmp_path / "state.jsonl")) as state:
+        run(state, [log])
+        assert state.entries[log].head_len == HEAD_BYTES
+        write_lines(log, [event(10000)], mode="a")
+        touch(log, 2)
+        assert run(state, [log])[1] == [10000]
+
+
+def test_close_compacts_stale_lines(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    log = str(tmp_path / "events.ndjson")
+    with IngestState(path) as state:
+        for n in range(1100):
+            write_lines(log, [event(n)], mode="a")
+            touch(log, n + 1)
+            run(state, [log])
+        assert state.lines > 2 * len(state.entries) + 1000
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+    with IngestState(path) as state:
+        assert state.watermark == 1000 + 1099
+        assert state.plan([log]) == []
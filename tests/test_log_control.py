@@ -0,0 +1,108 @@
+"""LazyJSON, RateLimitFilter and ProgressLogger."""
+import logging
+
+import pytest
+
+import log_control
+from compact_record import CompactRecord
+from log_control import LazyJSON, ProgressLogger, RateLimitFilter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(log_control.time, "monotonic", clock)
+    return clock
+
+
+class Counted:
+    """Serialized by LazyJSON through str(); counts how often that happens"""
+    calls = 0
+
+    def __str__(self):
+        Counted.calls += 1
+        return "counted"
+
+
+def test_lazy_json_only_serializes_emitted_records(caplog):
+    logger = logging.getLogger("test_log_control.lazy")
+    Counted.calls = 0
+    caplog.set_level(logging.INFO, logger=logger.name)
+    logger.debug("payload: %s", LazyJSON({"value": Counted()}))
+    assert Counted.calls == 0 and not caplog.records
+
+    caplog.set_level(logging.DEBUG, logger=logger.name)
+    logger.debug("payload: %s", LazyJSON({"value": Counted()}, indent=None))
+    assert caplog.messages == ['payload: {"value": "counted"}']
+
+
+def test_lazy_json_text_limit_and_compact_records():
+    assert str(LazyJSON("x" * 10, limit=4)) == "xxxx... (10 chars)"
+    assert str(LazyJSON("short", limit=10)) == "short"
+    record = CompactRecord({"name": "Chatbot", "tags": ["a"]})
+    assert str(LazyJSON(record, indent=None)) == '{"name": "Chatbot", "tags": ["a"]}'
+
+
+def record(msg):
+    return logging.LogRecord("test", logging.DEBUG, __file__, 1, msg, (), None)
+
+
+def test_rate_limit_filter_drops_past_the_burst_and_reports_it(clock):
+    limit = RateLimitFilter(rate=1, burst=2)
+    assert [limit.filter(record("payload %s")) for _ in range(3)] == [True, True, False]
+    # Each message template has its own bucket
+    assert limit.filter(record("response %s"))
+
+    clock.now += 0.5
+    assert not limit.filter(record("payload %s"))
+    clock.now += 0.5
+    passed = record("payload %s")
+    assert limit.filter(passed)
+    assert passed.msg == "payload %s [2 similar messages suppressed]"
+    assert not limit.filter(record("payload %s"))
+
+    clock.now += 10
+    assert [limit.filter(record("payload %s")) for _ in range(3)] == [True, True, False]
+
+
+def test_rate_limit_filter_disabled():
+    limit = RateLimitFilter(rate=0, burst=1)
+    assert all(limit.filter(record("payload %s")) for _ in range(100))
+
+
+def test_progress_logger_every_n_items(caplog, clock):
+    logger = logging.getLogger("test_log_control.progress")
+    caplog.set_level(logging.INFO, logger=logger.name)
+    progress = ProgressLogger(logger, "Upload", every=3, interval=60)
+    for ok in [True, False, True, True, True, True, True]:
+        clock.now += 1
+        progress.update(ok)
+    assert caplog.messages == ["Upload: 3 done (1 failed), 1.0/sec", "Upload: 6 done (1 failed), 1.0/sec"]
+
+
+def test_progress_logger_interval(caplog, clock):
+    logger = logging.getLogger("test_log_control.interval")
+    caplog.set_level(logging.INFO, logger=logger.name)
+    progress = ProgressLogger(logger, "Upload", every=1000, interval=10)
+    progress.update()
+    clock.now += 10
+    progress.update()
+    progress.update()
+    assert caplog.messages == ["Upload: 2 done (0 failed), 0.2/sec"]
+
+
+def test_progress_logger_quiet(caplog, clock):
+    logger = logging.getLogger("test_log_control.quiet")
+    caplog.set_level(logging.WARNING, logger=logger.name)
+    progress = ProgressLogger(logger, "Upload", every=1)
+    for _ in range(5):
+        progress.update()
+    assert progress.count == 5 and not caplog.records
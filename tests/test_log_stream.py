@@ -0,0 +1,75 @@
+"""Splitting a JSON array without decoding it must yield the same elements as the incremental decoder."""
+import gzip
+import json
+
+import pytest
+
+import log_stream
+from log_stream import iter_json_values, iter_records, split_json_array
+
+CASES = {
+    "compact": '[{"a": 1}, {"b": [1, 2, {"c": "]}\\" ,{"}]}, 3, "x", null, [], {}]',
+    "indented": json.dumps([{"name": "café ☃", "n": [1.5e3, -2]}, {"q": {"r": [[], [{}]]}}], indent=2),
+    "empty": " [ ] ",
+}
+
+
+def incremental(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return list(iter_json_values([f.read()], raw=True))
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_split_matches_incremental_decoder(tmp_path, name):
+    if log_stream.msgspec is None:
+        pytest.skip("msgspec is not installed")
+    path = tmp_path / "records.json"
+    path.write_text(CASES[name], encoding="utf-8")
+    assert list(split_json_array(str(path))) == incremental(path)
+    assert list(iter_records(str(path), raw=True)) == incremental(path)
+
+
+@pytest.mark.parametrize("text", ['{"a": 1}', '{"a": 1}\n{"a": 2}\n', "[1, 2", ""])
+def test_split_declines_anything_but_a_valid_array(tmp_path, text):
+    path = tmp_path / "records.json"
+    path.write_text(text, encoding="utf-8")
+    assert split_json_array(str(path)) is None
+
+
+def test_split_declines_gzip(tmp_path):
+    path = tmp_path / "records.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write('[{"a": 1}]')
+    assert split_json_array(str(path)) is None
+    assert list(iter_records(str(path), raw=True)) == ['{"a": 1}']
+
+
+TRICKY = ('[{"s": "a \\" \\\\ \\u00e9 ☃ ]},", "n": [-1.5e+10, 0, 12345678901234567890, -0.0], '
+          '"l": [true, false, null]}, "x", 3.25, [], {}, [{"deep": [[{"k": "v"}]]}]]')
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64])
+def test_values_split_across_chunks(size):
+    chunks = [TRICKY[i:i + size] for i in range(0, len(TRICKY), size)]
+    assert list(iter_json_values(chunks)) == json.loads(TRICKY)
+    assert list(iter_json_values(chunks, raw=True)) == incremental_text(TRICKY)
+
+
+def incremental_text(text):
+    return list(iter_json_values([text], raw=True))
+
+
+@pytest.mark.parametrize("bad", ['{"a": tru}', '{"a": 1 "b": 2}', '{"a": [1, 2}', '{"a": "x\x01"}'])
+def test_invalid_value_raises_without_reading_on(bad):
+    read = []
+
+    def chunks():
+        yield '[{"ok": 1}, ' + bad + ", "
+        for i in range(1000):
+            read.append(i)
+            yield '{"padding": "' + "x" * 1000 + '"}, '
+        yield "1]"
+
+    with pytest.raises(ValueError):
+        list(iter_json_values(chunks()))
+    assert len(read) <= 1
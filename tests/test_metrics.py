@@ -0,0 +1,33 @@
+"""Metrics merges entries whose labels only differ in order or type when exporting."""
+from metrics import Metrics
+
+
+def test_counters_with_equal_labels_are_summed():
+    metrics = Metrics()
+    metrics.inc("uploads_total", result="created", attempt=1)
+    metrics.inc("uploads_total", 2, attempt="1", result="created")
+    assert metrics.counter("uploads_total", result="created", attempt=1) == 3
+    assert [c["value"] for c in metrics.summary()["counters"]] == [3]
+
+
+def test_histograms_with_equal_labels_are_merged():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.observe("http_request_seconds", 0.05, endpoint="create", status=201)
+    metrics.observe("http_request_seconds", 0.5, status="201", endpoint="create")
+    metrics.observe("http_request_seconds", 5.0, status=201, endpoint="create")
+    metrics.observe("http_request_seconds", 0.05, endpoint="create", status=500)
+
+    histograms = metrics.summary()["histograms"]
+    assert [(h["labels"]["status"], h["count"]) for h in histograms] == [("201", 3), ("500", 1)]
+    merged = histograms[0]
+    assert merged["sum"] == 5.55
+    assert merged["buckets"] == {"0.1": 1, "1.0": 1, "+Inf": 1}
+    assert merged["p50"] == 1.0
+
+    text = metrics.prometheus()
+    assert 'shadow_ai_http_request_seconds_bucket{endpoint="create",status="201",le="1.0"} 2' in text
+    assert 'shadow_ai_http_request_seconds_count{endpoint="create",status="201"} 3' in text
+    assert text.count('_count{endpoint="create",status="201"}') == 1
+
+    # Exporting does not change what was recorded
+    assert metrics.summary()["histograms"][0]["count"] == 3
@@ -0,0 +1,96 @@
+"""NameIndex renaming and paging through the existing remote names."""
+import threading
+
+import pytest
+
+from name_index import NameIndex, iter_remote_names
+
+
+def test_reserve_renames_collisions_to_the_lowest_free_suffix():
+    index = NameIndex(["Chatbot", "Chatbot_2", "Chatbot_4"])
+    assert index.reserve("Scorer") == "Scorer"
+    assert [index.reserve("Chatbot") for _ in range(3)] == ["Chatbot_3", "Chatbot_5", "Chatbot_6"]
+    assert index.reserve("Scorer") == "Scorer_2"
+    assert "Chatbot_6" in index and len(index) == 8
+
+
+def test_reserve_skips_names_added_later():
+    index = NameIndex(["Chatbot"])
+    assert index.reserve("Chatbot") == "Chatbot_2"
+    index.add("Chatbot_3")
+    assert index.reserve("Chatbot") == "Chatbot_4"
+
+
+def test_reserve_is_unique_across_threads():
+    index = NameIndex(["Chatbot"])
+    reserved = []
+
+    def worker():
+        for _ in range(200):
+            reserved.append(index.reserve("Chatbot"))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(reserved) == sorted(f"Chatbot_{n}" for n in range(2, 802))
+
+
+class Response:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+
+class ListingClient:
+    """list_use_cases over `names`, honouring the paging parameters unless paged is False"""
+
+    def __init__(self, names, paged=True, shape=lambda items: {"data": items}):
+        self.names = names
+        self.paged = paged
+        self.shape = shape
+        self.pages = []
+
+    def list_use_cases(self, params):
+        page, size = params["page[number]"], params["page[size]"]
+        self.pages.append(page)
+        names = self.names[(page - 1) * size:page * size] if self.paged else self.names
+        return Response(self.shape([{"id": str(i), "name": name} for i, name in enumerate(names)]))
+
+
+@pytest.mark.parametrize("count, pages", [(0, [1]), (7, [1, 2, 3]), (9, [1, 2, 3, 4]), (2, [1])])
+def test_remote_names_are_paged_until_a_short_or_empty_page(count, pages):
+    names = [f"Use case {i}" for i in range(count)]
+    client = ListingClient(names)
+    assert list(iter_remote_names(client, page_size=3)) == names
+    assert client.pages == pages
+
+
+def test_api_ignoring_paging_is_read_once():
+    names = [f"Use case {i}" for i in range(5)]
+    client = ListingClient(names, paged=False)
+    assert list(iter_remote_names(client, page_size=5)) == names
+    assert client.pages == [1, 2]
+
+
+def test_names_under_attributes_and_items():
+    def shape(items):
+        return {"data": {"items": [{"id": item["id"], "attributes": {"name": item["name"]}} for item in items]
+                         + [{"id": "x"}, "junk"]}}
+
+    client = ListingClient(["Chatbot", "Scorer"], shape=shape)
+    assert list(iter_remote_names(client, page_size=2)) == ["Chatbot", "Scorer"]
+
+
+def test_failed_listing_raises():
+    class FailingClient:
+        def list_use_cases(self, params):
+            return Response({"errors": ["unauthorized"]}, status_code=401)
+
+    with pytest.raises(RuntimeError, match="status 401"):
+        list(iter_remote_names(FailingClient()))
@@ -0,0 +1,102 @@
+"""Threaded pipeline stages: ordering, error propagation, early shutdown and backpressure."""
+import threading
+import time
+
+import pytest
+
+from metrics import Metrics
+from pipeline import Pipeline, background
+
+
+class Source:
+    """Generator of 0, 1, 2, ... that records how far it got and whether it was closed"""
+
+    def __init__(self, limit=None, fail_at=None):
+        self.limit = limit
+        self.fail_at = fail_at
+        self.produced = 0
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        try:
+            while self.limit is None or self.produced < self.limit:
+                if self.produced == self.fail_at:
+                    raise ValueError(f"bad record {self.produced}")
+                yield self.produced
+                self.produced += 1
+        finally:
+            self.closed.set()
+
+
+def pipeline_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("pipeline-")]
+
+
+def chain(source, queue_size, batch_size=8):
+    pipeline = Pipeline(queue_size, batch_size, metrics=Metrics())
+    items = pipeline.stage("read", source)
+    items = pipeline.stage("double", (x * 2 for x in items))
+    return pipeline.stage("save", (x + 1 for x in items))
+
+
+@pytest.mark.parametrize("queue_size", [0, 1, 5, 1000])
+def test_items_arrive_in_order(queue_size):
+    assert list(chain(Source(limit=500), queue_size)) == [x * 2 + 1 for x in range(500)]
+    assert not pipeline_threads()
+
+
+@pytest.mark.parametrize("queue_size", [0, 100])
+def test_error_in_first_stage_reaches_the_consumer(queue_size):
+    source = Source(fail_at=250)
+    received = []
+    with pytest.raises(ValueError, match="bad record 250"):
+        for x in chain(source, queue_size):
+            received.append(x)
+    # Everything before the failure was delivered, nothing after it
+    assert received == [x * 2 + 1 for x in range(250)]
+    assert source.closed.is_set()
+    assert not pipeline_threads()
+
+
+@pytest.mark.parametrize("queue_size", [0, 100])
+def test_consumer_stopping_early_shuts_every_stage_down(queue_size):
+    source = Source()
+    items = chain(source, queue_size)
+    assert [next(items) for _ in range(10)] == [x * 2 + 1 for x in range(10)]
+    items.close()
+    # close() returns only once every stage stopped and the source's cleanup ran
+    assert source.closed.is_set()
+    assert not pipeline_threads()
+
+
+def test_full_queue_blocks_the_producer():
+    queue_size, batch_size = 10, 2
+    source = Source()
+    metrics = Metrics()
+    items = background(source, "read", queue_size, batch_size, metrics)
+    assert next(items) == 0
+    time.sleep(0.3)
+    # The queue, the batch the consumer holds and the one the producer is trying to hand over
+    assert source.produced <= queue_size + 2 * batch_size + 1
+    stalled = source.produced
+    time.sleep(0.2)
+    assert source.produced == stalled
+
+    # Consuming makes room again
+    assert [next(items) for _ in range(50)] == list(range(1, 51))
+    assert source.produced > stalled
+    items.close()
+    assert not pipeline_threads()
+    assert metrics.stages["read_blocked"].seconds > 0.2
+
+
+def test_queue_size_zero_runs_in_the_consuming_thread():
+    seen = set()
+
+    def record(items):
+        for x in items:
+            seen.add(threading.current_thread().name)
+            yield x
+
+    assert list(Pipeline(0, metrics=Metrics()).stage("read", record(range(5)))) == list(range(5))
+    assert seen == {threading.current_thread().name}
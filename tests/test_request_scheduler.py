@@ -0,0 +1,116 @@
+"""Retry policy and circuit breaker of RequestScheduler."""
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from request_scheduler import CircuitBreaker, RequestScheduler
+
+
+def response(status, retry_after=None):
+    r = requests.Response()
+    r.status_code = status
+    if retry_after is not None:
+        r.headers["Retry-After"] = retry_after
+    return r
+
+
+def attempts(outcome, idempotent):
+    """Number of times RequestScheduler sends a request whose every attempt ends in outcome"""
+    sent = []
+
+    def send():
+        sent.append(1)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    scheduler = RequestScheduler(rate=0, max_retries=2, base_delay=0)
+    try:
+        scheduler.request(send, idempotent=idempotent)
+    except requests.RequestException:
+        pass
+    return len(sent)
+
+
+def refused():
+    """The ConnectionError requests raises when nothing listens on the port"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    try:
+        requests.post(f"http://127.0.0.1:{port}/", timeout=1)
+    except requests.ConnectionError as e:
+        return e
+    pytest.skip("port unexpectedly accepted a connection")
+
+
+@pytest.mark.parametrize("outcome,retried", [
+    (response(429), True),
+    (response(503, "0"), True),
+    (response(503), False),
+    (response(500), False),
+    (response(502), False),
+    (response(504), False),
+    (requests.ReadTimeout("read timed out"), False),
+    (requests.ConnectTimeout("connect timed out"), True),
+])
+def test_post_retried_only_when_not_processed(outcome, retried):
+    assert attempts(outcome, idempotent=False) == (3 if retried else 1)
+    assert attempts(outcome, idempotent=True) == 3
+
+
+def test_post_retried_after_connection_refused():
+    assert attempts(refused(), idempotent=False) == 3
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def half_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    return breaker
+
+
+@pytest.mark.parametrize("probe_succeeds", [True, False])
+def test_half_open_lets_a_single_probe_through(probe_succeeds):
+    breaker = half_open_breaker()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(breaker.allow())) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: results)
+    # Everyone else waits for the probe's outcome
+    time.sleep(0.05)
+    assert results == [True]
+    if probe_succeeds:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+    for thread in threads:
+        thread.join(2)
+    assert results == [True] + [probe_succeeds] * 5
+
+
+def test_probe_that_raises_lets_the_next_caller_probe():
+    breaker = half_open_breaker()
+    scheduler = RequestScheduler(rate=0, max_retries=0)
+    scheduler.breaker = breaker
+
+    def send():
+        raise RuntimeError("not a request failure")
+
+    with pytest.raises(RuntimeError):
+        scheduler.request(send)
+    assert scheduler.request(lambda: response(200)).status_code == 200
+    assert breaker.state == "closed"
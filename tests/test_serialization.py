@@ -0,0 +1,91 @@
+"""Every JSON backend encodes and decodes the same way."""
+import json
+
+import pytest
+
+import serialization
+from compact_record import CompactRecord
+from serialization import Serializer, available_backends
+
+BACKENDS = available_backends()
+
+DOCUMENT = {
+    "name": "Chatbot",
+    "tags": ["Retail", "E-commerce"],
+    "empty": {"list": [], "dict": {}},
+    "numbers": [0, -1, 2 ** 53, 1.5, True, False, None],
+    "nested": {"b": [{"y": 1, "x": 2}], "a": "z"},
+}
+
+
+@pytest.fixture(params=BACKENDS)
+def serializer(request):
+    return Serializer(request.param)
+
+
+def test_auto_prefers_the_fastest_installed():
+    assert Serializer().backend == BACKENDS[0]
+    assert BACKENDS[-1] == "json"
+
+
+def test_unknown_backend():
+    with pytest.raises(ImportError):
+        Serializer("simdjson")
+
+
+def test_unavailable_backend(monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+    with pytest.raises(ImportError):
+        Serializer("orjson")
+    assert Serializer().backend != "orjson"
+
+
+@pytest.mark.parametrize("indent", [False, True])
+@pytest.mark.parametrize("sort_keys", [False, True])
+def test_layout_matches_the_stdlib(serializer, indent, sort_keys):
+    expected = Serializer("json").dumps(DOCUMENT, indent=indent, sort_keys=sort_keys)
+    assert serializer.dumps(DOCUMENT, indent=indent, sort_keys=sort_keys) == expected
+    assert serializer.dumpb(DOCUMENT, indent=indent, sort_keys=sort_keys) == expected.encode("utf-8")
+    if indent:
+        assert expected == json.dumps(DOCUMENT, indent=2, sort_keys=sort_keys)
+
+
+def test_round_trip(serializer):
+    text = serializer.dumps(DOCUMENT)
+    assert serializer.loads(text) == serializer.loads(text.encode("utf-8")) == DOCUMENT
+
+
+def test_non_ascii_decodes_the_same(serializer):
+    value = {"name": "Café ☕", "emoji": "\U0001F916"}
+    assert serializer.loads(serializer.dumpb(value)) == value
+    assert json.loads(serializer.dumps(value)) == value
+
+
+def test_compact_records_go_through_default(serializer):
+    record = CompactRecord(DOCUMENT)
+    assert serializer.dumps({"use_cases": [record]}) == serializer.dumps({"use_cases": [DOCUMENT]})
+
+
+def test_unencodable_values_raise_type_error(serializer):
+    with pytest.raises(TypeError):
+        serializer.dumps({"value": object()})
+
+
+def test_invalid_input_raises_value_error(serializer):
+    for data in ("{", b"[1,", "nope"):
+        with pytest.raises(ValueError):
+            serializer.loads(data)
+
+
+def test_dump_writes_text(serializer, tmp_path):
+    path = tmp_path / "out.json"
+    with open(path, "w", encoding="utf-8") as f:
+        serializer.dump(DOCUMENT, f, indent=True)
+    assert path.read_text(encoding="utf-8") == Serializer("json").dumps(DOCUMENT, indent=True)
+
+
+def test_orjson_falls_back_for_big_integers():
+    if "orjson" not in BACKENDS:
+        pytest.skip("orjson is not installed")
+    value = {"id": 2 ** 70, "list": [2 ** 64]}
+    assert Serializer("orjson").dumps(value) == json.dumps(value, separators=(",", ":"))
@@ -0,0 +1,81 @@
+"""Incremental sync: the fingerprint store and the new/changed/unchanged split."""
+import pytest
+
+import shadow_ai_detector
+from sync_store import FingerprintStore, sync_key
+
+
+@pytest.fixture
+def formatter(monkeypatch):
+    monkeypatch.setenv("CREDO_AI_API_KEY", "test")
+    monkeypatch.setenv("PREFETCH_NAMES", "false")
+    formatter = shadow_ai_detector.UseCaseFormatter()
+    formatter.updates = []
+    formatter.update_ok = True
+
+    def update_one(i, use_case_id, use_case):
+        formatter.updates.append((use_case_id, use_case["description"]))
+        return formatter.update_ok
+
+    formatter._update_one = update_one
+    return formatter
+
+
+def sync(formatter, path, use_cases, created=None):
+    """One sync run; `created` maps each yielded use case's description to the id it gets, in creation order"""
+    with FingerprintStore(str(path)) as store:
+        new = list(formatter.iter_sync_changes(use_cases, store))
+        for description, use_case_id in (created or {}).items():
+            formatter.on_created(next(u for u in new if u["description"] == description), use_case_id)
+    return [use_case["description"] for use_case in new]
+
+
+def test_sync_key_tells_duplicates_apart():
+    use_case = {"name": "Chatbot", "description": "a"}
+    assert sync_key(use_case) == sync_key({"name": "Chatbot", "description": "b"})
+    assert sync_key(use_case, occurrence=1) != sync_key(use_case)
+    assert sync_key(use_case, ("name", "description")) != sync_key(use_case)
+
+
+def test_only_new_use_cases_are_uploaded_and_changed_ones_updated(formatter, tmp_path):
+    path = tmp_path / "sync_state.jsonl"
+    first = [{"name": "Chatbot", "description": "one"}, {"name": "Chatbot", "description": "two"},
+             {"name": "Scorer", "description": "three"}]
+    # Duplicates may be created out of order
+    assert sync(formatter, path, first, {"two": "id-2", "three": "id-3", "one": "id-1"}) == ["one", "two", "three"]
+
+    second = [{"name": "Chatbot", "description": "one"}, {"name": "Chatbot", "description": "two, changed"},
+              {"name": "Scorer", "description": "three"}, {"name": "Router", "description": "four"}]
+    assert sync(formatter, path, second, {"four": "id-4"}) == ["four"]
+    assert formatter.updates == [("id-2", "two, changed")]
+
+    formatter.updates.clear()
+    assert sync(formatter, path, second) == []
+    assert formatter.updates == []
+
+
+def test_failed_update_is_retried_next_run(formatter, tmp_path):
+    path = tmp_path / "sync_state.jsonl"
+    sync(formatter, path, [{"name": "Chatbot", "description": "one"}], {"one": "id-1"})
+    formatter.update_ok = False
+    assert sync(formatter, path, [{"name": "Chatbot", "description": "changed"}]) == []
+    formatter.update_ok = True
+    assert sync(formatter, path, [{"name": "Chatbot", "description": "changed"}]) == []
+    assert formatter.updates == [("id-1", "changed"), ("id-1", "changed")]
+
+
+def test_use_case_that_was_never_created_is_sent_again(formatter, tmp_path):
+    path = tmp_path / "sync_state.jsonl"
+    assert sync(formatter, path, [{"name": "Chatbot", "description": "one"}]) == ["one"]
+    assert sync(formatter, path, [{"name": "Chatbot", "description": "one"}], {"one": "id-1"}) == ["one"]
+    assert sync(formatter, path, [{"name": "Chatbot", "description": "one"}]) == []
+
+
+def test_store_compacts_rewritten_keys(tmp_path):
+    path = tmp_path / "sync_state.jsonl"
+    with FingerprintStore(str(path)) as store:
+        for n in range(1200):
+            store.record("key", f"fp-{n}", "id-1")
+    with FingerprintStore(str(path)) as store:
+        assert store.get("key") == ("fp-1199", "id-1")
+        assert store.lines == 1
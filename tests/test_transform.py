@@ -0,0 +1,57 @@
+"""reformat_json.py and reformat_json_fixed.py write exactly what the original scripts did."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.synthetic import make_events
+from transform import ms_to_iso, ms_to_iso_batch
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = "4ed4186"  # last commit with the standalone scripts
+EXPORT = "2024-11-27T21-22-14-584Z-2024-11-27T19-08-09-738Z.json"
+
+
+def events():
+    sample = make_events(300)
+    sample[0]["startTime"] = 1734388169000  # whole second: isoformat() drops the fraction
+    sample[1] = {"traceId": "sparse", "startTime": 0, "endTime": 1}
+    sample[2]["userClaim"] = {"name": "Zoë Ångström", "email": "zoe@example.com"}
+    sample[3]["policyDecision"] = {"label": "UNKNOWN"}
+    return sample
+
+
+def legacy_source(script):
+    try:
+        return subprocess.run(["git", "show", f"{BASELINE}:{script}"], cwd=REPO, check=True,
+                              capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip(f"{script} of {BASELINE} is not available")
+
+
+def run(args, cwd):
+    subprocess.run([sys.executable, *args], cwd=cwd, check=True, capture_output=True)
+    return (cwd / "reformatted_use_cases.json").read_bytes()
+
+
+@pytest.mark.parametrize("script", ["reformat_json.py", "reformat_json_fixed.py"])
+def test_wrapper_output_matches_legacy_script(tmp_path, script):
+    (tmp_path / EXPORT).write_text(json.dumps(events()), encoding="utf-8")
+    legacy = tmp_path / f"legacy_{script}"
+    # reformat_json_fixed.py read a hardcoded absolute path
+    source = legacy_source(script).replace("/Users/evan/Downloads/user-activity-logs-clean/", "", 1)
+    legacy.write_text(source.replace("2024-12-16T22-29-31-214Z-2024-12-16T22-27-24-147Z.json", EXPORT),
+                      encoding="utf-8")
+    expected = run([str(legacy)], tmp_path)
+
+    args = [os.path.join(REPO, script)] + ([EXPORT] if script == "reformat_json_fixed.py" else [])
+    assert run(args, tmp_path) == expected
+
+
+def test_ms_to_iso_batch_matches_ms_to_iso():
+    values = [0, 1, 999, 1000, -1, -1500, 1734388169000, 1734388169128, 1734388169128.5, None, 86400000 * 20000]
+    assert ms_to_iso_batch(values) == [ms_to_iso(v) for v in values]
+    assert ms_to_iso(1734388169128) == "2024-12-16T22:29:29.128000Z"
+    assert ms_to_iso(1734388169000) == "2024-12-16T22:29:29Z"
@@ -0,0 +1,118 @@
+"""Typed decoding of raw events gives the same use cases as the generic dict path."""
+import json
+
+import pytest
+
+pytest.importorskip("msgspec")
+
+from benchmarks.synthetic import make_events, write_records
+from metrics import METRICS
+from transform import DEFAULT_MAPPING, Transformer
+from typed_events import DecodeError, EventDecoder, event_decoder, mapping_paths
+
+EVENTS = make_events(200)
+
+
+def test_mapping_paths():
+    paths = mapping_paths(DEFAULT_MAPPING)
+    assert ("intent.request.0.actionName", "string") in paths
+    assert ("startTime", "number") in paths
+    assert ("userClaim.email", "string") in paths
+    assert all("value" not in path for path, _ in paths)
+
+
+def test_decodes_only_the_mapped_fields():
+    decoder = EventDecoder(DEFAULT_MAPPING)
+    event = dict(EVENTS[0], unrelated={"big": list(range(100))})
+    decoded = decoder.decode(json.dumps(event).encode())
+    assert getattr(decoded, decoder.attr("traceId")) == event["traceId"]
+    assert getattr(decoded, decoder.attr("startTime")) == event["startTime"]
+    request = getattr(getattr(decoded, decoder.attr("intent")), decoder.attr("intent.request"))
+    assert getattr(request[0], decoder.attr("intent.request.0.actionName")) == \
+        event["intent"]["request"][0]["actionName"]
+    assert not hasattr(decoded, "unrelated")
+
+
+def test_missing_fields():
+    decoder = EventDecoder(DEFAULT_MAPPING)
+    decoded = decoder.decode(b'{"traceId": "t"}')
+    assert getattr(decoded, decoder.attr("serviceName")) is decoder.missing
+    assert getattr(decoded, decoder.attr("intent")) is None
+    assert getattr(decoded, decoder.attr("traceId")) == "t"
+
+
+@pytest.mark.parametrize("line", [
+    b'{"traceId": 5}',
+    b'{"startTime": "yesterday"}',
+    b'{"startTime": true}',
+    b'{"intent": {"request": {"0": {}}}}',
+    b'{"traceId": "t"',
+])
+def test_unexpected_types_raise_decode_error(line):
+    with pytest.raises(DecodeError):
+        EventDecoder(DEFAULT_MAPPING).decode(line)
+
+
+def test_integer_and_any_types():
+    mapping = {"count": {"path": "n", "type": "integer"}, "raw": {"path": "extra", "type": "any"}}
+    decoder = EventDecoder(mapping)
+    decoded = decoder.decode(b'{"n": 3, "extra": {"x": [1]}}')
+    assert getattr(decoded, decoder.attr("n")) == 3
+    assert getattr(decoded, decoder.attr("extra")) == {"x": [1]}
+    with pytest.raises(DecodeError):
+        decoder.decode(b'{"n": 1.5}')
+
+
+@pytest.mark.parametrize("mapping", [
+    {"a": {"path": "x.y"}, "b": {"path": "x"}},
+    {"a": {"path": "x.0"}, "b": {"path": "x.y"}},
+    {"a": {"path": "0.x"}},
+    {"a": {"path": "x", "type": "date"}},
+])
+def test_untypeable_mappings_fall_back_to_dicts(mapping):
+    with pytest.raises(ValueError):
+        EventDecoder(mapping)
+    assert event_decoder(mapping) is None
+
+
+def test_decode_array():
+    decoder = EventDecoder(DEFAULT_MAPPING)
+    decoded = decoder.decode_array(json.dumps(EVENTS).encode())
+    assert [getattr(event, decoder.attr("traceId")) for event in decoded] == [e["traceId"] for e in EVENTS]
+    with pytest.raises(DecodeError):
+        decoder.decode_array(b'[{"traceId": 1}]')
+
+
+def test_typed_lines_match_the_dict_path():
+    # Including events that lack fields, which get the mapping's defaults
+    events = EVENTS + [{}, {"traceId": "t", "intent": None}, {"intent": {"request": []}}]
+    lines = [json.dumps(event).encode() for event in events]
+    typed, generic = Transformer(batch_size=64), Transformer(batch_size=64, typed=False)
+    assert typed.decoder is not None and generic.decoder is None
+    assert list(typed.transform_lines(lines)) == list(generic.transform(events))
+
+
+def test_events_of_unexpected_types_fall_back():
+    events = [dict(event) for event in EVENTS[:10]]
+    events[3]["traceId"] = 12345
+    events[7]["userClaim"] = {"name": 7, "email": None}
+    lines = [json.dumps(event).encode() for event in events]
+    fallbacks = METRICS.counter("typed_decode_fallbacks_total")
+    assert list(Transformer().transform_lines(lines)) == list(Transformer(typed=False).transform(events))
+    assert METRICS.counter("typed_decode_fallbacks_total") == fallbacks + 2
+
+
+@pytest.mark.parametrize("name", ["events.json", "events.ndjson"])
+def test_typed_files_match_the_dict_path(tmp_path, name):
+    path = str(tmp_path / name)
+    write_records(path, EVENTS)
+    expected = list(Transformer(typed=False).transform_path(path))
+    assert list(Transformer(batch_size=50).transform_path(path)) == expected
+
+
+def test_array_of_unexpected_types_is_read_generically(tmp_path):
+    events = [dict(event) for event in EVENTS[:5]]
+    events[2]["serviceName"] = ["not", "a", "string"]
+    path = str(tmp_path / "events.json")
+    write_records(path, events)
+    assert list(Transformer().transform_path(path)) == list(Transformer(typed=False).transform(events))
@@ -0,0 +1,33 @@
+"""format_use_cases must reuse cached results even though formatting generates fresh ids."""
+import contextlib
+import io
+
+from schema_validator import format_use_cases, open_cache
+
+USE_CASES = [
+    {"name": "Chatbot", "ai_type": "llm", "custom_fields": [{"name": "owner", "value": "ops"}],
+     "questionnaires": [{"sections": [{"title": "Risk", "questions": [{"answer": "low"}]}]}]},
+    {"name": "Scorer", "ai_type": "ml", "inserted_at": 5},
+]
+
+
+def run(path):
+    cache = open_cache(str(path))
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        formatted = format_use_cases(USE_CASES, cache)
+    hits, misses, entries = cache.hits, cache.misses, len(cache.entries)
+    cache.close()
+    return formatted, output.getvalue(), (hits, misses, entries)
+
+
+def test_second_run_hits_cache(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    first, first_warnings, first_stats = run(path)
+    second, second_warnings, second_stats = run(path)
+    assert first_stats == (0, 2, 2)
+    assert second_stats == (2, 0, 2)
+    # The generated ids differ, the verdicts do not
+    assert first[0]["id"] != second[0]["id"]
+    assert "inserted_at must be a string" in second_warnings
+    assert second_warnings.count("Warning") == first_warnings.count("Warning") == 1
@@ -0,0 +1,65 @@
+"""The compiled schema validator must give the same verdict as StrictValidator."""
+import copy
+import json
+
+import pytest
+
+from benchmarks.synthetic import make_use_cases
+from compiled_validator import CompiledValidator
+from strict_validator import StrictValidator
+from validation_cache import SCHEMA_PATH
+
+with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+    DEFINITIONS = json.load(f)["definitions"]
+
+# Object -> its definition, found by walking the use case
+CHILDREN = {"custom_fields": "custom_field", "questionnaires": "questionnaire",
+            "sections": "section", "questions": "question"}
+
+
+def objects(value, definition="use_case", path=()):
+    """(path, definition) of every object in a use case"""
+    yield path, definition
+    for key, child in CHILDREN.items():
+        for i, item in enumerate(value.get(key, []) if definition != "question" else []):
+            yield from objects(item, child, path + (key, i))
+
+
+def at(record, path):
+    for key in path:
+        record = record[key]
+    return record
+
+
+def mutations(record):
+    """Copies of a valid record with one required field removed, retyped, or an extra field added"""
+    for path, definition in list(objects(record)):
+        for field in DEFINITIONS[definition]["required"]:
+            for change in ("drop", "retype"):
+                mutated = copy.deepcopy(record)
+                target = at(mutated, path)
+                if change == "drop":
+                    del target[field]
+                else:
+                    # A list is never a valid scalar, nor an object a valid list
+                    target[field] = {} if isinstance(target[field], list) else []
+                yield f"{change} {'.'.join(map(str, path + (field,)))}", mutated
+        mutated = copy.deepcopy(record)
+        at(mutated, path)["unexpected"] = 1
+        yield f"extra field in {'.'.join(map(str, path)) or 'use case'}", mutated
+
+
+RECORD = make_use_cases(1, sections=2, questions=2, custom_fields=2)[0]
+
+
+def test_valid_record_passes_both():
+    assert StrictValidator().validate_use_case(RECORD)
+    assert CompiledValidator().validate(RECORD) == []
+
+
+@pytest.mark.parametrize("name,record", list(mutations(RECORD)), ids=lambda v: v if isinstance(v, str) else "")
+def test_same_verdict(name, record):
+    strict = StrictValidator().validate_use_case(record)
+    compiled = CompiledValidator().is_valid(record)
+    assert not strict
+    assert compiled == strict
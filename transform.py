@@ -0,0 +1,345 @@
+import json
+import logging
+from datetime import datetime, UTC
+from functools import lru_cache
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional, only speeds up timestamp conversion
+    np = None
+
+from columnar import format_for_path, write_use_cases
+from log_stream import iter_ndjson_lines, iter_records, read_byte_range, read_whole_file
+from metrics import METRICS
+from serialization import dumps, loads
+from typed_events import DecodeError, EventDecoder, event_decoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# policyDecision label -> Credo AI governance_status
+GOVERNANCE_MAPPING = {
+    "REROUTE": 1,
+    "INLINE_BLOCK": 2,
+    "REDACT": 3
+}
+
+# Output field -> how to produce it from a raw gateway event, in output order.
+#   {"value": x}                          JSON constant
+#   {"path": "a.b.0.c", "default": x}     nested lookup; default only when a key is missing
+#   "as": "list" | "governance" | "timestamp"   post-processing of the looked up value
+#   "type": "string" | "integer" | "number" | "boolean" | "any"   JSON type the typed decoder
+#                                         expects (default: number for timestamps, else string)
+# "custom_fields" is a list of {"custom_field_id", "name", "path", "default"}.
+DEFAULT_MAPPING: Dict[str, Any] = {
+    "id": {"path": "traceId", "default": ""},
+    "name": {"path": "intent.request.0.actionName", "default": "Unknown Use Case"},
+    "description": {"path": "intent.request.0.departmentName", "default": "No description"},
+    "ai_type": {"path": "serviceName", "default": "Unknown AI"},
+    "governance_status": {"path": "policyDecision.label", "default": "", "as": "governance"},
+    "domains": {"value": []},
+    "industries": {"path": "intent.request.0.departmentName", "default": "General", "as": "list"},
+    "regions": {"value": []},
+    "risk_category_level": {"value": None},
+    "custom_fields": [
+        {"custom_field_id": "user_001", "name": "User Name", "path": "userClaim.name", "default": "Unknown"},
+        {"custom_field_id": "email_001", "name": "User Email", "path": "userClaim.email", "default": "Unknown"},
+        {"custom_field_id": "ip_001", "name": "Client IP", "path": "clientIp.remoteAddr", "default": "Unknown"}
+    ],
+    "questionnaires": {"value": []},
+    "inserted_at": {"path": "startTime", "default": 0, "as": "timestamp"},
+    "updated_at": {"path": "endTime", "default": 0, "as": "timestamp"}
+}
+
+_MISSING = object()
+
+
+def ms_to_iso(ms: Optional[float]) -> str:
+    """Epoch milliseconds -> "2024-12-16T22:29:29.128000Z", as written by reformat_json.py"""
+    return datetime.fromtimestamp((ms or 0) / 1000, UTC).replace(tzinfo=None).isoformat() + "Z"
+
+
+@lru_cache(maxsize=4096)
+def _second_to_iso(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, UTC).replace(tzinfo=None).isoformat()
+
+
+# Whole milliseconds -> the fraction isoformat() appends (none for .000)
+_MILLIS_SUFFIX = ["Z"] + [f".{millis:03d}000Z" for millis in range(1, 1000)]
+
+
+def ms_to_iso_batch(values: List[Any]) -> List[str]:
+    """ms_to_iso over a whole column, vectorized with NumPy when it is installed.
+
+    Without NumPy, integer timestamps are split into whole seconds, which
+    repeat across the events of a log and are formatted once each, and
+    milliseconds.
+    """
+    if np is not None and values and all(type(v) is int for v in values):
+        strings = np.datetime_as_string(np.array(values, dtype="int64").astype("datetime64[ms]"), unit="us")
+        # isoformat() drops an all-zero fraction
+        return [s[:-7] + "Z" if s.endswith(".000000") else s + "Z" for s in strings.tolist()]
+    return [_second_to_iso(v // 1000) + _MILLIS_SUFFIX[v % 1000] if type(v) is int else ms_to_iso(v)
+            for v in values]
+
+
+def compile_mapping(mapping: Dict[str, Any],
+                    decoder: Optional[EventDecoder] = None) -> Tuple[Callable[[Any], Dict[str, Any]], List[str]]:
+    """Generate a function that builds one use case from one record.
+
+    Every nested path is looked up once per record, with shared prefixes
+    (e.g. intent.request.0) resolved a single time; numeric segments index
+    into lists. Timestamp fields are left as raw milliseconds so they can
+    be converted a whole column at a time; their names are returned
+    alongside the function.
+
+    With a decoder (typed_events.EventDecoder) the function reads the
+    decoder's Structs instead of dicts and builds the same use case.
+    """
+    lines = ["def _transform(r):"]
+    names = {"": "r"}
+    constants: Dict[str, Any] = {"_M": _MISSING if decoder is None else decoder.missing, "_G": GOVERNANCE_MAPPING}
+    timestamp_fields = []
+
+    def lookup(item: Dict[str, Any]) -> str:
+        parent = ""
+        segments = item["path"].split(".")
+        for i, segment in enumerate(segments):
+            prefix = f"{parent}.{segment}" if parent else segment
+            if prefix not in names:
+                var = names[prefix] = f"v{len(names)}"
+                src = names[parent]
+                if decoder is not None:
+                    # A missing value is _M (UNSET), a missing object or list None
+                    missing = "_M" if i == len(segments) - 1 else "None"
+                    if segment.isdigit():
+                        index = int(segment)
+                        lines.append(f"    {var} = {src}[{index}] if {src} is not None and len({src}) > {index} "
+                                     f"else {missing}")
+                    elif src == "r":
+                        lines.append(f"    {var} = r.{decoder.attr(prefix)}")
+                    else:
+                        lines.append(f"    {var} = {src}.{decoder.attr(prefix)} if {src} is not None else {missing}")
+                elif segment.isdigit():
+                    index = int(segment)
+                    lines.append(f"    {var} = {src}[{index}] if type({src}) is list and len({src}) > {index} else _M")
+                else:
+                    lines.append(f"    {var} = {src}.get({segment!r}, _M) if type({src}) is dict else _M")
+            parent = prefix
+        default = f"_D{len(constants)}"
+        constants[default] = item.get("default")
+        value = f"({default} if {names[prefix]} is _M else {names[prefix]})"
+        kind = item.get("as")
+        if kind == "governance":
+            return f"_G.get({value}, 0)"
+        if kind == "list":
+            return f"[{value}]"
+        return value
+
+    def literal(value: Any) -> str:
+        # A literal builds a fresh list/dict per record, so constants are never shared
+        if isinstance(value, (list, dict, str, int, float, bool, type(None))):
+            return repr(value)
+        raise ValueError(f"Unsupported constant in mapping: {value!r}")
+
+    fields = []
+    for field, spec in mapping.items():
+        if field == "custom_fields":
+            items = ", ".join(
+                f"{{'custom_field_id': {item['custom_field_id']!r}, 'name': {item['name']!r}, 'value': {lookup(item)}}}"
+                for item in spec
+            )
+            fields.append(f"{field!r}: [{items}]")
+        elif "path" in spec:
+            fields.append(f"{field!r}: {lookup(spec)}")
+            if spec.get("as") == "timestamp":
+                timestamp_fields.append(field)
+        else:
+            fields.append(f"{field!r}: {literal(spec['value'])}")
+    lines.append(f"    return {{{', '.join(fields)}}}")
+    exec(compile("\n".join(lines), "<transform mapping>", "exec"), constants)
+    return constants["_transform"], timestamp_fields
+
+
+class Transformer:
+    """Turn raw gateway events into use cases according to a field mapping.
+
+    With msgspec installed, transform_path() decodes NDJSON lines and JSON
+    arrays straight into typed Structs of just the mapped fields (see
+    typed_events.py) instead of dicts of whole events. A line whose fields
+    have unexpected types goes through the generic dict path instead, so
+    the output is the same either way.
+    """
+
+    def __init__(self, mapping: Optional[Dict[str, Any]] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 typed: bool = True):
+        self.mapping = mapping or DEFAULT_MAPPING
+        self.batch_size = max(1, batch_size)
+        self._transform, self.timestamp_fields = compile_mapping(self.mapping)
+        self.decoder = event_decoder(self.mapping) if typed else None
+        if self.decoder is not None:
+            self._build, _ = compile_mapping(self.mapping, self.decoder)
+
+    def _convert_timestamps(self, use_cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for field in self.timestamp_fields:
+            for use_case, value in zip(use_cases, ms_to_iso_batch([use_case[field] for use_case in use_cases])):
+                use_case[field] = value
+        return use_cases
+
+    def transform_batch(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Transform a list of records, converting timestamps column by column"""
+        return self._convert_timestamps(list(map(self._transform, records)))
+
+    def transform(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Transform a stream of records, batch_size records at a time"""
+        batch: List[Dict[str, Any]] = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                yield from self.transform_batch(batch)
+                batch = []
+        if batch:
+            yield from self.transform_batch(batch)
+
+    def _transform_lines_batch(self, lines: List[bytes]) -> List[Dict[str, Any]]:
+        decode, build, transform = self.decoder.decode, self._build, self._transform
+        use_cases = []
+        fallbacks = 0
+        for line in lines:
+            try:
+                use_cases.append(build(decode(line)))
+            except DecodeError:
+                # Not the expected types (or not JSON at all, which loads() reports)
+                fallbacks += 1
+                use_cases.append(transform(loads(line)))
+        if fallbacks:
+            METRICS.inc("typed_decode_fallbacks_total", fallbacks)
+            logger.debug("%d of %d events decoded generically", fallbacks, len(lines))
+        return self._convert_timestamps(use_cases)
+
+    def transform_lines(self, lines: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+        """Transform NDJSON lines, decoding each one straight into a typed Struct"""
+        if self.decoder is None:
+            yield from self.transform(map(loads, lines))
+            return
+        batch: List[bytes] = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= self.batch_size:
+                yield from self._transform_lines_batch(batch)
+                batch = []
+        if batch:
+            yield from self._transform_lines_batch(batch)
+
+    def _decode_array(self, path: str) -> Optional[List[Any]]:
+        """Typed events of a small uncompressed JSON array file, or None if it is anything else"""
+        data = read_whole_file(path)
+        if data is None:
+            return None
+        try:
+            return self.decoder.decode_array(data)
+        except DecodeError:
+            logger.debug(f"{path} is not an array of events of the expected types, decoding it generically")
+            return None
+
+    def transform_path(self, path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Transform the records of a log file, or of a byte range of it (see log_stream.iter_records).
+
+        NDJSON and uncompressed JSON arrays up to WHOLE_FILE_MAX_BYTES are
+        decoded into typed Structs when a decoder is available.
+        """
+        fmt = format_for_path(path)
+        if self.decoder is not None and fmt == "ndjson":
+            yield from self.transform_lines(iter_ndjson_lines(read_byte_range(path, start, end)))
+            return
+        if self.decoder is not None and fmt == "json" and not start and end is None:
+            events = self._decode_array(path)
+            if events is not None:
+                build = self._build
+                for i in range(0, len(events), self.batch_size):
+                    yield from self._convert_timestamps(list(map(build, events[i:i + self.batch_size])))
+                return
+        yield from self.transform(iter_records(path, start=start, end=end))
+
+
+def json_array_item(item: Any, indent: Optional[int] = 4) -> str:
+    """item as it appears inside an array written by json.dump(..., indent=indent).
+
+    indent None gives compact JSON from the fast backend (serialization.py).
+    """
+    if indent is None:
+        return dumps(item)
+    pad = " " * indent
+    return pad + json.dumps(item, indent=indent).replace("\n", "\n" + pad)
+
+
+def write_json_array(items: Iterable[Any], f: IO[str], indent: Optional[int] = 4) -> int:
+    """Stream items to f byte-for-byte as json.dump(list(items), f, indent=indent) would.
+
+    With indent None each item is written compact on its own line.
+    """
+    count = 0
+    for item in items:
+        f.write(",\n" if count else "[\n")
+        f.write(json_array_item(item, indent))
+        count += 1
+    f.write("\n]" if count else "[]")
+    return count
+
+
+def transform_file(input_file: str, output_file: str, mapping: Optional[Dict[str, Any]] = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE, indent: Optional[int] = 4) -> int:
+    """Transform a JSON array / NDJSON (optionally gzipped) log file into a use case file.
+
+    The output is a JSON array indented by `indent` (None for compact)
+    unless output_file ends in .ndjson/.jsonl or .parquet (see columnar.py).
+    """
+    use_cases = Transformer(mapping, batch_size).transform_path(input_file)
+    if format_for_path(output_file) != "json":
+        count = write_use_cases(use_cases, output_file)
+    else:
+        with open(output_file, "w", encoding="utf-8") as f:
+            count = write_json_array(use_cases, f, indent)
+    logger.info(f"Transformed {count} records from {input_file} into {output_file}")
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    parser = argparse.ArgumentParser(description="Reformat raw AI gateway events into Credo AI use cases")
+    parser.add_argument("input_file", help="log file, or a directory or glob pattern of rotated log files")
+    parser.add_argument("-o", "--output", default="reformatted_use_cases.json")
+    parser.add_argument("--mapping", help="JSON file with a field mapping (default: the built-in one)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="records transformed together (timestamps are converted per batch)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processes transforming files in parallel (0 = one per core)")
+    parser.add_argument("--compact", action="store_true",
+                        help="write a JSON array output without indentation (for machine-read intermediates)")
+    parser.add_argument("--state", help="incremental mode: only transform what was added to the input "
+                                        "since the last run that used this state file")
+    args = parser.parse_args(argv)
+    mapping = None
+    if args.mapping:
+        with open(args.mapping, "r", encoding="utf-8") as f:
+            mapping = json.load(f)
+    indent = None if args.compact else 4
+    from ingest import expand_sources, transform_files
+    from ingest_state import IngestState
+    files = expand_sources(args.input_file)
+    if not files:
+        parser.error(f"no log files match {args.input_file}")
+    if args.state:
+        with IngestState(args.state) as state:
+            count = transform_files(state.plan(files), args.output, mapping, args.batch_size, args.workers or None,
+                                    watermark=state.seen, indent=indent)
+            state.commit()
+    else:
+        count = transform_files(files, args.output, mapping, args.batch_size, args.workers or None, indent=indent)
+    print(f"✅ Reformatted {count} records, saved as {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import msgspec
+    from msgspec import UNSET, UnsetType
+except ImportError:  # optional, enables typed decoding of raw events
+    msgspec = None
+    UNSET = UnsetType = None
+
+logger = logging.getLogger(__name__)
+
+# Mapping "type" -> the JSON values accepted for a field while decoding.
+# Like compiled_validator, a bool is not an integer or number, and a
+# "number" keeps ints as ints so the output matches the generic path.
+FIELD_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": Union[int, float],
+    "boolean": bool,
+    "any": Any,
+}
+
+# Raised by EventDecoder for invalid JSON or a value of an unexpected type
+DecodeError = msgspec.DecodeError if msgspec is not None else ValueError
+
+
+def _field_type(spec: Dict[str, Any]) -> str:
+    return spec.get("type") or ("number" if spec.get("as") == "timestamp" else "string")
+
+
+def mapping_paths(mapping: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(path, type) of every field a mapping reads from an event, in mapping order"""
+    paths = []
+    for field, spec in mapping.items():
+        for item in spec if field == "custom_fields" else [spec]:
+            if "path" in item:
+                paths.append((item["path"], _field_type(item)))
+    return paths
+
+
+def _tree(mapping: Dict[str, Any]) -> Dict[str, Any]:
+    """Nest the mapping's paths: an object is a dict, a list is a one-element list
+    holding the node shared by all of its indexes, and a leaf is its type name"""
+    root: Dict[str, Any] = {}
+    for path, kind in mapping_paths(mapping):
+        if kind not in FIELD_TYPES:
+            raise ValueError(f"Unknown field type {kind!r} for {path}")
+        segments = path.split(".")
+        if segments[0].isdigit():
+            raise ValueError(f"{path} indexes into the event itself, which is an object")
+        node: Any = root
+        for i, segment in enumerate(segments):
+            if i == len(segments) - 1:
+                new: Any = kind
+            else:
+                new = [None] if segments[i + 1].isdigit() else {}
+            key = 0 if isinstance(node, list) else segment
+            child = node[key] if key == 0 else node.get(key)
+            if child is None:
+                node[key] = child = new
+            elif type(child) is not type(new) or (isinstance(child, str) and child != kind):
+                raise ValueError(f"{path} conflicts with another path of the mapping")
+            node = child
+    return root
+
+
+class EventDecoder:
+    """Decode raw JSON events straight into msgspec Structs that hold only the
+    fields a transform mapping reads.
+
+    Everything else in an event is skipped by the parser without building
+    any objects, and the fields that are kept are type-checked while
+    decoding (strings by default, numbers for timestamps, or the mapping's
+    "type"), so a decoded event is valid by construction. An event that
+    does not fit raises DecodeError. Struct attributes are named f0, f1,
+    ... with the JSON keys as their encoded names (see attr()). A missing
+    field is UNSET, a missing or null object or list is None.
+    """
+
+    missing = UNSET
+
+    def __init__(self, mapping: Dict[str, Any]):
+        if msgspec is None:
+            raise ImportError("typed decoding requires msgspec (pip install msgspec)")
+        # Path of every object field, with list indexes as 0 -> its attribute
+        self.attrs: Dict[str, str] = {}
+        self.struct = self._struct(_tree(mapping), "")
+        # Single events (NDJSON lines) and whole JSON arrays
+        self.decode = msgspec.json.Decoder(self.struct).decode
+        self.decode_array = msgspec.json.Decoder(List[self.struct]).decode
+
+    def attr(self, path: str) -> str:
+        """Name of the struct attribute that holds the last segment of an object path"""
+        return self.attrs[".".join("0" if segment.isdigit() else segment for segment in path.split("."))]
+
+    def _type(self, node: Any, prefix: str) -> Any:
+        if isinstance(node, str):
+            return FIELD_TYPES[node]
+        if isinstance(node, list):
+            return Optional[List[self._element(node[0], f"{prefix}.0")]]
+        return Optional[self._struct(node, prefix)]
+
+    def _element(self, node: Any, prefix: str) -> Any:
+        element = self._type(node, prefix)
+        return element if node == "any" else Optional[element]
+
+    def _struct(self, node: Dict[str, Any], prefix: str) -> Any:
+        fields = []
+        rename = {}
+        for key, child in node.items():
+            path = f"{prefix}.{key}" if prefix else key
+            attr = f"f{len(fields)}"
+            self.attrs[path] = attr
+            rename[attr] = key
+            if isinstance(child, str):
+                kind = FIELD_TYPES[child]
+                fields.append((attr, kind if child == "any" else Union[kind, None, UnsetType], UNSET))
+            else:
+                fields.append((attr, self._type(child, path), None))
+        # Structs never form reference cycles, so the garbage collector can skip them
+        return msgspec.defstruct(f"Event{len(self.attrs)}", fields, rename=rename, gc=False)
+
+
+def event_decoder(mapping: Dict[str, Any]) -> Optional[EventDecoder]:
+    """An EventDecoder for mapping, or None when msgspec is not installed or the
+    mapping cannot be typed (e.g. it reads a field both as a value and as an object)"""
+    if msgspec is None:
+        return None
+    try:
+        return EventDecoder(mapping)
+    except ValueError as e:
+        logger.debug(f"Decoding events generically: {e}")
+        return None
@@ -0,0 +1,151 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from fingerprint import content_hash
+from serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+class AppendOnlyLog:
+    """Dict of entries persisted as an append-only JSONL file.
+
+    Every state change is appended as one compact JSON line; on open the file
+    is replayed (last write wins) into an in-memory dict, so lookups are O(1).
+    A torn final line left by a crash is truncated away, so new records always
+    start on a fresh line. Subclasses define how a line maps to an entry.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Any] = {}
+        self.lines = 0
+        self._replay()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _load(self, record: Dict[str, Any]) -> None:
+        """Apply one replayed line to self.entries"""
+        raise NotImplementedError
+
+    def _dump(self, key: str, entry: Any) -> Dict[str, Any]:
+        """Return the line written for an entry"""
+        raise NotImplementedError
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        skipped = 0
+        good_end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn write from a crash; cut it off so new records start on a fresh line
+                    skipped += 1
+                    break
+                good_end += len(line)
+                self.lines += 1
+                try:
+                    self._load(loads(line))
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+        if good_end < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+        if skipped:
+            logger.warning(f"Ignored {skipped} unreadable lines in {self.path}")
+        logger.info(f"Loaded {len(self.entries)} entries from {self.path}")
+
+    def get(self, key: str) -> Any:
+        return self.entries.get(key)
+
+    def put(self, key: str, entry: Any) -> None:
+        """Update an entry and append it to the file"""
+        line = dumps(self._dump(key, entry))
+        with self.lock:
+            self.entries[key] = entry
+            self.file.write(line + "\n")
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+            self.lines += 1
+
+    def compact(self) -> None:
+        """Rewrite the file with one line per live entry"""
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for key, entry in self.entries.items():
+                    f.write(dumps(self._dump(key, entry)) + "\n")
+            self.file.close()
+            os.replace(tmp_path, self.path)
+            self.file = open(self.path, "a", encoding="utf-8")
+            self.lines = len(self.entries)
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+    def __enter__(self) -> "AppendOnlyLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class UploadJournal(AppendOnlyLog):
+    """Append-only on-disk record of upload progress, keyed by use case content hash.
+
+    Each line is {"h": hash, "id": use_case_id, "cf": bool}, written whenever
+    an item changes state, so a restarted run resumes exactly after the last
+    recorded step. Identical use cases within a run get separate keys (see
+    key()), and a run that finishes clears the journal, so it only ever
+    describes the one interrupted run the next run resumes.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        # Times each content hash was seen so far this run
+        self.occurrences: Dict[str, int] = {}
+        super().__init__(path, fsync)
+
+    def key(self, use_case: Any) -> str:
+        """Journal key of the next input use case; call once per use case, in input order.
+
+        The first use case with some content is keyed by its content hash,
+        the n-th repeat by the hash plus n, so a resumed run over the same
+        input maps every use case to the same key as the interrupted one.
+        """
+        h = content_hash(use_case)
+        with self.lock:
+            n = self.occurrences.get(h, 0)
+            self.occurrences[h] = n + 1
+        return content_hash([h, n]) if n else h
+
+    def _load(self, record: Dict[str, Any]) -> None:
+        self.entries[record["h"]] = (record.get("id"), bool(record.get("cf")))
+
+    def _dump(self, key: str, entry: Tuple[Optional[str], bool]) -> Dict[str, Any]:
+        return {"h": key, "id": entry[0], "cf": entry[1]}
+
+    def get(self, key: str) -> Optional[Tuple[Optional[str], bool]]:
+        """Return (use_case_id, custom_fields_set) for a content hash, if recorded"""
+        return self.entries.get(key)
+
+    def is_complete(self, key: str) -> bool:
+        entry = self.entries.get(key)
+        return entry is not None and entry[1]
+
+    def record(self, key: str, use_case_id: Optional[str], custom_fields_set: bool) -> None:
+        """Append the current state of an item to the journal"""
+        self.put(key, (use_case_id, custom_fields_set))
+
+    def clear(self) -> None:
+        """Forget every entry once the run they belong to has finished"""
+        with self.lock:
+            self.entries.clear()
+            self.occurrences.clear()
+            self.file.truncate(0)
+            self.lines = 0
@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from serialization import dumpb
+from upload_journal import AppendOnlyLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 100000
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.json")
+
+
+def schema_version(*paths: str) -> str:
+    """Fingerprint of the files that define what is valid: schema.json and the validator's
+    own source. Editing any of them gives a new version; a missing file counts as empty."""
+    h = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        h.update(os.path.basename(path).encode("utf-8") + b"\0")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                h.update(f.read())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ValidationCache(AppendOnlyLog):
+    """Persistent LRU cache of validation results keyed by record fingerprint.
+
+    A key is the hash of the schema version and the record's canonical
+    JSON (sorted keys), so an unchanged record validated against an
+    unchanged schema is never checked twice, while a schema or validator
+    change makes every earlier result unreachable; those age out like any
+    other entry. At most max_entries results are kept, least recently used
+    first out. Lookups reorder entries only in memory; close() rewrites the
+    file in that order, so recency carries over to the next run. Lines are
+    {"k": key, "e": [errors]}, with no errors for a valid record.
+    """
+
+    def __init__(self, path: str, version: str, max_entries: int = DEFAULT_MAX_ENTRIES, fsync: bool = False):
+        self.version = version.encode("utf-8")
+        self.max_entries = max(1, max_entries)
+        self.hits = self.misses = 0
+        super().__init__(path, fsync)
+        self._evict()
+        self.reordered = False
+
+    def _load(self, record: Dict[str, Any]) -> None:
+        # Replayed in least to most recently used order
+        self.entries.pop(record["k"], None)
+        self.entries[record["k"]] = record["e"]
+
+    def _dump(self, key: str, entry: List[str]) -> Dict[str, Any]:
+        return {"k": key, "e": entry}
+
+    def key(self, record: Any) -> str:
+        h = hashlib.blake2b(self.version, digest_size=16)
+        h.update(b"\0")
+        h.update(dumpb(record, sort_keys=True))
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Cached errors for a key (empty if the record was valid), or None"""
+        with self.lock:
+            errors = self.entries.pop(key, None)
+            if errors is None:
+                self.misses += 1
+                return None
+            # Move to the most recently used end
+            self.entries[key] = errors
+            self.reordered = True
+            self.hits += 1
+            return errors
+
+    def put(self, key: str, entry: List[str]) -> None:
+        super().put(key, entry)
+        self._evict()
+
+    def _evict(self) -> None:
+        with self.lock:
+            excess = len(self.entries) - self.max_entries
+            if excess > 0:
+                for key in list(self.entries)[:excess]:
+                    del self.entries[key]
+                self.reordered = True
+
+    def validate(self, record: Any, validate: Callable[[Any], List[str]], source: Any = None) -> List[str]:
+        """validate(record)'s errors, from the cache if this record was validated before.
+
+        When record is derived from source in a way that only adds fields
+        which cannot affect the result (e.g. generated ids), pass source to
+        key the result on it instead.
+        """
+        key = self.key(record if source is None else source)
+        errors = self.get(key)
+        if errors is None:
+            errors = list(validate(record))
+            self.put(key, errors)
+        return list(errors)
+
+    def close(self) -> None:
+        if self.hits or self.misses:
+            logger.info(f"Validation cache {self.path}: {self.hits} hits, {self.misses} misses, "
+                        f"{len(self.entries)} entries")
+        # Persist the LRU order and drop evicted and superseded lines
+        if self.reordered or self.lines > len(self.entries):
+            self.compact()
+        super().close()